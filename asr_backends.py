@@ -0,0 +1,323 @@
+"""Speech recognition backends behind one interface, with ordered fallback.
+
+Every backend has a ``name`` and ``recognize(audio, language, on_partial=None)``
+taking an ``sr.AudioData`` and returning a ``Hypothesis``, whose
+``confidence`` is None when the backend did not report one. Like
+``recognize_google``, it raises ``sr.UnknownValueError`` when nothing was
+understood and ``sr.RequestError`` when the backend cannot answer (no
+network, no model for the language). ``on_partial(text)`` is called with
+intermediate transcripts by backends that decode incrementally.
+
+Local models are loaded once and stay resident; heavy imports happen in the
+constructors so they can run on a ``startup.BackgroundLoader`` thread.
+"""
+import collections
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import speech_recognition as sr
+
+from stage_trace import RollingHistogram
+
+Hypothesis = collections.namedtuple("Hypothesis", ["text", "language", "confidence", "backend"])
+
+
+def base_language(code):
+    """'hi-IN' -> 'hi'; local models are keyed by the bare language code."""
+    return code.split("-")[0].lower() if code else None
+
+
+def is_english(code):
+    return base_language(code) == "en"
+
+
+def pcm16(audio, sample_rate=16000):
+    """Raw 16-bit mono PCM of ``audio`` resampled to ``sample_rate``."""
+    return audio.get_raw_data(convert_rate=sample_rate, convert_width=2)
+
+
+class GoogleBackend:
+    """The Google Web Speech API through ``speech_recognition`` (network required)."""
+
+    name = "google"
+
+    def __init__(self, recognizer, timeout=5.0):
+        self.recognizer = recognizer
+        self.recognizer.operation_timeout = timeout  # Fail over instead of hanging on a dead link
+
+    def recognize(self, audio, language, on_partial=None):
+        result = self.recognizer.recognize_google(audio, language=language, show_all=True)
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]
+        # Google only reports a confidence for some results; None means unknown, not average
+        return Hypothesis(best["transcript"], language, best.get("confidence"), self.name)
+
+
+class WhisperBackend:
+    """Multilingual Whisper on the CPU via faster-whisper, int8-quantized by default.
+
+    Segments are yielded as they are decoded and reported through
+    ``on_partial``; commands are usually one segment long.
+    """
+
+    name = "whisper"
+
+    def __init__(self, model_size="base", compute_type="int8", beam_size=1, threads=0):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=threads)
+        self.beam_size = beam_size
+
+    def warm_up(self):
+        self.model.transcribe(np.zeros(16000, dtype=np.float32), language="en", beam_size=1)
+
+    def recognize(self, audio, language, on_partial=None):
+        samples = np.frombuffer(pcm16(audio), dtype=np.int16).astype(np.float32) / 32768.0
+        segments, info = self.model.transcribe(
+            samples, language=base_language(language), beam_size=self.beam_size,
+            condition_on_previous_text=False, without_timestamps=True)
+        texts = []
+        logprobs = []
+        for segment in segments:
+            if segment.no_speech_prob > 0.6:
+                continue
+            texts.append(segment.text.strip())
+            logprobs.append(segment.avg_logprob)
+            if on_partial is not None:
+                on_partial(" ".join(texts))
+        text = " ".join(texts).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return Hypothesis(text, info.language, float(np.exp(np.mean(logprobs))), self.name)
+
+
+class VoskStream:
+    """One utterance being decoded incrementally by Vosk."""
+
+    def __init__(self, recognizer, language):
+        self.recognizer = recognizer
+        self.language = language
+
+    def feed(self, data):
+        """Decode more 16 kHz PCM; returns the current partial transcript."""
+        if self.recognizer.AcceptWaveform(data):
+            return json.loads(self.recognizer.Result()).get("text", "")
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def finish(self):
+        result = json.loads(self.recognizer.FinalResult())
+        words = result.get("result", [])
+        confidence = float(np.mean([w["conf"] for w in words])) if words else 0.0
+        return Hypothesis(result.get("text", ""), self.language, confidence, "vosk")
+
+
+class VoskBackend:
+    """Kaldi models via Vosk, one small model per language (``{language: model_dir}``).
+
+    Decoding is truly streaming: ``open_stream`` can be fed microphone chunks
+    as they arrive, and ``recognize`` replays a captured phrase in 0.25 s
+    chunks, reporting each partial.
+    """
+
+    name = "vosk"
+
+    def __init__(self, model_paths, chunk_seconds=0.25):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.models = {lang: Model(path) for lang, path in model_paths.items()}
+        self.chunk = int(16000 * chunk_seconds) * 2
+
+    def warm_up(self):
+        for language in self.models:
+            self.open_stream(language).finish()
+
+    def open_stream(self, language):
+        from vosk import KaldiRecognizer
+        model = self.models.get(base_language(language))
+        if model is None:
+            raise sr.RequestError(f"no Vosk model for '{language}'")
+        recognizer = KaldiRecognizer(model, 16000)
+        recognizer.SetWords(True)
+        return VoskStream(recognizer, base_language(language))
+
+    def recognize(self, audio, language, on_partial=None):
+        stream = self.open_stream(language)
+        data = pcm16(audio)
+        for start in range(0, len(data), self.chunk):
+            partial = stream.feed(data[start:start + self.chunk])
+            if partial and on_partial is not None:
+                on_partial(partial)
+        hypothesis = stream.finish()
+        if not hypothesis.text:
+            raise sr.UnknownValueError()
+        return hypothesis
+
+
+class BackendStats:
+    def __init__(self):
+        self.calls = 0
+        self.answered = 0
+        self.unknown = 0
+        self.errors = 0
+        self.skipped = 0
+        self.latency = RollingHistogram()
+
+
+class FallbackRecognizer:
+    """Tries ``backends`` in order until one answers.
+
+    A backend that raises ``RequestError`` (or crashes) is skipped for
+    ``retry_after`` seconds, so losing the network costs one timeout rather
+    than one per command; if every backend is cooling down they are all tried
+    anyway. "Not understood" ends the search unless ``fallback_on_unknown``.
+    """
+
+    def __init__(self, backends, retry_after=30.0, fallback_on_unknown=False):
+        self.backends = list(backends)
+        self.retry_after = retry_after
+        self.fallback_on_unknown = fallback_on_unknown
+        self.stats = {backend.name: BackendStats() for backend in self.backends}
+        self._down_until = {}
+        # ParallelLanguageRecognizer calls recognize from several threads at once
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return "+".join(backend.name for backend in self.backends)
+
+    def _order(self):
+        now = time.monotonic()
+        with self._lock:
+            up = [b for b in self.backends if self._down_until.get(b.name, 0.0) <= now]
+            for backend in self.backends:
+                if backend not in up:
+                    self.stats[backend.name].skipped += 1
+        return up or self.backends
+
+    def recognize(self, audio, language, on_partial=None):
+        error = None
+        for backend in self._order():
+            stats = self.stats[backend.name]
+            with self._lock:
+                stats.calls += 1
+            started = time.perf_counter()
+            try:
+                hypothesis = backend.recognize(audio, language, on_partial=on_partial)
+            except sr.UnknownValueError as e:
+                with self._lock:
+                    stats.unknown += 1
+                    stats.latency.add(time.perf_counter() - started)
+                error = e
+                if not self.fallback_on_unknown:
+                    raise
+                continue
+            except Exception as e:
+                with self._lock:
+                    stats.errors += 1
+                    self._down_until[backend.name] = time.monotonic() + self.retry_after
+                print(f"ASR backend {backend.name} failed ({e}); trying the next one.")
+                error = e if isinstance(e, sr.RequestError) else sr.RequestError(str(e))
+                continue
+            with self._lock:
+                stats.answered += 1
+                stats.latency.add(time.perf_counter() - started)
+                self._down_until.pop(backend.name, None)
+            return hypothesis
+        raise error or sr.RequestError("no speech recognition backend configured")
+
+    def report(self):
+        print(f"{'ASR backend':<12}{'calls':>7}{'answered':>10}{'unknown':>9}{'errors':>8}"
+              f"{'skipped':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for name, stats in self.stats.items():
+            with self._lock:
+                latency = stats.latency.summary()
+            print(f"{name:<12}{stats.calls:>7}{stats.answered:>10}{stats.unknown:>9}{stats.errors:>8}"
+                  f"{stats.skipped:>9}{latency['p50'] * 1000:>9.0f}{latency['p95'] * 1000:>9.0f}")
+
+
+class ParallelLanguageRecognizer:
+    """Recognizes each phrase in every candidate language at once and keeps the most confident result.
+
+    Requests run concurrently on a thread pool. The answer is the best
+    hypothesis available when all languages have answered, one reaches
+    ``accept_confidence``, or ``deadline`` seconds pass. Requests that have
+    not started are cancelled and ones still in flight are abandoned (their
+    results are ignored).
+
+    A hypothesis without a confidence ranks below every one with a
+    confidence and never ends the wait early. Equal ranks go to the
+    language that has won most phrases so far (the one being spoken), then
+    to the result that arrived first.
+    """
+
+    def __init__(self, recognizer, languages, deadline=3.0, accept_confidence=0.9):
+        self.recognizer = recognizer
+        self.languages = list(languages)
+        self.deadline = deadline
+        self.accept_confidence = accept_confidence
+        # Room for abandoned requests to finish without delaying the next phrase
+        self.pool = ThreadPoolExecutor(max_workers=2 * len(self.languages), thread_name_prefix="asr-language")
+        self.wins = collections.Counter()
+        self.cancelled = 0
+        self.abandoned = 0
+        self.deadline_hits = 0
+        self.latency = RollingHistogram()
+
+    @property
+    def name(self):
+        return f"{self.recognizer.name}[{','.join(self.languages)}]"
+
+    def _rank(self, hypothesis):
+        known = hypothesis.confidence is not None
+        return known, hypothesis.confidence if known else 0.0, self.wins[hypothesis.language]
+
+    def recognize(self, audio, language=None, on_partial=None):
+        started = time.perf_counter()
+        order = {lang: i for i, lang in enumerate(self.languages)}
+        futures = {self.pool.submit(self.recognizer.recognize, audio, lang): lang for lang in self.languages}
+        pending = set(futures)
+        best = None
+        errors = []
+        while pending:
+            remaining = started + self.deadline - time.perf_counter()
+            if remaining <= 0:
+                self.deadline_hits += 1
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: order[futures[f]]):
+                try:
+                    hypothesis = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if best is None or self._rank(hypothesis) > self._rank(best):
+                    best = hypothesis
+            if best is not None and best.confidence is not None and best.confidence >= self.accept_confidence:
+                break
+        for future in pending:
+            if future.cancel():
+                self.cancelled += 1
+            else:
+                self.abandoned += 1
+        self.latency.add(time.perf_counter() - started)
+        if best is None:
+            if errors and all(isinstance(e, sr.RequestError) for e in errors):
+                raise errors[0]
+            raise sr.UnknownValueError()
+        self.wins[best.language] += 1
+        return best
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def report(self):
+        latency = self.latency.summary()
+        wins = ", ".join(f"{lang} {self.wins[lang]}" for lang in self.languages)
+        print(f"Language selection: {wins}; p50 {latency['p50'] * 1000:.0f} ms, "
+              f"p95 {latency['p95'] * 1000:.0f} ms; {self.deadline_hits} deadline hits, "
+              f"{self.cancelled} requests cancelled, {self.abandoned} abandoned")
+        self.recognizer.report()
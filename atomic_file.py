@@ -0,0 +1,33 @@
+"""Atomic file writes for caches, models and manifests.
+
+The data goes to a temporary file next to the target, which then replaces
+the target in one ``os.replace``: a crash mid-write leaves the previous
+file intact, never a truncated one.
+"""
+import contextlib
+import json
+import os
+
+
+@contextlib.contextmanager
+def atomic_path(path, suffix=".tmp"):
+    """Yield a temporary path to write; on success it replaces ``path``, on error it is removed.
+
+    ``np.savez`` appends ``.npz`` to names without it, so pass
+    ``suffix=".tmp.npz"`` for it.
+    """
+    tmp_path = path + suffix
+    try:
+        yield tmp_path
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """``json.dump`` ``data`` to ``path`` atomically; ``dump_kwargs`` go to ``json.dump``."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
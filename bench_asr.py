@@ -0,0 +1,139 @@
+"""Benchmark ASR backends on a recorded corpus: real-time factor, latency and WER per language.
+
+Corpus lines are JSON objects ``{"wav": "clips/hi_up_1.wav", "language": "hi", "text": "ऊपर जाओ"}``.
+For batch backends end-to-end latency is the whole decode, which only starts
+once the phrase has ended. Streaming backends (Vosk) decode while the
+operator is still speaking, so theirs is the time to finalize plus any
+backlog, if decoding ran slower than real time.
+
+    python bench_asr.py [--corpus asr_corpus.jsonl] [--backends google whisper vosk]
+                        [--whisper-model base] [--vosk-model hi=models/vosk-model-small-hi-0.22]
+"""
+import argparse
+import collections
+import json
+import time
+
+import speech_recognition as sr
+
+from asr_backends import GoogleBackend, pcm16
+from phrase_matcher import tokenize
+from stage_trace import RollingHistogram
+
+
+def word_errors(reference, hypothesis):
+    """(edit distance in words, reference length)."""
+    ref = tokenize(reference)
+    hyp = tokenize(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[-1], len(ref)
+
+
+def make_backend(name, args):
+    if name == "google":
+        return GoogleBackend(sr.Recognizer())
+    if name == "whisper":
+        from asr_backends import WhisperBackend
+        return WhisperBackend(args.whisper_model, compute_type=args.compute_type)
+    if name == "vosk":
+        from asr_backends import VoskBackend
+        return VoskBackend(dict(spec.split("=", 1) for spec in args.vosk_model))
+    raise SystemExit(f"unknown backend {name}")
+
+
+def run_streaming(backend, audio, language):
+    """Decode chunk by chunk; returns (text, decode s, end-to-end s, first partial s)."""
+    stream = backend.open_stream(language)
+    data = pcm16(audio)
+    duration = len(data) / 2 / 16000
+    first_partial = None
+    started = time.perf_counter()
+    for start in range(0, len(data), backend.chunk):
+        if stream.feed(data[start:start + backend.chunk]) and first_partial is None:
+            first_partial = time.perf_counter() - started
+    fed = time.perf_counter() - started
+    hypothesis = stream.finish()
+    decode = time.perf_counter() - started
+    return hypothesis.text, decode, max(0.0, fed - duration) + (decode - fed), first_partial
+
+
+def run_batch(backend, audio, language):
+    first = []
+    started = time.perf_counter()
+    hypothesis = backend.recognize(
+        audio, language, on_partial=lambda text: first.append(time.perf_counter() - started) if not first else None)
+    decode = time.perf_counter() - started
+    return hypothesis.text, decode, decode, first[0] if first else None
+
+
+class Tally:
+    def __init__(self):
+        self.latency = RollingHistogram()
+        self.first_partial = RollingHistogram()
+        self.audio = 0.0
+        self.decode = 0.0
+        self.errors = 0
+        self.words = 0
+        self.failures = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default="asr_corpus.jsonl")
+    parser.add_argument("--backends", nargs="+", default=["google", "whisper"])
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--vosk-model", action="append", default=[], metavar="LANG=DIR")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    recordings = []
+    for entry in corpus:
+        with sr.AudioFile(entry["wav"]) as source:
+            audio = sr.Recognizer().record(source)
+        recordings.append((entry, audio, len(audio.frame_data) / audio.sample_width / audio.sample_rate))
+
+    print(f"{'backend':<9}{'lang':<6}{'n':>4}{'RTF':>7}{'e2e p50':>9}{'e2e p95':>9}"
+          f"{'partial':>9}{'WER':>7}{'fail':>6}")
+    for name in args.backends:
+        backend = make_backend(name, args)
+        if hasattr(backend, "warm_up"):
+            backend.warm_up()
+        tallies = collections.defaultdict(Tally)
+        for entry, audio, duration in recordings:
+            tally = tallies[entry["language"]]
+            try:
+                if hasattr(backend, "open_stream"):
+                    text, decode, latency, first = run_streaming(backend, audio, entry["language"])
+                else:
+                    text, decode, latency, first = run_batch(backend, audio, entry["language"])
+            except (sr.UnknownValueError, sr.RequestError):
+                text, decode, latency, first = "", 0.0, None, None
+                tally.failures += 1
+            errors, words = word_errors(entry["text"], text)
+            tally.errors += errors
+            tally.words += words
+            if latency is not None:
+                tally.audio += duration
+                tally.decode += decode
+                tally.latency.add(latency)
+            if first is not None:
+                tally.first_partial.add(first)
+        for language in sorted(tallies):
+            tally = tallies[language]
+            latency = tally.latency.summary()
+            partial = tally.first_partial.summary()
+            rtf = tally.decode / tally.audio if tally.audio else 0.0
+            shown = f"{partial['p50'] * 1000:>7.0f}ms" if partial["count"] else f"{'-':>9}"
+            print(f"{name:<9}{language:<6}{latency['count'] + tally.failures:>4}{rtf:>7.2f}"
+                  f"{latency['p50'] * 1000:>7.0f}ms{latency['p95'] * 1000:>7.0f}ms{shown}"
+                  f"{tally.errors / max(1, tally.words):>7.0%}{tally.failures:>6}")
+
+
+if __name__ == "__main__":
+    main()
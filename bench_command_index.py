@@ -0,0 +1,82 @@
+"""Microbenchmark: per-utterance latency of map_to_drone_command, before and after
+the precomputed keyword-vector index.
+
+    python bench_command_index.py [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+
+import spacy
+
+from command_index import CommandVectorIndex
+from command_vocab import command_mappings
+
+utterances = [
+    "take off", "go up", "move forward", "go back a little", "turn to the left",
+    "rotate right", "stop", "please land now", "scan the area", "start recording",
+    "climb higher", "descend slowly", "hold position", "fly", "what is the weather",
+]
+
+
+def legacy_map(nlp, command_text):
+    """The original per-utterance loop: one nlp() call per keyword."""
+    command_doc = nlp(command_text)
+    mapped_command = None
+    max_similarity = 0.0
+    for command, keywords in command_mappings.items():
+        for keyword in keywords:
+            keyword_doc = nlp(keyword)
+            similarity = command_doc.similarity(keyword_doc)
+            if similarity > max_similarity and similarity > 0.7:
+                max_similarity = similarity
+                mapped_command = command
+    return mapped_command
+
+
+def time_per_call(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        for text in utterances:
+            start = time.perf_counter()
+            function(text)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    print(f"{name:>8}: mean {statistics.mean(samples) * 1000:8.3f} ms   "
+          f"p50 {statistics.median(samples) * 1000:8.3f} ms   p95 {p95 * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--model", default="en_core_web_md")
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.model)
+    start = time.perf_counter()
+    index = CommandVectorIndex(nlp, command_mappings)
+    print(f"Index built: {len(index)} keywords in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    mismatches = 0
+    for text in utterances:
+        before = legacy_map(nlp, text)
+        after, _ = index.best_match(text, threshold=0.7)
+        if before != after:
+            mismatches += 1
+            print(f"Mismatch for '{text}': loop={before} index={after}")
+    print(f"Agreement: {len(utterances) - mismatches}/{len(utterances)} utterances")
+
+    legacy = time_per_call(lambda text: legacy_map(nlp, text), args.repeat)
+    indexed = time_per_call(lambda text: index.best_match(text, threshold=0.7), args.repeat)
+    report("loop", legacy)
+    report("index", indexed)
+    print(f"Speedup: {statistics.mean(legacy) / statistics.mean(indexed):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
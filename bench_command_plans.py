@@ -0,0 +1,110 @@
+"""Benchmark: RPCs and wall time per compound command, one motion per step vs coalesced segments.
+
+Each utterance is parsed with ``CommandPlanner`` and flown on a fake AirSim
+client whose moves take distance / velocity plus a fixed stop-and-settle
+time, as a real multirotor decelerates to a halt at every target. The
+per-step run issues one ``moveToPositionAsync`` or ``rotateToYawAsync`` per
+step; the coalesced run flies consecutive moves as one ``moveOnPathAsync``.
+
+    python bench_command_plans.py [--velocity 2] [--settle 1.0] [--time-scale 0.05]
+"""
+import argparse
+import math
+import time
+from types import SimpleNamespace
+
+import spacy
+
+from command_index import CommandVectorIndex
+from command_planner import TRANSLATIONS, CommandPlanner, coalesce, format_plan, world_path
+from command_vocab import command_mappings
+from fake_airsim import FakeMultirotorClient
+from telemetry import snapshot_from_state
+
+utterances = [
+    "go forward 5 meters then turn left and go up",
+    "take off, go up 3 meters then forward 10 meters then right 2 meters",
+    "go forward 4 meters, right 4 meters, backward 4 meters and left 4 meters",
+    "turn right 45 degrees then turn right 45 degrees and go forward 5 meters",
+    "go up 2 meters then forward 6 meters then down 2 meters and land",
+]
+
+
+class KinematicClient(FakeMultirotorClient):
+    """Moves take their length / velocity plus ``settle`` seconds to come to a stop."""
+
+    def __init__(self, settle=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.settle = settle
+
+    def moveToPositionAsync(self, x, y, z, velocity, timeout_sec=3e38, *args, **kwargs):
+        length = math.dist(self.position, (x, y, z))
+        return self._start("moveToPositionAsync", self._move_to(x, y, z), duration=length / velocity + self.settle)
+
+    def moveOnPathAsync(self, path, velocity, timeout_sec=3e38, *args, **kwargs):
+        points = [tuple(self.position)] + [(p.x_val, p.y_val, p.z_val) for p in path]
+        length = sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+        end = path[-1]
+        return self._start("moveOnPathAsync", self._move_to(end.x_val, end.y_val, end.z_val),
+                           duration=length / velocity + self.settle)
+
+
+def run_segment(client, kind, value, velocity):
+    """Issue one motion RPC from the current pose and wait for it."""
+    state = snapshot_from_state(client.getMultirotorState())
+    if kind == "move":
+        points = world_path(value, state.x, state.y, state.z, state.yaw)
+        if len(points) == 1:
+            client.moveToPositionAsync(*points[0], velocity).join()
+        else:
+            client.moveOnPathAsync([SimpleNamespace(x_val=x, y_val=y, z_val=z) for x, y, z in points], velocity).join()
+    elif kind == "rotate":
+        client.rotateToYawAsync(math.degrees(state.yaw) + value).join()
+    elif value == "takeoff":
+        client.takeoffAsync().join()
+    elif value == "land":
+        client.landAsync().join()
+
+
+def fly_per_step(client, steps, velocity):
+    for step in steps:
+        for segment in coalesce([step]):
+            run_segment(client, segment.kind, segment.value, velocity)
+
+
+def fly_coalesced(client, steps, velocity):
+    for segment in coalesce(steps):
+        run_segment(client, segment.kind, segment.value, velocity)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--velocity", type=float, default=2.0)
+    parser.add_argument("--settle", type=float, default=1.0)
+    parser.add_argument("--time-scale", type=float, default=0.05, help="multiplier for simulated motion time")
+    args = parser.parse_args()
+
+    nlp = spacy.load("en_core_web_md")
+    planner = CommandPlanner(nlp, CommandVectorIndex(nlp, command_mappings))
+    print(f"{'':<6}{'parse ms':>9}{'steps':>7}{'RPCs':>12}{'motions':>10}{'sim s':>14}")
+    for text in utterances:
+        start = time.perf_counter()
+        steps = planner.plan(text)
+        parse_ms = (time.perf_counter() - start) * 1000
+        moves = sum(step.action in TRANSLATIONS for step in steps)
+        print(f"{text!r}\n  plan: {format_plan(steps)} ({moves} moves)")
+        results = []
+        for fly in (fly_per_step, fly_coalesced):
+            client = KinematicClient(settle=args.settle, time_scale=args.time_scale)
+            start = time.perf_counter()
+            fly(client, steps, args.velocity)
+            seconds = (time.perf_counter() - start) / args.time_scale
+            motions = sum(count for name, count in client.calls.items() if name.endswith("Async"))
+            results.append((sum(client.calls.values()), motions, seconds))
+        (rpcs, motions, seconds), (rpcs2, motions2, seconds2) = results
+        print(f"{'':<6}{parse_ms:>9.1f}{len(steps):>7}{rpcs:>5} -> {rpcs2:<4}{motions:>4} -> {motions2:<3}"
+              f"{seconds:>6.1f} -> {seconds2:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: how long a "stop" waits behind an in-flight takeoff.
+
+Compares the old execute_command_in_thread (set stop_event, join the previous
+thread, spawn a new one) with CommandDispatcher, using a simulated AirSim
+client whose takeoffAsync().join() blocks until the task finishes or
+cancelLastTask() is called.
+
+    python bench_dispatcher.py [--takeoff-s 2.0] [--runs 5]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from command_dispatcher import CommandDispatcher
+
+
+class SimulatedTask:
+    def __init__(self, duration):
+        self._done = threading.Event()
+        self._timer = threading.Timer(duration, self._done.set)
+        self._timer.start()
+
+    def cancel(self):
+        self._timer.cancel()
+        self._done.set()
+
+    def join(self):
+        self._done.wait()
+
+
+class SimulatedClient:
+    """Only what the benchmark needs: one long task that cancelLastTask can end."""
+
+    def __init__(self, takeoff_s):
+        self.takeoff_s = takeoff_s
+        self.last_task = None
+
+    def takeoffAsync(self):
+        self.last_task = SimulatedTask(self.takeoff_s)
+        return self.last_task
+
+    def cancelLastTask(self):
+        if self.last_task is not None:
+            self.last_task.cancel()
+
+
+def legacy_run(client):
+    """Old behaviour: a stop queued after takeoff waits for takeoff's join()."""
+    stop_event = threading.Event()
+    state = {"thread": None}
+    stop_started = threading.Event()
+
+    def execute_command_in_thread(function):
+        stop_event.set()
+        if state["thread"]:
+            state["thread"].join()
+        stop_event.clear()
+        state["thread"] = threading.Thread(target=function)
+        state["thread"].start()
+
+    execute_command_in_thread(lambda: client.takeoffAsync().join())
+    time.sleep(0.05)
+    issued = time.perf_counter()
+    execute_command_in_thread(stop_started.set)
+    stop_started.wait()
+    return time.perf_counter() - issued
+
+
+def dispatcher_run(client):
+    dispatcher = CommandDispatcher(on_preempt=client.cancelLastTask).start()
+    stop_started = threading.Event()
+
+    def takeoff():
+        client.takeoffAsync().join()
+
+    def stop():
+        stop_started.set()
+
+    dispatcher.submit(takeoff)
+    time.sleep(0.05)
+    issued = time.perf_counter()
+    dispatcher.submit(stop)
+    stop_started.wait()
+    elapsed = time.perf_counter() - issued
+    dispatcher.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--takeoff-s", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, run in (("legacy", legacy_run), ("dispatcher", dispatcher_run)):
+        samples = [run(SimulatedClient(args.takeoff_s)) for _ in range(args.runs)]
+        print(f"{name:>10}: stop started after {statistics.median(samples) * 1000:8.1f} ms median "
+              f"(max {max(samples) * 1000:.1f} ms) during a {args.takeoff_s:.1f} s takeoff")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark: cost of recording a session with the binary flight recorder vs JSON lines.
+
+Each run appends a 20 Hz-style mix of kinematics samples and command events;
+the JSON-lines baseline writes and flushes one line per event, as the
+latency log does. Reading loads the whole session back for analysis.
+
+    python bench_flight_recorder.py [--records 200000] [--chunk 65536]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from flight_recorder import FlightRecorder, read_flight_log, records_of
+from telemetry import TelemetrySnapshot
+
+
+def events(count):
+    """Mostly kinematics, with a transcript, an action and two latencies every 40 samples."""
+    snapshot = TelemetrySnapshot(1.0, 2.0, -3.0, 0.5, 0.1, 0.0, 0.0, 0.0)
+    for i in range(count):
+        if i % 40 == 0:
+            yield "transcript", ("go up", "en", 0.9, i)
+        elif i % 40 == 1:
+            yield "action", ("up", "rules", 1.0, i)
+        elif i % 40 in (2, 3):
+            yield "latency", ("classify", "rules", 0.004, i)
+        else:
+            yield "kinematics", (snapshot,)
+
+
+def record_binary(path, count, chunk):
+    recorder = FlightRecorder(os.path.dirname(path), chunk_records=chunk, session=os.path.basename(path))
+    samples = []
+    for kind, args in events(count):
+        start = time.perf_counter()
+        if kind == "kinematics":
+            recorder.kinematics(*args)
+        elif kind == "transcript":
+            recorder.transcript(*args[:3], trace=args[3])
+        elif kind == "action":
+            recorder.action(*args[:3], trace=args[3])
+        else:
+            recorder.latency(*args[:3], trace=args[3])
+        samples.append(time.perf_counter() - start)
+    recorder.close()
+    return samples, recorder.path
+
+
+def record_json(path, count):
+    samples = []
+    with open(path, "w", encoding="utf-8") as f:
+        for kind, args in events(count):
+            start = time.perf_counter()
+            if kind == "kinematics":
+                s = args[0]
+                entry = {"ts": time.time(), "kind": kind, "x": s.x, "y": s.y, "z": s.z, "yaw": s.yaw,
+                         "vx": s.vx, "vy": s.vy, "vz": s.vz}
+            else:
+                entry = {"ts": time.time(), "kind": kind, "text": args[0], "label": args[1],
+                         "value": args[2], "trace": args[3]}
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            samples.append(time.perf_counter() - start)
+    return samples, path
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    return np.array([(e["x"], e["y"], e["z"]) for e in entries if e["kind"] == "kinematics"])
+
+
+def read_binary(path):
+    kinematics = records_of(read_flight_log(path), "kinematics")
+    return np.stack([kinematics["x"], kinematics["y"], kinematics["z"]], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=65536)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        runs = (
+            ("json lines", lambda: record_json(os.path.join(root, "session.jsonl"), args.records), read_json),
+            ("binary", lambda: record_binary(os.path.join(root, "session"), args.records, args.chunk), read_binary),
+        )
+        print(f"{'format':>12}{'p50 us':>9}{'p99 us':>9}{'max us':>10}{'MB':>8}{'read ms':>10}")
+        for name, record, read in runs:
+            samples, path = record()
+            start = time.perf_counter()
+            positions = read(path)
+            read_ms = (time.perf_counter() - start) * 1000
+            assert len(positions) == sum(1 for kind, _ in events(args.records) if kind == "kinematics")
+            p50, p99 = np.percentile(samples, [50, 99]) * 1e6
+            print(f"{name:>12}{p50:>9.1f}{p99:>9.1f}{max(samples) * 1e6:>10.0f}"
+                  f"{os.path.getsize(path) / 2 ** 20:>8.1f}{read_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
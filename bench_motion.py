@@ -0,0 +1,99 @@
+"""Benchmark: wakeups and cancellation latency of motion waits with a simulated client.
+
+The old motion functions polled ``stop_event`` every 100 ms; wait_for_motion
+blocks on the AirSim future or the command's cancel token. Wakeups are the
+waiting thread's voluntary context switches (Linux RUSAGE_THREAD).
+
+    python bench_motion.py [--motion-s 3.0] [--cancel-after 1.05]
+"""
+import argparse
+import threading
+import time
+
+try:
+    import resource  # Not available on Windows; wakeups are then reported as n/a
+except ImportError:
+    resource = None
+
+from command_dispatcher import CancelToken
+from motion import wait_for_motion
+
+
+class SimulatedFuture:
+    """Stands in for the msgpack-rpc future of moveToPositionAsync."""
+
+    def __init__(self, duration):
+        self._done = threading.Event()
+        self._timer = threading.Timer(duration, self._done.set)
+        self._timer.start()
+
+    def cancel(self):
+        self._timer.cancel()
+        self._done.set()
+
+    def join(self):
+        self._done.wait()
+
+
+def legacy_wait(task, stop_event):
+    """The old loop: runs until the next command, whether or not the move finished."""
+    while not stop_event.is_set():
+        time.sleep(0.1)
+    return None
+
+
+def thread_switches():
+    if resource is None:
+        return None
+    try:
+        return resource.getrusage(resource.RUSAGE_THREAD).ru_nvcsw
+    except (AttributeError, ValueError):
+        return None
+
+
+def measure(wait, motion_s, cancel_after):
+    task = SimulatedFuture(motion_s)
+    token = CancelToken()
+    result = {}
+
+    def waiter():
+        before = thread_switches()
+        wait(task, token)
+        after = thread_switches()
+        result["returned"] = time.perf_counter()
+        result["wakeups"] = after - before if before is not None else None
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(cancel_after)
+    cancelled_at = time.perf_counter()
+    token.cancel()
+    thread.join()
+    task.cancel()
+    return result["wakeups"], max(0.0, result["returned"] - cancelled_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--motion-s", type=float, default=3.0)
+    parser.add_argument("--cancel-after", type=float, default=1.05)
+    args = parser.parse_args()
+
+    runs = (
+        ("legacy poll", legacy_wait),
+        ("event wait", lambda task, token: wait_for_motion(task, token, cancel_task=task.cancel)),
+    )
+    for name, wait in runs:
+        wakeups, latency = measure(wait, args.motion_s, args.cancel_after)
+        shown = "n/a" if wakeups is None else wakeups
+        print(f"{name:>12}: {shown} wakeups while waiting {args.cancel_after:.1f} s, "
+              f"returned {latency * 1000:.1f} ms after cancellation")
+
+    start = time.perf_counter()
+    result = wait_for_motion(SimulatedFuture(0.5), CancelToken(), name="Move")
+    print(f"  completion: {result} (reported {result.elapsed * 1000:.1f} ms, "
+          f"wall {(time.perf_counter() - start) * 1000:.1f} ms for a 500 ms move)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark: main-process responsiveness with NLU in-process vs in the NLU server.
+
+A ticker thread stands in for audio capture and the AirSim RPC threads: it
+wakes every 10 ms and records how late it was. NLU calls run on another
+thread, first in this process and then through ``NLUServer``. The synthetic
+engine is pure-Python work that holds the GIL like spaCy tokenization or a
+CPU forward pass; ``--engine spacy`` and ``--engine zero-shot`` use the real
+models.
+
+    python bench_nlu_server.py [--engine synthetic|spacy|zero-shot] [--calls 40] [--work-ms 50]
+"""
+import argparse
+import functools
+import statistics
+import threading
+import time
+
+from nlu_server import NLUServer
+
+utterances = [
+    "take off", "go up", "move forward", "go back a little", "turn to the left",
+    "rotate right", "stop", "please land now", "fly higher", "come down",
+]
+
+
+class SyntheticEngine:
+    """Spends ``work_ms`` of pure-Python CPU per call without releasing the GIL."""
+
+    def __init__(self, work_ms):
+        self.work_ms = work_ms
+
+    def classify(self, text):
+        deadline = time.perf_counter() + self.work_ms / 1000
+        total = 0
+        while time.perf_counter() < deadline:
+            total += sum(ord(c) for c in text)
+        return "stop", 1.0
+
+
+def synthetic_engine(work_ms):
+    return SyntheticEngine(work_ms)
+
+
+def spacy_engine():
+    import spacy
+    from command_index import CommandVectorIndex
+    from command_vocab import command_mappings
+
+    index = CommandVectorIndex(spacy.load("en_core_web_md"), command_mappings)
+    index.classify = lambda text: index.best_match(text, threshold=0.7)
+    return index
+
+
+def zero_shot_engine():
+    from command_vocab import labels
+    from zero_shot_engine import ZeroShotEngine
+    return ZeroShotEngine(labels)
+
+
+def measure(engine, calls, period=0.01):
+    """(tick lateness samples, call latency samples) while ``calls`` NLU calls run on a worker thread."""
+    lateness = []
+    latencies = []
+    done = threading.Event()
+
+    def ticker():
+        next_tick = time.perf_counter() + period
+        while not done.is_set():
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+            now = time.perf_counter()
+            lateness.append(now - next_tick)
+            next_tick = max(next_tick + period, now)
+
+    def caller():
+        for i in range(calls):
+            start = time.perf_counter()
+            engine.classify(utterances[i % len(utterances)])
+            latencies.append(time.perf_counter() - start)
+        done.set()
+
+    threads = [threading.Thread(target=ticker), threading.Thread(target=caller)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return lateness, latencies
+
+
+def report(name, lateness, latencies):
+    lateness = sorted(lateness)
+    latencies = sorted(latencies)
+    print(f"{name:>10}: tick late p50 {statistics.median(lateness) * 1000:6.2f} ms   "
+          f"p95 {lateness[int(0.95 * (len(lateness) - 1))] * 1000:6.2f} ms   max {lateness[-1] * 1000:6.1f} ms   "
+          f"| call p50 {statistics.median(latencies) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=("synthetic", "spacy", "zero-shot"), default="synthetic")
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--work-ms", type=float, default=50.0, help="CPU time per synthetic call")
+    args = parser.parse_args()
+
+    factory = {
+        "synthetic": functools.partial(synthetic_engine, args.work_ms),
+        "spacy": spacy_engine,
+        "zero-shot": zero_shot_engine,
+    }[args.engine]
+
+    local = factory()
+    local.classify(utterances[0])
+    report("in-process", *measure(local, args.calls))
+
+    server = NLUServer({"nlu": factory}, timeout=30.0).start().wait_ready()
+    try:
+        remote = server.engine("nlu")
+        remote.classify(utterances[0])
+        report("server", *measure(remote, args.calls))
+        server.report()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
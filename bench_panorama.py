@@ -0,0 +1,60 @@
+"""Benchmark: panoramic sweep time with writes overlapped or inline, on the fake AirSim client.
+
+The inline run waits for every step's files to reach the disk before the
+next rotation, as the old single-frame scan did per capture; the overlapped
+run issues the next rotation straight after the capture RPC.
+
+    python bench_panorama.py [--steps 8] [--rotate-s 0.2] [--size 1280x720]
+"""
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+from fake_airsim import FakeMultirotorClient
+from image_capture import ImageCapture
+from panorama import format_sweep, panorama_sweep
+
+
+# front_center Scene (PNG), Segmentation (raw) and DepthPlanar (float), as the scan views request them
+REQUESTS = [
+    SimpleNamespace(camera_name="front_center", image_type=0, pixels_as_float=False, compress=True),
+    SimpleNamespace(camera_name="front_center", image_type=5, pixels_as_float=False, compress=False),
+    SimpleNamespace(camera_name="front_center", image_type=1, pixels_as_float=True, compress=False),
+]
+
+
+class InlineCapture:
+    """``ImageCapture`` that returns only once the batch is written."""
+
+    def __init__(self, capture):
+        self._capture = capture
+        self.root = capture.root
+
+    def capture(self, requests, label="capture", directory=""):
+        result = self._capture.capture(requests, label, directory)
+        self._capture.flush()
+        return result
+
+    def flush(self):
+        self._capture.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--rotate-s", type=float, default=0.2)
+    parser.add_argument("--size", default="1280x720")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    for name, wrap in (("inline", InlineCapture), ("overlapped", lambda capture: capture)):
+        with tempfile.TemporaryDirectory() as root:
+            client = FakeMultirotorClient(delays={"rotateToYawAsync": args.rotate_s}, image_size=(width, height))
+            capture = ImageCapture(client, root=root)
+            result = panorama_sweep(client, wrap(capture), REQUESTS, steps=args.steps)
+            capture.close()
+            print(f"{name:>10}: {format_sweep(result).split('; manifest')[0]}")
+
+
+if __name__ == "__main__":
+    main()
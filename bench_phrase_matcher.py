@@ -0,0 +1,89 @@
+"""Throughput benchmark: substring-scan DroneCommandProcessor vs the token-trie matcher.
+
+Reports commands per second on the built-in vocabulary and on vocabularies
+padded with thousands of synthetic synonyms.
+
+    python bench_phrase_matcher.py [--seconds 1.0] [--synonyms 0 1000 5000]
+"""
+import argparse
+import time
+
+from command_processor import DroneCommandProcessor
+
+utterances = [
+    "take off", "go up", "move forward", "go back", "turn left", "rotate right",
+    "stop", "please land now", "fly higher", "come down slowly", "spin counterclockwise",
+    "don't move", "go straight ahead", "hover here", "what is the weather like today",
+]
+
+
+class LegacyCommandProcessor(DroneCommandProcessor):
+    """The original substring implementation, kept for comparison."""
+
+    def process_command(self, text):
+        text = text.lower().strip()
+        if any(stop_word in text for stop_word in self.commands['stop']):
+            return {'action': 'stop'}
+        parts = text.split()
+        if any(word in parts for word in ['dont', "don't", 'not']):
+            return {'action': 'stop'}
+        return {'action': self._legacy_match(text)} if self._legacy_match(text) else None
+
+    def _legacy_match(self, text):
+        if any(rot in text for rot in ['rotate', 'turn', 'spin']):
+            if any(left in text for left in ['left', 'counterclockwise']):
+                return 'rotate_left'
+            elif any(right in text for right in ['right', 'clockwise']):
+                return 'rotate_right'
+        for command, variations in self.commands.items():
+            if any(variation in text for variation in variations):
+                if (command in ['rotate_left', 'rotate_right'] and
+                        not any(rot in text for rot in ['rotate', 'turn', 'spin'])):
+                    continue
+                return command
+        return None
+
+
+def padded(processor_class, synonyms):
+    processor = processor_class()
+    if synonyms:
+        per_command = synonyms // len(processor.commands)
+        for command, variations in processor.commands.items():
+            variations.extend(f"{command}x{i} phrase" for i in range(per_command))
+        if hasattr(processor, "_build_matcher"):
+            processor._matcher = processor._build_matcher()
+    return processor
+
+
+def throughput(processor, seconds):
+    done = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for text in utterances:
+            processor.process_command(text)
+        done += len(utterances)
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--synonyms", type=int, nargs="+", default=[0, 1000, 5000])
+    args = parser.parse_args()
+
+    for synonyms in args.synonyms:
+        legacy = padded(LegacyCommandProcessor, synonyms)
+        trie = padded(DroneCommandProcessor, synonyms)
+        changed = [t for t in utterances if legacy.process_command(t) != trie.process_command(t)]
+        legacy_rate = throughput(legacy, args.seconds)
+        trie_rate = throughput(trie, args.seconds)
+        print(f"+{synonyms:>5} synonyms: substring {legacy_rate:>10,.0f} cmd/s   "
+              f"trie {trie_rate:>10,.0f} cmd/s   ({trie_rate / legacy_rate:.1f}x)")
+        for text in changed:
+            print(f"    word-boundary change for '{text}': "
+                  f"{legacy.process_command(text)} -> {trie.process_command(text)}")
+
+
+if __name__ == "__main__":
+    main()
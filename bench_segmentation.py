@@ -0,0 +1,77 @@
+"""Throughput of the vectorized segmentation analysis on synthetic frames.
+
+Frames are random rectangles of distinct colours over a background. The
+sort-based ``class_stats`` is compared with a per-class mask loop (one full
+pass over the frame per colour) and checked to give identical results.
+
+    python bench_segmentation.py [--sizes 256x144 640x480 1280x720 1920x1080] [--classes 12] [--frames 20]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from segmentation import SegmentationAnalyzer, class_stats
+
+
+def synthetic_frame(width, height, classes, rng):
+    palette = rng.integers(0, 256, size=(classes, 3), dtype=np.uint8)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = palette[0]
+    for color in palette[1:]:
+        w, h = rng.integers(width // 20, width // 3), rng.integers(height // 20, height // 3)
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        frame[y:y + h, x:x + w] = color
+    return frame
+
+
+def mask_loop_stats(pixels):
+    """Baseline: one boolean mask and ``np.nonzero`` per distinct colour."""
+    colors = np.unique(pixels.reshape(-1, 3), axis=0)
+    result = []
+    for color in colors:
+        ys, xs = np.nonzero(np.all(pixels == color, axis=2))
+        result.append((tuple(int(c) for c in color), len(xs),
+                       (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max()))))
+    return sorted(result, key=lambda item: -item[1])
+
+
+def time_frames(function, frames):
+    samples = []
+    for frame in frames:
+        start = time.perf_counter()
+        function(frame)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["256x144", "640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--classes", type=int, default=12)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>10}{'vectorized':>12}{'mask loop':>12}{'speedup':>9}{'MP/s':>8}{'budgeted':>11}{'stride':>8}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        frames = [synthetic_frame(width, height, args.classes, rng) for _ in range(args.frames)]
+        for frame in frames[:3]:
+            expected = mask_loop_stats(frame)
+            got = class_stats(frame)
+            assert sorted(got) == sorted(expected), "vectorized stats differ from the mask loop"
+
+        fast = statistics.median(time_frames(class_stats, frames))
+        slow = statistics.median(time_frames(mask_loop_stats, frames[:5]))
+        analyzer = SegmentationAnalyzer(budget_ms=args.budget_ms)
+        budgeted = [analyzer.analyse(frame) for frame in frames]
+        budgeted_ms = statistics.median(s.seconds for s in budgeted[1:] or budgeted) * 1000
+        print(f"{size:>10}{fast * 1000:>10.2f}ms{slow * 1000:>10.2f}ms{slow / fast:>8.1f}x"
+              f"{width * height / fast / 1e6:>8.1f}{budgeted_ms:>9.2f}ms{budgeted[-1].stride:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latency benchmark: transformers zero-shot pipeline vs the batched ZeroShotEngine.
+
+    python bench_zero_shot.py [--repeat 5] [--quantize]
+"""
+import argparse
+import statistics
+import time
+
+import torch
+from transformers import pipeline
+
+from command_vocab import labels
+from zero_shot_engine import ZeroShotEngine
+
+utterances = [
+    "take off", "go up", "move forward", "go back", "turn left",
+    "rotate to the right", "stop", "land the drone", "fly higher", "come down",
+]
+
+
+def time_calls(function, repeat):
+    samples = []
+    results = []
+    for _ in range(repeat):
+        for text in utterances:
+            start = time.perf_counter()
+            results.append(function(text))
+            samples.append(time.perf_counter() - start)
+    return samples, results[:len(utterances)]
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    print(f"{name:>10}: mean {statistics.mean(samples) * 1000:8.1f} ms   "
+          f"p50 {statistics.median(samples) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="facebook/bart-large-mnli")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quantize", action="store_true", help="also benchmark the int8 engine")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    classifier = pipeline("zero-shot-classification", model=args.model)
+
+    def run_pipeline(text):
+        result = classifier(text, labels, multi_label=False)
+        return result["labels"][0], result["scores"][0]
+
+    engines = [("engine", ZeroShotEngine(labels, model_name=args.model))]
+    if args.quantize:
+        engines.append(("engine-int8", ZeroShotEngine(labels, model_name=args.model, quantize=True)))
+
+    # Warm-up so one-off allocation costs do not land in the first sample
+    run_pipeline(utterances[0])
+    for _, engine in engines:
+        engine.classify(utterances[0])
+
+    baseline, expected = time_calls(run_pipeline, args.repeat)
+    report("pipeline", baseline)
+    for name, engine in engines:
+        samples, results = time_calls(engine.classify, args.repeat)
+        report(name, samples)
+        agree = sum(a[0] == b[0] for a, b in zip(expected, results))
+        drift = max(abs(a[1] - b[1]) for a, b in zip(expected, results))
+        print(f"{'':>10}  top label agreement {agree}/{len(utterances)}, "
+              f"max confidence drift {drift:.4f}, "
+              f"speedup {statistics.mean(baseline) / statistics.mean(samples):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
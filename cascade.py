@@ -0,0 +1,111 @@
+"""Tiered command classifier: rule matcher, then vector similarity, then zero-shot."""
+import time
+
+from command_vocab import canonical_action, labels
+
+
+class TierStats:
+    """Call/hit counters and latency totals for one tier of the cascade."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed, hit):
+        self.calls += 1
+        self.hits += int(hit)
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self):
+        mean = self.total_time / self.calls if self.calls else 0.0
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "mean_ms": mean * 1000,
+            "max_ms": self.max_time * 1000,
+        }
+
+
+class CascadeClassifier:
+    """Answer from the cheapest tier that is confident, escalating only when needed.
+
+    1. ``rule_matcher`` (a ``DroneCommandProcessor``) answers when exactly one
+       action matches, with the share of the words its phrases cover as the
+       confidence.
+    2. ``vector_matcher`` (a ``CommandVectorIndex``) answers when its best
+       similarity reaches ``vector_threshold``, the keyword belongs to one of
+       ``actions`` and it agrees with the rule candidates, if there were any.
+       Its vocabulary also has keywords for actions the script cannot
+       dispatch (scan, analyse, dont); those escalate instead.
+    3. ``zero_shot`` (a ``ZeroShotEngine``) is consulted only when the cheaper
+       tiers disagree or are not confident enough.
+
+    All results are returned as ``(action, confidence, tier)`` with actions in
+    the zero-shot label vocabulary (see ``command_vocab.canonical_action``);
+    ``actions`` defaults to those labels.
+    """
+
+    def __init__(self, rule_matcher, vector_matcher=None, zero_shot=None,
+                 vector_threshold=0.8, zero_shot_threshold=0.2, actions=None):
+        self.rule_matcher = rule_matcher
+        self.vector_matcher = vector_matcher
+        self.zero_shot = zero_shot
+        self.actions = set(labels if actions is None else actions)
+        self.vector_threshold = vector_threshold
+        self.zero_shot_threshold = zero_shot_threshold
+        self.tiers = {name: TierStats(name) for name in ("rule", "vector", "zero_shot")}
+        self.unresolved = 0
+
+    def classify(self, text):
+        """Return ``(action, confidence, tier)``; action is None if nothing matched."""
+        start = time.perf_counter()
+        candidates, coverage = self.rule_matcher.match(text)
+        candidates = [canonical_action(c) for c in candidates]
+        unambiguous = len(candidates) == 1
+        self.tiers["rule"].record(time.perf_counter() - start, unambiguous)
+        if unambiguous:
+            return candidates[0], coverage, "rule"
+
+        if self.vector_matcher is not None:
+            start = time.perf_counter()
+            action, similarity = self.vector_matcher.best_match(text, threshold=self.vector_threshold)
+            action = canonical_action(action)
+            confident = action in self.actions and (not candidates or action in candidates)
+            self.tiers["vector"].record(time.perf_counter() - start, confident)
+            if confident:
+                return action, similarity, "vector"
+
+        if self.zero_shot is not None:
+            start = time.perf_counter()
+            action, confidence = self.zero_shot.classify(text)
+            confident = confidence > self.zero_shot_threshold
+            self.tiers["zero_shot"].record(time.perf_counter() - start, confident)
+            if confident:
+                return action, confidence, "zero_shot"
+
+        self.unresolved += 1
+        return None, 0.0, None
+
+    def stats(self):
+        """Per-tier counters and latencies, plus the share of commands each tier answered."""
+        total = sum(tier.hits for tier in self.tiers.values()) + self.unresolved
+        stats = {}
+        for name, tier in self.tiers.items():
+            stats[name] = tier.as_dict()
+            stats[name]["share"] = tier.hits / total if total else 0.0
+        stats["unresolved"] = self.unresolved
+        return stats
+
+    def report(self):
+        """Print a one-line summary per tier."""
+        stats = self.stats()
+        for name in self.tiers:
+            tier = stats[name]
+            print(f"{name:>9}: {tier['hits']}/{tier['calls']} answered "
+                  f"({tier['share']:.0%} of commands), mean {tier['mean_ms']:.1f} ms, "
+                  f"max {tier['max_ms']:.1f} ms")
+        print(f"unresolved: {stats['unresolved']}")
@@ -0,0 +1,227 @@
+"""Long-lived command dispatcher with priority preemption for drone actions."""
+import asyncio
+import collections
+import threading
+import time
+
+from stage_trace import RollingHistogram
+
+
+class CancelToken:
+    """Per-command cancellation flag that can also run callbacks when cancelled.
+
+    ``is_set``/``wait`` mirror ``threading.Event`` so code written against the old
+    global ``stop_event`` keeps working.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._handled = False
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Set the token and run its callbacks; True if a callback took care of the cancellation."""
+        with self._lock:
+            if self._event.is_set():
+                return self._handled
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+            self._handled = bool(callbacks)
+        for callback in callbacks:
+            callback()
+        return self._handled
+
+    def add_callback(self, callback):
+        """Call ``callback`` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+class Command:
+    def __init__(self, function, args, name, priority, trace=None):
+        self.function = function
+        self.args = args
+        self.name = name
+        self.priority = priority
+        self.trace = trace
+        self.token = CancelToken()
+        self.submitted_at = time.perf_counter()
+
+
+class CommandDispatcher:
+    """One worker thread (with one persistent asyncio loop) that executes commands in order.
+
+    ``submit`` never blocks. A new command cancels the one in flight (the old
+    ``stop_event`` behaviour); commands named in ``priority_commands`` also jump
+    the queue and drop anything still pending. AirSim gets exactly one
+    cancellation for a priority command: from the running command's token
+    callbacks (``wait_for_motion`` registers ``cancelLastTask``) if it has any,
+    otherwise from ``on_preempt``, called right away from the submitting thread
+    and always before the priority command starts its own motion.
+
+    Running functions can read ``dispatcher.cancel_token`` to learn when they
+    have been superseded, and call ``dispatcher.mark`` to record an event on
+    the ``stage_trace.Trace`` their command was submitted with. Coroutine
+    functions run on the worker's event loop.
+    """
+
+    def __init__(self, priority_commands=("stop", "land"), on_preempt=None,
+                 preempt_running=True, max_pending=8):
+        self.priority_commands = set(priority_commands)
+        self.on_preempt = on_preempt
+        self.preempt_running = preempt_running
+        self.max_pending = max_pending
+        self.current = None
+        self.loop = None
+        self.submitted = 0
+        self.executed = 0
+        self.preempted = 0
+        self.discarded = 0
+        self.start_latency = RollingHistogram()
+        self.preempt_latency = RollingHistogram()
+        self._pending = collections.deque()
+        self._preempt_requested_at = None
+        self._closed = False
+        self._cond = threading.Condition()
+        # Held by a submitter until on_preempt returns; the worker takes it before running a priority command
+        self._preempt_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="command-dispatcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def cancel_token(self):
+        """Token of the command currently executing (a fresh, unset token if idle)."""
+        current = self.current
+        return current.token if current is not None else CancelToken()
+
+    def mark(self, name, engine=None):
+        """Mark ``name`` on the trace of the command currently executing, if it was submitted with one."""
+        current = self.current
+        if current is not None and current.trace is not None:
+            current.trace.mark(name, engine)
+
+    def submit(self, function, *args, name=None, trace=None):
+        """Queue ``function(*args)`` for the utterance ``trace``; returns the ``Command`` so callers can cancel it."""
+        name = name or function.__name__
+        command = Command(function, args, name, name in self.priority_commands, trace)
+        with self._cond:
+            self.submitted += 1
+            if command.priority:
+                self.discarded += len(self._pending)
+                self._pending.clear()
+                self._pending.appendleft(command)
+            else:
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popleft()
+                    self.discarded += 1
+                self._pending.append(command)
+            running = self.current
+            preempt = running is not None and (command.priority or self.preempt_running)
+            if preempt and self._preempt_requested_at is None:
+                self._preempt_requested_at = command.submitted_at
+            notify_airsim = command.priority and self.on_preempt is not None
+            if notify_airsim:
+                self._preempt_lock.acquire()
+            self._cond.notify_all()
+        handled = False
+        if preempt:
+            self.preempted += 1
+            handled = running.token.cancel()
+        if notify_airsim:
+            try:
+                if not handled:
+                    self.on_preempt()
+            except Exception as e:
+                print(f"Error cancelling in-flight task: {e}")
+            finally:
+                self._preempt_lock.release()
+        return command
+
+    def _next(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                return None
+            command = self._pending.popleft()
+            self.current = command
+            return command
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            while True:
+                command = self._next()
+                if command is None:
+                    return
+                if command.priority:
+                    with self._preempt_lock:
+                        pass  # on_preempt has reached AirSim before this command moves the drone
+                self.start_latency.add(time.perf_counter() - command.submitted_at)
+                try:
+                    result = command.function(*command.args)
+                    if asyncio.iscoroutine(result):
+                        self.loop.run_until_complete(result)
+                except Exception as e:
+                    print(f"Error executing {command.name}: {e}")
+                with self._cond:
+                    self.current = None
+                    self.executed += 1
+                    if self._preempt_requested_at is not None:
+                        self.preempt_latency.add(time.perf_counter() - self._preempt_requested_at)
+                        self._preempt_requested_at = None
+                    self._cond.notify_all()
+        finally:
+            self.loop.close()
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is running or pending; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self.current is None, timeout)
+
+    def close(self, timeout=5, drain=False):
+        """Stop the worker. Unless ``drain`` is set, cancel the running command and drop pending ones."""
+        with self._cond:
+            self._closed = True
+            running = None
+            if not drain:
+                self._pending.clear()
+                running = self.current
+            self._cond.notify_all()
+        if running is not None:
+            running.token.cancel()
+        self._thread.join(timeout)
+
+    def stats(self):
+        start = self.start_latency.summary()
+        preempt = self.preempt_latency.summary()
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "preempted": self.preempted,
+            "discarded": self.discarded,
+            "start_p50_ms": start["p50"] * 1000,
+            "start_p95_ms": start["p95"] * 1000,
+            "preempt_p50_ms": preempt["p50"] * 1000,
+            "preempt_p95_ms": preempt["p95"] * 1000,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Commands: {stats['submitted']} submitted, {stats['executed']} executed, "
+              f"{stats['preempted']} preempted, {stats['discarded']} discarded")
+        print(f"Start latency p50 {stats['start_p50_ms']:.1f} ms / p95 {stats['start_p95_ms']:.1f} ms, "
+              f"preemption p50 {stats['preempt_p50_ms']:.1f} ms / p95 {stats['preempt_p95_ms']:.1f} ms")
@@ -0,0 +1,79 @@
+"""Precomputed keyword-vector index used to map text onto drone commands."""
+import numpy as np
+
+
+class CommandVectorIndex:
+    """Normalized keyword vectors stacked into one matrix, built once at startup.
+
+    Scores an utterance against every keyword with a single matmul and gives
+    the same result as looping over ``nlp(keyword)`` with ``Doc.similarity``.
+    """
+
+    def __init__(self, nlp, command_mappings):
+        self.nlp = nlp
+        labels = []
+        keywords = []
+        for command, synonyms in command_mappings.items():
+            for keyword in synonyms:
+                labels.append(command)
+                keywords.append(keyword)
+        self.labels = np.array(labels)
+        self.keywords = keywords
+
+        # Doc.vector only depends on the tokenizer and the static vectors table,
+        # so make_doc gives the same vectors as a full nlp() call.
+        docs = [nlp.make_doc(keyword) for keyword in keywords]
+        vectors = np.array([doc.vector for doc in docs], dtype=np.float32)
+        self.matrix = _normalize_rows(vectors)
+
+        # Doc.similarity returns 1.0 for token-identical docs even without vectors
+        self._exact = {}
+        for row, doc in enumerate(docs):
+            self._exact.setdefault(_orth_key(doc), []).append(row)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def model_version(self):
+        """Name and version of the spaCy model the vectors come from, e.g. ``en_core_web_md@3.7.1``."""
+        meta = self.nlp.meta
+        return f"{meta.get('lang', '')}_{meta.get('name', '')}@{meta.get('version', '')}"
+
+    def scores(self, text):
+        """Cosine similarity of ``text`` against every keyword, in mapping order."""
+        doc = self.nlp.make_doc(text)
+        vector = np.asarray(doc.vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            scores = self.matrix @ (vector / norm)
+        else:
+            scores = np.zeros(len(self.keywords), dtype=np.float32)
+        rows = self._exact.get(_orth_key(doc))
+        if rows:
+            scores[rows] = 1.0
+        return scores
+
+    def best_match(self, text, threshold=0.7):
+        """Return ``(command, similarity)`` for the best keyword above ``threshold``.
+
+        Ties resolve to the first keyword in mapping order, like the original
+        loop. Returns ``(None, 0.0)`` when nothing clears the threshold.
+        """
+        scores = self.scores(text)
+        if not len(scores):
+            return None, 0.0
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        if similarity > threshold:
+            return str(self.labels[best]), similarity
+        return None, 0.0
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Keywords without a vector keep an all-zero row and always score 0.0
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _orth_key(doc):
+    return tuple(token.orth for token in doc)
@@ -0,0 +1,227 @@
+"""Compound and parameterized commands parsed into ordered multi-step plans.
+
+"Go forward 5 meters then turn left and go up" becomes three steps, each an
+action with an optional magnitude. ``coalesce`` then groups consecutive
+translations into one path (flown with a single ``moveOnPathAsync``) and
+consecutive rotations into one turn, so a plan costs one motion RPC per
+segment rather than per step.
+"""
+import collections
+import math
+import re
+
+PlanStep = collections.namedtuple("PlanStep", ["action", "amount", "unit", "text"])
+PlanStep.__doc__ = """One step: an action name, its magnitude in metres or degrees (None for the default) and the clause it came from."""
+
+Segment = collections.namedtuple("Segment", ["kind", "value", "steps"])
+Segment.__doc__ = """``("move", [(forward, right, down), ...])``, ``("rotate", degrees clockwise)`` or ``("action", name)``."""
+
+# Body-frame direction of each translation, as (forward, right, down) in NED
+TRANSLATIONS = {
+    "forward": (1, 0, 0), "backward": (-1, 0, 0),
+    "right": (0, 1, 0), "left": (0, -1, 0),
+    "down": (0, 0, 1), "up": (0, 0, -1),
+}
+ROTATIONS = {"rotate right": 1, "rotate left": -1}
+
+SEQUENCE_WORDS = {"then", "and", "next", "afterwards", "finally", "first", "later"}
+ROTATE_WORDS = {"rotate", "rotates", "rotating", "turn", "turns", "turning", "spin", "spinning", "yaw"}
+# spaCy splits "dont" and "don't" into "do" + "nt" / "n't", both with the norm "not"
+NEGATION_WORDS = {"dont", "don't", "not", "never", "n't", "nt"}
+DIRECTIONS = {"left": "rotate left", "counterclockwise": "rotate left", "anticlockwise": "rotate left",
+              "right": "rotate right", "clockwise": "rotate right"}
+
+# Unit word -> (scale to metres or degrees, canonical unit)
+UNITS = {
+    "m": (1.0, "m"), "meter": (1.0, "m"), "meters": (1.0, "m"), "metre": (1.0, "m"), "metres": (1.0, "m"),
+    "cm": (0.01, "m"), "centimeters": (0.01, "m"), "centimetres": (0.01, "m"),
+    "ft": (0.3048, "m"), "foot": (0.3048, "m"), "feet": (0.3048, "m"),
+    "deg": (1.0, "deg"), "degree": (1.0, "deg"), "degrees": (1.0, "deg"), "°": (1.0, "deg"),
+}
+
+WORD_NUMBERS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100,
+    "half": 0.5,
+}
+
+_COMPOUND_HINT = re.compile(r"\d|,|;|\b(?:%s)\b" % "|".join(sorted(SEQUENCE_WORDS | set(WORD_NUMBERS) | {"after"})))
+
+
+def looks_compound(text):
+    """Cheap pre-check: only text with a number or a sequence word needs the planner."""
+    return bool(_COMPOUND_HINT.search(text.lower()))
+
+
+def _number(token):
+    """Value of a number token (``5``, ``2.5``, ``twenty``), or None."""
+    if token.lower_ in WORD_NUMBERS:
+        return WORD_NUMBERS[token.lower_]
+    if not token.like_num:
+        return None
+    try:
+        return float(token.text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _is_whole(value):
+    return value >= 1 and value == int(value)
+
+
+def _combine(values, text):
+    """One number from a run such as ``two hundred`` or ``twenty five``; ValueError if the run is not one."""
+    total = values[0]
+    for value in values[1:]:
+        if value == 100 and _is_whole(total) and total < 100:
+            total *= 100
+        elif _is_whole(value) and value < 100 and total >= 100 and total % 100 == 0:
+            total += value
+        elif _is_whole(value) and value < 10 and total % 10 == 0 and total % 100 >= 20:
+            total += value
+        else:
+            raise ValueError(f"cannot read the number '{text}'")
+    return total
+
+
+def _negated(clause):
+    return any(token.lower_ in NEGATION_WORDS or getattr(token, "norm_", None) == "not" for token in clause)
+
+
+class CommandPlanner:
+    """Splits text into clauses and resolves each one to a ``PlanStep``.
+
+    Uses the spaCy tokenizer and lexical attributes (``like_num``,
+    ``is_punct``) of the model already loaded for ``command_index`` (a
+    ``CommandVectorIndex``), which maps each clause with its numbers and
+    units removed. Number words in a row make one number ("two hundred
+    centimetres" is 2 m). Turning verbs with a direction, or a magnitude in
+    degrees, make a rotation. Negated clauses are dropped from the plan; a
+    clause whose amount cannot be read rejects the whole plan.
+    """
+
+    def __init__(self, nlp, command_index, threshold=0.7):
+        self.nlp = nlp
+        self.command_index = command_index
+        self.threshold = threshold
+
+    def clauses(self, text):
+        """Token lists of the clauses of ``text``, split at sequence words and punctuation."""
+        clauses = [[]]
+        tokens = list(self.nlp.make_doc(text.lower()))
+        for i, token in enumerate(tokens):
+            after_that = token.lower_ == "that" and i and tokens[i - 1].lower_ == "after"
+            if token.lower_ == "and" and 0 < i < len(tokens) - 1 and \
+                    _number(tokens[i - 1]) is not None and _number(tokens[i + 1]) is not None:
+                clauses[-1].append(token)  # "one hundred and twenty"
+                continue
+            if token.lower_ in SEQUENCE_WORDS or token.lower_ == "after" or after_that or token.is_punct:
+                if clauses[-1]:
+                    clauses.append([])
+                continue
+            clauses[-1].append(token)
+        return [clause for clause in clauses if clause]
+
+    def step(self, clause):
+        """``PlanStep`` for one clause, or None if it is negated or not a command.
+
+        Raises ``ValueError`` if the clause has more than one amount or a run
+        of number words that does not make one number.
+        """
+        words = [token.lower_ for token in clause]
+        if _negated(clause):
+            return None
+        amount = unit = None
+        rest = []
+        i = 0
+        while i < len(clause):
+            if _number(clause[i]) is None:
+                rest.append(clause[i].text)
+                i += 1
+                continue
+            start = i
+            values = []
+            while i < len(clause) and (_number(clause[i]) is not None or clause[i].lower_ == "and"):
+                if clause[i].lower_ != "and":
+                    values.append(_number(clause[i]))
+                i += 1
+            if amount is not None:
+                raise ValueError(f"more than one amount in '{' '.join(words)}'")
+            amount = _combine(values, " ".join(words[start:i]))
+            if i < len(clause) and clause[i].lower_ in UNITS:
+                scale, unit = UNITS[clause[i].lower_]
+                amount *= scale
+                i += 1
+        direction = next((DIRECTIONS[w] for w in words if w in DIRECTIONS), None)
+        if "around" in words and ROTATE_WORDS.intersection(words):
+            return PlanStep("rotate right", amount or 180.0, "deg", " ".join(words))
+        if direction and (ROTATE_WORDS.intersection(words) or unit == "deg"):
+            return PlanStep(direction, amount, "deg" if amount is not None else None, " ".join(words))
+        action, _ = self.command_index.best_match(" ".join(rest), threshold=self.threshold) if rest else (None, 0.0)
+        if action is None or action == "dont":
+            return None
+        if action in TRANSLATIONS and amount is not None:
+            unit = unit or "m"
+        return PlanStep(action, amount, unit, " ".join(words))
+
+    def plan(self, text):
+        """Ordered ``PlanStep`` list for ``text``; empty if nothing in it is a command.
+
+        None if an amount in it cannot be read, so that the caller flies
+        nothing rather than a plan with a step missing or the wrong distance.
+        """
+        steps = []
+        for clause in self.clauses(text):
+            try:
+                step = self.step(clause)
+            except ValueError:
+                return None
+            if step is not None:
+                steps.append(step)
+        return steps
+
+
+def coalesce(steps, default_distance=5.0, default_angle=90.0):
+    """``Segment`` list for ``steps``: consecutive translations share one path, consecutive rotations add up."""
+    segments = []
+    for step in steps:
+        if step.action in TRANSLATIONS:
+            distance = default_distance if step.amount is None else step.amount
+            offset = tuple(distance * axis for axis in TRANSLATIONS[step.action])
+            if segments and segments[-1].kind == "move":
+                segments[-1].value.append(offset)
+                segments[-1].steps.append(step)
+            else:
+                segments.append(Segment("move", [offset], [step]))
+        elif step.action in ROTATIONS:
+            angle = ROTATIONS[step.action] * (default_angle if step.amount is None else step.amount)
+            if segments and segments[-1].kind == "rotate":
+                segments[-1] = Segment("rotate", segments[-1].value + angle, segments[-1].steps + [step])
+            else:
+                segments.append(Segment("rotate", angle, [step]))
+        else:
+            segments.append(Segment("action", step.action, [step]))
+    return segments
+
+
+def world_path(offsets, x, y, z, yaw):
+    """Waypoints reached by flying body-frame ``offsets`` one after another from ``(x, y, z)`` at ``yaw`` (rad)."""
+    cos, sin = math.cos(yaw), math.sin(yaw)
+    points = []
+    for forward, right, down in offsets:
+        x += forward * cos - right * sin
+        y += forward * sin + right * cos
+        z += down
+        points.append((x, y, z))
+    return points
+
+
+def format_plan(steps):
+    """Short operator-facing text, e.g. ``forward 5 m -> rotate left -> up``."""
+    parts = []
+    for step in steps:
+        amount = "" if step.amount is None else f" {step.amount:g}{' ' + step.unit if step.unit else ''}"
+        parts.append(step.action + amount)
+    return " -> ".join(parts)
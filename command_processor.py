@@ -0,0 +1,127 @@
+"""Rule-based command matcher shared by the rule-based script and the cascade."""
+from phrase_matcher import PhraseMatcher, tokenize
+
+
+class DroneCommandProcessor:
+    rotation_words = ['rotate', 'turn', 'spin']
+    left_words = ['left', 'counterclockwise']
+    right_words = ['right', 'clockwise']
+    negation_words = ['dont', "don't", 'not']
+
+    def __init__(self):
+        # Command structure remains the same as your original code
+        self.commands = {
+            'takeoff': ['take off', 'takeoff', 'launch', 'start', 'begin', 'lift'],
+            'land': ['land', 'touchdown', 'come down', 'descend ground'],
+            'stop': ['stop', 'halt', 'pause', 'freeze', 'stay', 'hover'],
+            'up': ['up', 'higher', 'ascend', 'upward', 'upar'],
+            'down': ['down', 'lower', 'descend', 'downward', 'niche'],
+            'left': ['left', 'leftward', 'baye'],
+            'right': ['right', 'rightward', 'daye'],
+            'forward': ['forward', 'ahead', 'straight', 'front', 'age'],
+            'backward': ['backward', 'back', 'reverse', 'backwards', 'piche'],
+            'rotate_left': ['rotate left', 'turn left', 'spin left', 'spin counterclockwise'],
+            'rotate_right': ['rotate right', 'turn right', 'spin right', 'spin clockwise']
+        }
+
+        # Compiled once; every utterance is then matched in a single scan
+        self._matcher = self._build_matcher()
+
+    def _build_matcher(self):
+        """Compile commands, rotation/direction and negation words into one matcher.
+
+        Everything but the negation words also matches its inflections
+        ("move upwards", "landing now", "stopping").
+        """
+        matcher = PhraseMatcher()
+        for command, variations in self.commands.items():
+            for variation in variations:
+                matcher.add(variation, ('command', command), inflect=True)
+        for word in self.rotation_words:
+            matcher.add(word, ('rotation', None), inflect=True)
+        for word in self.left_words:
+            matcher.add(word, ('direction', 'rotate_left'), inflect=True)
+        for word in self.right_words:
+            matcher.add(word, ('direction', 'rotate_right'), inflect=True)
+        for word in self.negation_words:
+            matcher.add(word, ('negation', None))
+        return matcher
+
+    def matcher_version(self):
+        """Identifies the compiled matcher, e.g. ``phrase-matcher@1a2b3c4d5e6f``; changes with any phrase or form."""
+        return f"phrase-matcher@{self._matcher.fingerprint()}"
+
+    def _scan(self, text):
+        """One pass over the text collecting every command, rotation and negation hit.
+
+        Also returns the share of the text's words that the hits cover.
+        """
+        tokens = tokenize(text)
+        hits = {'command': set(), 'rotation': set(), 'direction': set(), 'negation': set()}
+        covered = set()
+        for match in self._matcher.find_all(tokens):
+            kind, value = match.payload
+            hits[kind].add(value)
+            covered.update(range(match.start, match.end))
+        return hits, len(covered) / len(tokens) if tokens else 0.0
+
+    def process_command(self, text):
+        """Process the command text and return the corresponding action"""
+        hits, _ = self._scan(text)
+
+        # Stop words and negations both halt the drone
+        if 'stop' in hits['command'] or hits['negation']:
+            return {'action': 'stop'}
+
+        action = self._match_command(hits)
+        return {'action': action} if action else None
+
+    def _match_command(self, hits):
+        """Match the scanned hits against known commands"""
+        rotation = bool(hits['rotation'])
+        if rotation:
+            if 'rotate_left' in hits['direction']:
+                return 'rotate_left'
+            elif 'rotate_right' in hits['direction']:
+                return 'rotate_right'
+
+        for command in self.commands:
+            if command in hits['command']:
+                if command in ['rotate_left', 'rotate_right'] and not rotation:
+                    continue
+                return command
+
+        return None
+
+    def candidates(self, text):
+        """Return every distinct action the text matches, in priority order.
+
+        A single candidate means the rule match is unambiguous. Rotation and
+        stop/negation resolve exactly like ``process_command``.
+        """
+        return self.match(text)[0]
+
+    def match(self, text):
+        """``(candidates(text), coverage)``; coverage is the share of the text's words the matched phrases explain."""
+        hits, coverage = self._scan(text)
+        if 'stop' in hits['command'] or hits['negation']:
+            return ['stop'], coverage
+
+        matches = []
+        rotation = bool(hits['rotation'])
+        if rotation:
+            if 'rotate_left' in hits['direction']:
+                matches.append('rotate_left')
+            elif 'rotate_right' in hits['direction']:
+                matches.append('rotate_right')
+
+        for command in self.commands:
+            if command in matches or command == 'stop' or command not in hits['command']:
+                continue
+            if command in ['rotate_left', 'rotate_right'] and not rotation:
+                continue
+            # Direction words are part of the rotation phrase, not a separate move
+            if matches and command in ['left', 'right']:
+                continue
+            matches.append(command)
+        return matches, coverage
@@ -0,0 +1,47 @@
+"""Command vocabularies shared by the control scripts and the benchmark tools."""
+
+# Command mappings with synonyms (NLP-based control)
+command_mappings = {
+    "takeoff": ["take off", "launch", "ascend","rise","start", "fly", "flying"],
+    "land": ["land", "touchdown"],
+    "up": ["up", "ascend", "rise","upside", "upward"],
+    "down": ["down", "descend", "lower","below","downside", "downward"],
+    "forward": ["forward", "move forward", "advance","front", "go"],
+    "backward": ["backward", "reverse","back"],
+    "left": ["left","leftside", "leftward"],
+    "right": ["right","rightside", "rightward"],
+    "rotate left": ["rotate left", "spin left", "counterclockwise"],
+    "rotate right": ["rotate right", "spin right", "clockwise"],
+    "stop": ["stop", "halt", "pause", "freeze"],
+    "scan": ["scan", "survey", "inspect", "check", "search"],
+    "analyse": ["record", "start recording", "begin recording", "analyse"],
+    "dont": ["don't", "do not", "not"]
+}
+
+# Candidate labels for zero-shot classification
+labels = [
+    "take off", "land", "up", "down", "forward", "backward",
+    "left", "right", "rotate left", "rotate right", "stop"
+]
+
+# Engine-specific action names mapped onto the zero-shot label names
+action_aliases = {
+    "takeoff": "take off",
+    "rotate_left": "rotate left",
+    "rotate_right": "rotate right",
+}
+
+
+def canonical_action(action):
+    """Translate an action name from any engine into the zero-shot label set."""
+    if action is None:
+        return None
+    return action_aliases.get(action, action)
+
+
+def local_action(label, actions):
+    """The inverse of ``canonical_action``: the name ``label`` goes by among ``actions``, or None."""
+    for action in actions:
+        if canonical_action(action) == label:
+            return action
+    return None
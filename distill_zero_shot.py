@@ -0,0 +1,191 @@
+"""Distill the zero-shot model into a hashed n-gram classifier and compare the two.
+
+The corpus is synthetic phrasings of the command vocabulary plus logged
+utterances (the English side of translation_cache.json and the English lines
+of the replay corpus). The BART teacher labels every utterance with its full
+label distribution; labels are kept in --labels so retraining or adding logs
+only runs the teacher on new text. One utterance in five is held out, the
+student is trained on the rest and both are compared on the held-out set:
+agreement with the teacher, accuracy where the intended command is known,
+latency and memory.
+
+    python distill_zero_shot.py [--out command_classifier.npz] [--labels distill_labels.jsonl]
+                                [--logs translation_cache.json replay_corpus.jsonl] [--quantize]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import time
+import zlib
+
+try:
+    import resource  # Not available on Windows; memory is then reported as n/a
+except ImportError:
+    resource = None
+
+from atomic_file import atomic_path
+from command_vocab import canonical_action, command_mappings, labels
+from distilled_classifier import HashedNgramClassifier
+from translation_cache import normalize_text
+
+TEMPLATES = [
+    "{}", "please {}", "{} now", "{} please", "can you {}", "{} a little", "{} slowly",
+    "{} quickly", "drone {}", "{} the drone", "i want you to {}", "now {}", "{} a bit more",
+]
+
+
+def synthetic_corpus():
+    """``[(text, expected label or None)]`` from every synonym in every template.
+
+    A synonym shared by several commands ("ascend") has no expected label;
+    the teacher still labels it.
+    """
+    owners = {}
+    for action, synonyms in command_mappings.items():
+        for synonym in synonyms:
+            owners.setdefault(synonym, set()).add(canonical_action(action))
+    corpus = []
+    for synonym, actions in owners.items():
+        expected = next(iter(actions)) if len(actions) == 1 and actions <= set(labels) else None
+        corpus += [(template.format(synonym), expected) for template in TEMPLATES]
+    return corpus
+
+
+def logged_utterances(paths):
+    """English utterances from translation caches (``[src, dest, key, text]``) and replay corpora."""
+    corpus = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Skipping missing log {path}")
+            continue
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+                corpus += [(e["text"], e.get("expected")) for e in entries if e.get("language", "en") == "en"]
+            else:
+                corpus += [(text, None) for _, dest, _, text in json.load(f) if dest == "en"]
+    return corpus
+
+
+def label_corpus(teacher, corpus, path):
+    """``[(text, expected, teacher scores)]``, running the teacher only on text not already in ``path``."""
+    known = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["labels"] == labels:
+                    known[entry["text"]] = entry["scores"]
+    unique = {}
+    for text, expected in corpus:
+        text = normalize_text(text)
+        if text and unique.get(text) is None:
+            unique[text] = expected
+    missing = [text for text in unique if text not in known]
+    print(f"{len(unique)} utterances, {len(missing)} to label with the teacher")
+    for n, text in enumerate(missing, 1):
+        known[text] = teacher.scores(text)
+        if n % 100 == 0:
+            print(f"  labeled {n}/{len(missing)}")
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for text, scores in known.items():
+                f.write(json.dumps({"text": text, "labels": labels, "scores": scores}, ensure_ascii=False) + "\n")
+    return [(text, expected, known[text]) for text, expected in unique.items()]
+
+
+def held_out(text):
+    """Deterministic 20% split, stable as the corpus grows."""
+    return zlib.crc32(text.encode("utf-8")) % 5 == 0
+
+
+def rss_mb():
+    """Current resident set size on Linux; elsewhere the peak, which only shows the first model loaded; or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_growth_mb(before):
+    after = rss_mb()
+    return None if before is None or after is None else after - before
+
+
+def serialized_mb(model):
+    """Size of ``model``'s saved ``state_dict``; unlike summing ``parameters()`` it counts quantized packed weights."""
+    import torch
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2 ** 20
+
+
+def evaluate(classifier, items):
+    """(latency samples, agreement with the teacher, correct, with expected label)."""
+    samples = []
+    agree = correct = known = 0
+    for text, expected, scores in items:
+        start = time.perf_counter()
+        label, _ = classifier.classify(text)
+        samples.append(time.perf_counter() - start)
+        agree += label == labels[max(range(len(scores)), key=scores.__getitem__)]
+        if expected is not None:
+            known += 1
+            correct += label == expected
+    return samples, agree, correct, known
+
+
+def report(name, samples, agree, correct, known, total, params_mb, rss):
+    samples = sorted(samples)
+    rss = "n/a" if rss is None else f"+{max(0.0, rss):.0f} MB"
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    print(f"{name:>10}: p50 {statistics.median(samples) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms   "
+          f"agreement {agree}/{total}   accuracy {correct}/{known}   "
+          f"weights {params_mb:8.1f} MB   RSS {rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="command_classifier.npz")
+    parser.add_argument("--labels", default="distill_labels.jsonl", help="teacher labels, reused between runs")
+    parser.add_argument("--logs", nargs="*", default=["translation_cache.json", "replay_corpus.jsonl"])
+    parser.add_argument("--model", default="facebook/bart-large-mnli")
+    parser.add_argument("--quantize", action="store_true", help="use the int8 teacher")
+    parser.add_argument("--dim", type=int, default=2 ** 14, help="hashed feature buckets")
+    parser.add_argument("--epochs", type=int, default=300)
+    args = parser.parse_args()
+
+    from zero_shot_engine import ZeroShotEngine
+    rss_before = rss_mb()
+    teacher = ZeroShotEngine(labels, model_name=args.model, quantize=args.quantize)
+    teacher.classify("take off")
+    teacher_rss = rss_growth_mb(rss_before)
+    teacher_mb = serialized_mb(teacher.model)
+
+    items = label_corpus(teacher, synthetic_corpus() + logged_utterances(args.logs), args.labels)
+    train = [item for item in items if not held_out(item[0])]
+    test = [item for item in items if held_out(item[0])]
+
+    start = time.perf_counter()
+    student = HashedNgramClassifier(labels, dim=args.dim)
+    student.fit([text for text, _, _ in train], [scores for _, _, scores in train], epochs=args.epochs)
+    student.save(args.out)
+    print(f"Trained on {len(train)} utterances in {time.perf_counter() - start:.1f} s; saved {args.out}")
+
+    rss_before = rss_mb()
+    student = HashedNgramClassifier.load(args.out)
+    student.classify("take off")
+    student_rss = rss_growth_mb(rss_before)
+
+    print(f"\nHeld-out comparison ({len(test)} utterances):")
+    report("teacher", *evaluate(teacher, test), len(test), teacher_mb, teacher_rss)
+    report("distilled", *evaluate(student, test), len(test), student.memory_bytes() / 2 ** 20, student_rss)
+
+
+if __name__ == "__main__":
+    main()
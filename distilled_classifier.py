@@ -0,0 +1,120 @@
+"""Small CPU command classifier distilled from the zero-shot model.
+
+Utterances are turned into hashed word and character n-gram features and
+scored by one softmax layer, trained on the teacher's label probabilities
+(see ``distill_zero_shot.py``). It has the same ``scores``/``classify``
+interface as ``ZeroShotEngine``, so it can stand in for it in the cascade.
+"""
+import zlib
+
+import numpy as np
+
+from atomic_file import atomic_path
+from phrase_matcher import tokenize
+
+
+def ngram_features(text, char_ngrams=(3, 5)):
+    """Word unigrams and bigrams plus character n-grams of each padded word."""
+    tokens = tokenize(text)
+    features = [f"w:{t}" for t in tokens]
+    features += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    low, high = char_ngrams
+    for token in tokens:
+        padded = f"<{token}>"
+        for n in range(low, high + 1):
+            features += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    return features
+
+
+class HashedNgramClassifier:
+    """Softmax regression over ``dim`` hashed n-gram buckets.
+
+    Features are hashed with CRC32, so a saved model gives the same scores in
+    any process, and rows are L2-normalized so long and short commands are
+    scored on the same scale. The model is a ``dim x len(labels)`` float32
+    matrix: about 0.7 MB at the default size.
+    """
+
+    def __init__(self, labels, dim=2 ** 14, char_ngrams=(3, 5)):
+        self.labels = list(labels)
+        self.dim = dim
+        self.char_ngrams = tuple(char_ngrams)
+        self.weights = np.zeros((dim, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def features(self, text):
+        """``(bucket indices, values)`` of the normalized feature vector."""
+        buckets = [zlib.crc32(f.encode("utf-8")) % self.dim for f in ngram_features(text, self.char_ngrams)]
+        if not buckets:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        index, counts = np.unique(buckets, return_counts=True)
+        values = counts.astype(np.float32)
+        return index, values / np.linalg.norm(values)
+
+    def _design(self, texts):
+        """Sparse rows of ``texts`` as flat ``(row, column, value)`` arrays."""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            index, value = self.features(text)
+            rows.append(np.full(len(index), row))
+            columns.append(index)
+            values.append(value)
+        return np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+    def fit(self, texts, targets, epochs=300, learning_rate=0.1, l2=1e-5):
+        """Train on ``targets`` (one probability row per text, in label order) with full-batch Adam.
+
+        Soft targets carry the teacher's uncertainty over to the student, so
+        the cascade's confidence threshold means the same for both.
+        """
+        targets = np.asarray(targets, dtype=np.float32)
+        rows, columns, values = self._design(texts)
+        moments = [[np.zeros_like(p), np.zeros_like(p)] for p in (self.weights, self.bias)]
+        beta1, beta2 = 0.9, 0.999
+        for step in range(1, epochs + 1):
+            logits = np.tile(self.bias, (len(texts), 1))
+            np.add.at(logits, rows, values[:, None] * self.weights[columns])
+            error = (_softmax(logits) - targets) / len(texts)
+            grad_weights = l2 * self.weights
+            np.add.at(grad_weights, columns, values[:, None] * error[rows])
+            grads = (grad_weights, error.sum(axis=0))
+            for param, grad, moment in zip((self.weights, self.bias), grads, moments):
+                moment[0] = beta1 * moment[0] + (1 - beta1) * grad
+                moment[1] = beta2 * moment[1] + (1 - beta2) * grad * grad
+                m_hat = moment[0] / (1 - beta1 ** step)
+                v_hat = moment[1] / (1 - beta2 ** step)
+                param -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+        return self
+
+    def scores(self, text):
+        """Probability of each label for ``text``, in label order."""
+        index, values = self.features(text)
+        return _softmax(self.bias + values @ self.weights[index]).tolist()
+
+    def classify(self, text):
+        """Return ``(label, confidence)`` for the most likely label."""
+        scores = self.scores(text)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return self.labels[best], scores[best]
+
+    def memory_bytes(self):
+        return self.weights.nbytes + self.bias.nbytes
+
+    def save(self, path):
+        with atomic_path(path, ".tmp.npz") as tmp_path:
+            np.savez(tmp_path, weights=self.weights, bias=self.bias, labels=np.array(self.labels),
+                     char_ngrams=np.array(self.char_ngrams))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            model = cls([str(label) for label in data["labels"]], dim=data["weights"].shape[0],
+                        char_ngrams=tuple(int(n) for n in data["char_ngrams"]))
+            model.weights = data["weights"]
+            model.bias = data["bias"]
+        return model
+
+
+def _softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
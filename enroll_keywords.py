@@ -0,0 +1,36 @@
+"""Record stop-word templates for the keyword spotter into keyword_templates/<word>_<n>.wav.
+
+Record with the microphone used for flying; a few takes per word are enough.
+
+    python enroll_keywords.py stop ruko aapu [--takes 3] [--dir keyword_templates]
+"""
+import argparse
+import os
+
+import speech_recognition as sr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("words", nargs="+")
+    parser.add_argument("--takes", type=int, default=3)
+    parser.add_argument("--dir", default="keyword_templates")
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    recognizer = sr.Recognizer()
+    with sr.Microphone() as source:
+        print("Measuring background noise, stay quiet...")
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for word in args.words:
+            for take in range(1, args.takes + 1):
+                print(f"Say '{word}' ({take}/{args.takes})")
+                audio = recognizer.listen(source, phrase_time_limit=2)
+                path = os.path.join(args.dir, f"{word.lower()}_{take}.wav")
+                with open(path, "wb") as f:
+                    f.write(audio.get_wav_data(convert_width=2))
+                print(f"  saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""In-process stand-in for ``airsim.MultirotorClient`` used by the replay harness.
+
+Async calls return futures that complete after a configurable delay (scaled by
+``time_scale``) and then update the simulated position/yaw, so the command
+functions in the scripts can run unchanged without Unreal. Like AirSim, a new
+async task replaces the previous one, and ``cancelLastTask`` ends it early.
+"""
+import collections
+import math
+import struct
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+# Seconds each async task takes at time_scale=1.0
+DEFAULT_DELAYS = {
+    "takeoffAsync": 2.0,
+    "landAsync": 2.0,
+    "hoverAsync": 0.1,
+    "moveToPositionAsync": 1.5,
+    "moveOnPathAsync": 3.0,
+    "moveByVelocityAsync": 0.5,
+    "rotateToYawAsync": 1.0,
+    "rotateByYawRateAsync": 1.0,
+}
+
+
+def _vector(x=0.0, y=0.0, z=0.0):
+    return SimpleNamespace(x_val=x, y_val=y, z_val=z)
+
+
+# Segmentation colours of the synthetic scene
+SKY = (80, 160, 220)
+GROUND = (40, 120, 40)
+BOX = (200, 30, 30)
+
+
+def _render(image_type, width, height, yaw):
+    """A synthetic view: sky over ground with a red box that moves across the frame as the drone yaws."""
+    rows, cols = np.mgrid[0:height, 0:width]
+    if image_type in (1, 2, 3, 4):  # depth and disparity: distance grows towards the horizon
+        return (2.0 + 30.0 * (height - rows) / height).astype(np.float32)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[rows < height // 3] = SKY
+    pixels[rows >= height // 3] = GROUND
+    centre = int((0.5 - math.degrees(yaw) / 90.0) * width) % width
+    box = (abs(cols - centre) < width // 8) & (rows > height // 2) & (rows < 5 * height // 6)
+    pixels[box] = BOX
+    if image_type != 5:  # scene: shade the segmentation colours
+        pixels = (pixels * (0.6 + 0.4 * rows / height)[..., None]).astype(np.uint8)
+    return pixels
+
+
+def _png(pixels):
+    """Minimal RGB PNG encoder, so compressed responses look like AirSim's."""
+    height, width, _ = pixels.shape
+    raw = b"".join(b"\x00" + pixels[row].tobytes() for row in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class FakeFuture:
+    """Completes after ``duration`` seconds, or as soon as it is cancelled; ``join()`` blocks until then.
+
+    With an ``error``, the motion never takes effect and ``join()`` raises it,
+    as a failed msgpack-rpc call does.
+    """
+
+    def __init__(self, name, duration, on_done=None, error=None):
+        self.name = name
+        self.cancelled = False
+        self.error = error
+        self._on_done = on_done
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(duration, self._finish)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _finish(self, cancelled=False):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.cancelled = cancelled
+            if not cancelled and self.error is None and self._on_done is not None:
+                self._on_done()
+            self._done.set()
+
+    def cancel(self):
+        self._timer.cancel()
+        self._finish(cancelled=True)
+
+    def done(self):
+        return self._done.is_set()
+
+    def join(self):
+        self._done.wait()
+        if self.error is not None and not self.cancelled:
+            raise self.error
+
+
+class FakeMultirotorClient:
+    """Enough of the MultirotorClient API for the control scripts.
+
+    ``delays`` overrides entries of ``DEFAULT_DELAYS``; ``rpc_latency`` is added
+    to every call to model the msgpack-rpc round trip. All calls are counted in
+    ``calls``, and one instance may be shared by the command, cancel and
+    telemetry connections. Motion calls named in ``failures`` fail: their
+    futures raise from ``join()`` and the drone does not move.
+    """
+
+    def __init__(self, delays=None, time_scale=1.0, rpc_latency=0.0, image_size=(256, 144), failures=()):
+        self.delays = dict(DEFAULT_DELAYS, **(delays or {}))
+        self.failures = set(failures)
+        self.time_scale = time_scale
+        self.rpc_latency = rpc_latency
+        self.image_size = image_size
+        self.calls = collections.Counter()
+        self.position = [0.0, 0.0, 0.0]
+        self.yaw = 0.0
+        self.yaw_rate = 0.0
+        self.api_control = False
+        self.armed = False
+        self._task = None
+        self._lock = threading.Lock()
+
+    def _rpc(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+    def _start(self, name, on_done=None, duration=None):
+        self._rpc(name)
+        if duration is None:
+            duration = self.delays[name]
+        error = RuntimeError(f"{name} failed") if name in self.failures else None
+        future = FakeFuture(name, duration * self.time_scale, on_done, error)
+        with self._lock:
+            previous, self._task = self._task, future
+        if previous is not None:
+            previous.cancel()
+        return future
+
+    def _move_to(self, x, y, z):
+        def done():
+            self.position = [x, y, z]
+        return done
+
+    # Connection and arming
+    def confirmConnection(self):
+        self._rpc("confirmConnection")
+        return True
+
+    def enableApiControl(self, is_enabled, vehicle_name=""):
+        self._rpc("enableApiControl")
+        self.api_control = is_enabled
+
+    def armDisarm(self, arm, vehicle_name=""):
+        self._rpc("armDisarm")
+        self.armed = arm
+        return True
+
+    def cancelLastTask(self, vehicle_name=""):
+        self._rpc("cancelLastTask")
+        with self._lock:
+            task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+
+    # Async motion
+    def takeoffAsync(self, timeout_sec=20, vehicle_name=""):
+        x, y, _ = self.position
+        return self._start("takeoffAsync", self._move_to(x, y, -3.0))
+
+    def landAsync(self, timeout_sec=60, vehicle_name=""):
+        x, y, _ = self.position
+        return self._start("landAsync", self._move_to(x, y, 0.0))
+
+    def hoverAsync(self, vehicle_name=""):
+        self.yaw_rate = 0.0
+        return self._start("hoverAsync")
+
+    def moveToPositionAsync(self, x, y, z, velocity, timeout_sec=3e38, *args, **kwargs):
+        return self._start("moveToPositionAsync", self._move_to(x, y, z))
+
+    def moveOnPathAsync(self, path, velocity, timeout_sec=3e38, *args, **kwargs):
+        end = path[-1]
+        return self._start("moveOnPathAsync", self._move_to(end.x_val, end.y_val, end.z_val))
+
+    def moveByVelocityAsync(self, vx, vy, vz, duration, *args, **kwargs):
+        return self._start("moveByVelocityAsync",
+                           duration=min(duration, self.delays["moveByVelocityAsync"]))
+
+    def rotateToYawAsync(self, yaw, timeout_sec=3e38, margin=5, vehicle_name=""):
+        def done():
+            self.yaw = math.radians(yaw)  # AirSim takes degrees
+        return self._start("rotateToYawAsync", done)
+
+    def rotateByYawRateAsync(self, yaw_rate, duration, vehicle_name=""):
+        self.yaw_rate = yaw_rate
+
+        def done():
+            self.yaw += math.radians(yaw_rate * min(duration, self.delays["rotateByYawRateAsync"]))
+        return self._start("rotateByYawRateAsync", done,
+                           duration=min(duration, self.delays["rotateByYawRateAsync"]))
+
+    # State and sensors
+    def getMultirotorState(self, vehicle_name=""):
+        self._rpc("getMultirotorState")
+        x, y, z = self.position
+        half = self.yaw / 2.0
+        kinematics = SimpleNamespace(
+            position=_vector(x, y, z),
+            orientation=SimpleNamespace(w_val=math.cos(half), x_val=0.0, y_val=0.0, z_val=math.sin(half)),
+            linear_velocity=_vector(),
+            angular_velocity=_vector(0.0, 0.0, math.radians(self.yaw_rate)),
+        )
+        return SimpleNamespace(kinematics_estimated=kinematics, timestamp=time.time_ns())
+
+    def simGetImages(self, requests, vehicle_name=""):
+        """One response per request, rendered from the current yaw; the whole batch costs one RPC."""
+        self._rpc("simGetImages")
+        width, height = self.image_size
+        x, y, z = self.position
+        half = self.yaw / 2.0
+        responses = []
+        for request in requests:
+            pixels = _render(request.image_type, width, height, self.yaw)
+            if request.pixels_as_float:
+                data, floats = b"", pixels.ravel().tolist()
+            else:
+                # AirSim's uncompressed buffers are BGR; its PNGs are RGB
+                data, floats = (_png(pixels) if request.compress else pixels[..., ::-1].tobytes()), []
+            responses.append(SimpleNamespace(
+                camera_name=request.camera_name, image_type=request.image_type,
+                pixels_as_float=request.pixels_as_float, compress=request.compress,
+                width=width, height=height, image_data_uint8=data, image_data_float=floats,
+                camera_position=_vector(x, y, z),
+                camera_orientation=SimpleNamespace(w_val=math.cos(half), x_val=0.0, y_val=0.0, z_val=math.sin(half)),
+                time_stamp=time.time_ns(),
+            ))
+        return responses
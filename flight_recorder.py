@@ -0,0 +1,176 @@
+"""Compact binary flight recorder for telemetry and command events.
+
+Every event is one fixed-size record of ``RECORD_DTYPE``: a kinematics
+sample, a recognized transcript, a resolved action or a stage latency. A
+session is one file, a 16-byte header followed by the records, written
+through a memory map of a preallocated chunk; when the chunk is full the
+file is extended by another chunk and the map rolls over to it. Appending
+is a single row assignment into the map, with no encoding or system call;
+``close`` trims the unused end of the last chunk.
+
+``read_flight_log`` maps a whole session read-only as one record array
+without copying it.
+"""
+import datetime
+import itertools
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"DRONEREC"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record size
+
+KINDS = {"kinematics": 1, "transcript": 2, "action": 3, "latency": 4}
+
+# text is the transcript, action or stage; label the language or engine;
+# value the ASR or classifier confidence, or the stage latency in seconds
+RECORD_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("trace", "<u4"),
+    ("time", "<f8"),
+    ("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("yaw", "<f4"),
+    ("vx", "<f4"), ("vy", "<f4"), ("vz", "<f4"),
+    ("value", "<f4"),
+    ("label", "S16"),
+    ("text", "S64"),
+])
+
+NO_POSE = (np.nan,) * 7
+
+
+def _encode(text, size):
+    return str(text or "").encode("utf-8")[:size]
+
+
+class FlightRecorder:
+    """Appends events to ``<directory>/<session>.rec``; the session defaults to the start time.
+
+    An existing session file is never overwritten: a second recorder with the
+    same session name (two started in the same second) gets ``-2``, ``-3``...
+    appended, and ``path`` is the file actually written.
+
+    The file grows ``chunk_records`` records at a time and only the current
+    chunk is mapped. Rows past the last record are zero (kind 0), which is
+    how the reader finds the end of a session that was not closed cleanly.
+    Safe to call from several threads.
+    """
+
+    def __init__(self, directory="flight_logs", chunk_records=65536, session=None):
+        session = session or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_records = chunk_records
+        self.records = 0
+        self.chunks = 0
+        self.counts = dict.fromkeys(KINDS, 0)
+        self._chunk = None
+        self._row = 0
+        self._lock = threading.Lock()
+        for attempt in itertools.count(1):
+            self.path = os.path.join(directory, f"{session}-{attempt}.rec" if attempt > 1 else f"{session}.rec")
+            try:
+                with open(self.path, "xb") as f:
+                    f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+                break
+            except FileExistsError:
+                continue
+        self._roll_over()
+
+    def _roll_over(self):
+        """Extend the file by one chunk and map it; the kernel writes the old chunk back on its own."""
+        self._chunk = None
+        start = self.chunks * self.chunk_records
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER.size + (start + self.chunk_records) * RECORD_DTYPE.itemsize)
+        self._chunk = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r+", shape=(self.chunk_records,),
+                                offset=HEADER.size + start * RECORD_DTYPE.itemsize)
+        self.chunks += 1
+        self._row = 0
+
+    def _append(self, kind, trace, pose, value, label, text):
+        record = (KINDS[kind], trace or 0, time.time()) + pose + (value, label, text)
+        with self._lock:
+            if self._chunk is None:
+                return
+            if self._row == self.chunk_records:
+                self._roll_over()
+            self._chunk[self._row] = record
+            self._row += 1
+            self.records += 1
+            self.counts[kind] += 1
+
+    def kinematics(self, snapshot):
+        """Record a ``TelemetrySnapshot``."""
+        pose = (snapshot.x, snapshot.y, snapshot.z, snapshot.yaw, snapshot.vx, snapshot.vy, snapshot.vz)
+        self._append("kinematics", 0, pose, np.nan, b"", b"")
+
+    def transcript(self, text, language=None, confidence=None, trace=None):
+        self._append("transcript", trace, NO_POSE, np.nan if confidence is None else confidence,
+                     _encode(language, 16), _encode(text, 64))
+
+    def action(self, action, engine=None, confidence=None, trace=None):
+        self._append("action", trace, NO_POSE, np.nan if confidence is None else confidence,
+                     _encode(engine, 16), _encode(action, 64))
+
+    def latency(self, stage, engine, seconds, trace=None):
+        self._append("latency", trace, NO_POSE, seconds, _encode(engine, 16), _encode(stage, 64))
+
+    def flush(self):
+        with self._lock:
+            if self._chunk is not None:
+                self._chunk.flush()
+
+    def close(self):
+        """Flush and cut the unused end of the last chunk off the file."""
+        with self._lock:
+            if self._chunk is None:
+                return
+            self._chunk.flush()
+            self._chunk = None
+            with open(self.path, "r+b") as f:
+                f.truncate(HEADER.size + self.records * RECORD_DTYPE.itemsize)
+
+    def report(self):
+        kinds = ", ".join(f"{count} {kind}" for kind, count in self.counts.items())
+        print(f"Flight recorder: {self.records} records ({kinds}), "
+              f"{self.records * RECORD_DTYPE.itemsize / 2 ** 20:.2f} MB in {self.chunks} chunk(s) at {self.path}")
+
+
+def _used_records(records):
+    """Number of records before the zero-filled tail, by binary search so only a few pages are read."""
+    low, high = 0, len(records)
+    while low < high:
+        middle = (low + high) // 2
+        if records[middle]["kind"]:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def read_flight_log(path):
+    """Every record of a session as one read-only memory-mapped ``RECORD_DTYPE`` array (no copy)."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a flight log")
+    magic, version, itemsize = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or itemsize != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} flight log")
+    if os.path.getsize(path) == HEADER.size:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size)
+    return records[:_used_records(records)]
+
+
+def records_of(records, kind):
+    """The records of one kind (``"kinematics"``, ``"transcript"``...); this selection is a copy."""
+    return records[records["kind"] == KINDS[kind]]
+
+
+def decode_text(field):
+    """``str`` of a ``label`` or ``text`` field; a character cut at the field size is dropped."""
+    return bytes(field).decode("utf-8", "ignore")
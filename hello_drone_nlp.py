@@ -1,50 +1,96 @@
-import airsim
 import time
-import threading
+import functools
+from startup import StartupTimer, BackgroundLoader
+
+startup = StartupTimer()
+
+import airsim
 import math
 import os
 import speech_recognition as sr
 import re
 from googletrans import Translator
-import spacy
-from spacy.lang.en import English
-
-nlp = spacy.load('en_core_web_md')
-
-class Timer:
-    def __init__(self):
-        self.start_time = None
-
-    def start(self):
-        self.start_time = time.perf_counter()
-
-    def end(self):
-        if self.start_time is None:
-            raise ValueError("Timer was not started. Call `start()` before `end()`.")
-        elapsed_time = time.perf_counter() - self.start_time
-        self.start_time = None  # Reset timer
-        return elapsed_time
-
-timer = Timer()
-
-# Measure execution time of the function
+from command_vocab import command_mappings, local_action
+from stage_trace import StageTracer
+from voice_pipeline import VoicePipeline
+from translation_cache import CachingTranslator, load_phrase_tables
+from command_dispatcher import CommandDispatcher
+from motion import wait_for_motion
+from keyword_spotter import KeywordSpotter, KeywordListener
+from vad import SpeechGate
+from asr_backends import GoogleBackend, FallbackRecognizer, ParallelLanguageRecognizer, is_english
+from telemetry import TelemetryCache
+from nlu_server import NLUServer
+from resolution_cache import ResolutionCache
+from flight_recorder import FlightRecorder
+from image_capture import ImageCapture
+from segmentation import SegmentationAnalyzer, decode_segmentation, format_summary
+from panorama import panorama_sweep, format_sweep
+from command_planner import looks_compound, coalesce, world_path, format_plan
+
+startup.record("imports")
+
+# Position/yaw are polled in the background so commands do not wait on state RPCs
+TELEMETRY_RATE_HZ = 20
+
+# Stop words are spotted on the raw audio stream and skip ASR, translation and classification
+STOP_WORDS = ("stop", "ruko", "aapu")
+KEYWORD_TEMPLATES = "keyword_templates"
+
+# Only speech of command length reaches ASR; set a wake word (enrolled like the stop words) to require it
+WAKE_WORD = None
+CALIBRATION_SECONDS = 1.0
+
+# Recognition backends in the order they are tried; "local" is an int8 Whisper model that needs no network
+ASR_ORDER = ("google", "local")
+LOCAL_ASR_MODEL = "base"
+
+# With several languages entered at the prompt, each phrase is recognized in all of them at once
+LANGUAGE_DEADLINE = 3.0
+
+# Non-English commands are matched in their own language when the embedding match is confident enough
+MULTILINGUAL_NLU = True
+MULTILINGUAL_THRESHOLD = 0.8
+MULTILINGUAL_MARGIN = 0.05
+
+# Keyword-vector similarity a command (or a plan step) must exceed to be mapped
+SIMILARITY_THRESHOLD = 0.7
+
+# NLU models run in a separate process so inference never stalls audio capture or the AirSim RPC threads
+NLU_WORKERS = 1
+NLU_TIMEOUT = 3.0
+
+# Compound and parameterized commands ("go forward 5 meters then turn left and go up") are parsed into
+# plans in the NLU worker; consecutive moves fly as one path. Steps without a magnitude use these defaults
+PLANNED_COMMANDS = True
+PLAN_STEP_METRES = 5
+PLAN_STEP_DEGREES = 90
+PLAN_VELOCITY = 1
+
+# Resolved commands are memoized per engine and vocabulary; the file is shared by all three scripts
+RESOLUTION_CACHE = "resolution_cache.json"
+
+# Kinematics, transcripts, actions and stage latencies are appended to a binary session file here
+FLIGHT_LOG_DIR = "flight_logs"
+
+# scan/analyse fetch all their (camera, image type) views in one simGetImages call;
+# files are written in the background under CAPTURE_ROOT with timestamped names
+CAPTURE_ROOT = "captures"
+SCAN_VIEWS = [("front_center", "Scene"), ("front_center", "Segmentation"),
+              ("front_center", "DepthPlanar"), ("bottom_center", "Scene")]
+ANALYSE_VIEWS = [("front_center", "Scene"), ("front_center", "Segmentation")]
+# scan sweeps a full turn with this many evenly spaced captures (1 = a single frame at the current heading);
+# each sweep gets its own directory with a manifest.json of frame yaw and position
+SCAN_STEPS = 8
+
+# analyse summarizes the segmentation frame in memory within this budget; name classes by colour,
+# e.g. {(200, 30, 30): "vehicle"} for object IDs set with simSetSegmentationObjectID
+SEGMENTATION_BUDGET_MS = 50
+SEGMENTATION_CLASSES = {}
 
 #Multi-threading and Rule based NLP
 
-#First select Language , then Begin client connection : 
-translator = Translator()
-source_language = input("Enter the language code you will speak (e.g., 'hi' for Hindi, 'es' for Spanish, 'en' for English): ").strip()
-
-
-# Connect to the AirSim simulator
-client = airsim.MultirotorClient()
-client.confirmConnection()
-client.enableApiControl(True)
-client.armDisarm(True)
-
 # Global variables
-current_task = None
-stop_event = threading.Event()
 negate_next = False 
 
 # Speech recognizer initialization
@@ -69,76 +115,120 @@ recognizer = sr.Recognizer()
 #     "analyse": ["record", "start recording", "begin recording", "analyse"]
 # }
 
-# Command mappings with synonyms
-command_mappings = {
-    "takeoff": ["take off", "launch", "ascend","rise","start", "fly", "flying"],
-    "land": ["land", "touchdown"],
-    "up": ["up", "ascend", "rise","upside", "upward"],
-    "down": ["down", "descend", "lower","below","downside", "downward"],
-    "forward": ["forward", "move forward", "advance","front", "go"],
-    "backward": ["backward", "reverse","back"],
-    "left": ["left","leftside", "leftward"],
-    "right": ["right","rightside", "rightward"],
-    "rotate left": ["rotate left", "spin left", "counterclockwise"],
-    "rotate right": ["rotate right", "spin right", "clockwise"],
-    "stop": ["stop", "halt", "pause", "freeze"],
-    "scan": ["scan", "survey", "inspect", "check", "search"],
-    "analyse": ["record", "start recording", "begin recording", "analyse"],
-    "dont": ["don't", "do not", "not"]
-}
-
-def get_voice_command():
-    """Function to capture voice input and transcribe it."""
-    with sr.Microphone() as source:
-        print("Listening for command...")
-        audio = recognizer.listen(source)
+@functools.lru_cache(maxsize=None)
+def load_spacy():
+    """The spaCy model, loaded once per process and shared by the command index and planner."""
+    import spacy
+    return spacy.load('en_core_web_md')
+
+@functools.lru_cache(maxsize=None)
+def load_command_index():
+    """Load spaCy and build the keyword-vector index once per process; the planner reuses it."""
+    from command_index import CommandVectorIndex
+    # Keyword vectors are computed once here instead of on every utterance
+    return CommandVectorIndex(load_spacy(), command_mappings)
+
+def load_command_planner():
+    """Compound-command parser over the same spaCy model (runs in the NLU worker)."""
+    from command_planner import CommandPlanner
+    return CommandPlanner(load_spacy(), load_command_index(), threshold=SIMILARITY_THRESHOLD)
+
+def load_local_asr():
+    """Load the offline recognizer (runs on a background thread)."""
+    from asr_backends import WhisperBackend
+    return WhisperBackend(LOCAL_ASR_MODEL)
+
+def make_asr(local_loader, languages):
+    """Recognizer that falls back through ASR_ORDER, in parallel over ``languages`` if there are several."""
+    backends = {"google": GoogleBackend(recognizer)}
+    try:
+        backends["local"] = local_loader.get()
+    except RuntimeError as e:
+        print(f"{e}; continuing with Google only.")
+    asr = FallbackRecognizer([backends[name] for name in ASR_ORDER if name in backends])
+    if len(languages) > 1:
+        return ParallelLanguageRecognizer(asr, languages, deadline=LANGUAGE_DEADLINE)
+    return asr
+
+def load_multilingual_index():
+    """Load the sentence encoder and the command phrase embeddings (runs on a background thread)."""
+    from multilingual_index import MultilingualCommandIndex, load_command_phrases, sentence_encoder
+    phrases, negations = load_command_phrases("command_phrases.json")
+    return MultilingualCommandIndex(sentence_encoder(), phrases, negations, cache_path="command_embeddings.npz")
+
+def start_nlu_server():
+    """Start the NLU worker process and wait until it has loaded its models (runs on a background thread)."""
+    factories = {"index": load_command_index}
+    if PLANNED_COMMANDS:
+        factories["planner"] = load_command_planner
+    if MULTILINGUAL_NLU:
+        factories["multilingual"] = load_multilingual_index
+    return NLUServer(factories, workers=NLU_WORKERS, timeout=NLU_TIMEOUT).start().wait_ready()
+
+def make_resolution_cache(path):
+    """Resolution cache with the spaCy engine registered against its model, threshold and vocabulary."""
+    cache = ResolutionCache(path)
+    cache.register("spacy", f"{command_index.model_version()}>{SIMILARITY_THRESHOLD}", command_mappings)
+    return cache
+
+def transcribe_audio(audio, trace):
+    """Transcribe one captured phrase."""
     try:
         # Transcribe speech to text
-        command_text = recognizer.recognize_google(audio, language=source_language)
-        print(f"Transcribed command: {command_text}")
-        return command_text.lower()
+        with trace.span("asr") as span:
+            hypothesis = asr.recognize(audio, language=source_language)
+            span.engine = hypothesis.backend  # Whichever backend answered
+        print(f"Transcribed command: {hypothesis.text} [{hypothesis.language}]")
+        return hypothesis._replace(text=hypothesis.text.lower())
     except sr.UnknownValueError:
         print("Could not understand the audio.")
         return None
     except sr.RequestError:
-        print("Could not request results from speech recognition service.")
+        print("Could not request results from any speech recognition backend.")
         return None
 
 #English Translation Text : 
-def translate_to_english(text):
+def translate_to_english(text, span=None, language=None):
     """Translate the recognized text to English using Google Translate."""
+    language = language or source_language
+    if is_english(language):
+        if span is not None:
+            span.engine = "skipped"
+        return text.lower()
     try:
-        translated = translator.translate(text, src=source_language, dest='en')
+        translated = translator.translate(text, src=language, dest='en')
+        if span is not None:
+            span.engine = translated.origin  # phrase table, cache or remote
         print(f"Translated to English: {translated.text}")
         return translated.text.lower()
     except Exception as e:
         print(f"Translation error: {e}")
         return None
 
-def map_to_drone_command(command_text):
+def map_to_drone_command(command_text, span=None):
     """Maps recognized command text to a drone-specific command using spaCy."""
     global negate_next
     negate_next = False  # Reset negation for every command
     
-    # Preprocess command_text with spaCy
-    command_doc = nlp(command_text)
-    mapped_command = None
-    max_similarity = 0.0
-
-    # Iterate through command mappings to find the best match
-    for command, keywords in command_mappings.items():
-        for keyword in keywords:
-            keyword_doc = nlp(keyword)
-            similarity = command_doc.similarity(keyword_doc)  # Calculate similarity
-            if similarity > max_similarity and similarity > 0.7:  # Set a similarity threshold
-                max_similarity = similarity
-                mapped_command = command
-
-            # Handle negation explicitly
-            if 'dont' in command_text or 'do not' in command_text:
-                print(f"Negation detected. Skipping command: {command}")
-                negate_next = True
-                return None
+    # Handle negation explicitly
+    if 'dont' in command_text or 'do not' in command_text:
+        print("Negation detected. Skipping command.")
+        negate_next = True
+        return None
+
+    resolved = resolution_cache.get("spacy", command_text)
+    if resolved is not None:
+        mapped_command, max_similarity = resolved
+        if span is not None:
+            span.engine = "cache"
+    else:
+        # Score the command against all keywords at once
+        try:
+            mapped_command, max_similarity = command_index.best_match(command_text, threshold=SIMILARITY_THRESHOLD)
+        except (TimeoutError, RuntimeError) as e:
+            print(f"Could not map command: {e}")
+            return []
+        resolution_cache.put("spacy", command_text, mapped_command, max_similarity)
 
     if mapped_command:
         print(f"Mapped '{command_text}' to command '{mapped_command}' with similarity {max_similarity:.2f}")
@@ -147,8 +237,24 @@ def map_to_drone_command(command_text):
         print(f"Could not map command: '{command_text}'. No suitable match found.")
         return []
 
+def plan_command(command_text):
+    """Multi-step plan for compound or parameterized text, None to map it as a single command, or [] to reject it."""
+    if command_planner is None or not looks_compound(command_text):
+        return None
+    try:
+        steps = command_planner.plan(command_text)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Could not plan command: {e}")
+        return None
+    if steps is None:
+        print(f"Could not read the amounts in '{command_text}'; not flying it.")
+        return []
+    if len(steps) > 1 or any(step.amount is not None for step in steps):
+        return steps
+    return None
+
 
-def execute_command(command):
+def execute_command(command, trace=None):
     global negate_next
 
     if command == 'dont':
@@ -163,61 +269,158 @@ def execute_command(command):
         return
     """Executes the drone command based on mapped text."""
     if command == 'takeoff':
-        execute_command_in_thread(takeoff)
+        dispatcher.submit(takeoff, trace=trace)
     elif command == 'land':
-        execute_command_in_thread(land)
+        dispatcher.submit(land, trace=trace)
     elif command == 'up':
-        execute_command_in_thread(translate_to_position_local, 0, 0, -100)
+        dispatcher.submit(translate_to_position_local, 0, 0, -100, trace=trace)
     elif command == 'down':
-        execute_command_in_thread(translate_to_position_local, 0, 0, 100)
+        dispatcher.submit(translate_to_position_local, 0, 0, 100, trace=trace)
     elif command == 'forward':
-        execute_command_in_thread(translate_to_position_local, 100, 0, 0)
+        dispatcher.submit(translate_to_position_local, 100, 0, 0, trace=trace)
     elif command == 'backward':
-        execute_command_in_thread(translate_to_position_local, -100, 0, 0)
+        dispatcher.submit(translate_to_position_local, -100, 0, 0, trace=trace)
     elif command == 'left':
-        execute_command_in_thread(translate_to_position_local, 0, -100, 0)
+        dispatcher.submit(translate_to_position_local, 0, -100, 0, trace=trace)
     elif command == 'right':
-        execute_command_in_thread(translate_to_position_local, 0, 100, 0)
+        dispatcher.submit(translate_to_position_local, 0, 100, 0, trace=trace)
     elif command == 'rotate left':
-        execute_command_in_thread(a)
+        dispatcher.submit(a, trace=trace)
     elif command == 'rotate right':
-        execute_command_in_thread(d)
+        dispatcher.submit(d, trace=trace)
     elif command == 'scan':
-        execute_command_in_thread(scan)
+        dispatcher.submit(scan, trace=trace)
     elif command == 'analyse':
-        execute_command_in_thread(analyse)
+        dispatcher.submit(analyse, trace=trace)
     elif command == 'stop':
-        execute_command_in_thread(stop)
+        dispatcher.submit(stop, trace=trace)
     # elif command == 'shutdown':
-    #         execute_command_in_thread(shutdown)
+    #         dispatcher.submit(shutdown, trace=trace)
     # elif command == 'on':
-    #         execute_command_in_thread(on)
+    #         dispatcher.submit(on, trace=trace)
     else:
         print("Command not recognized.")
 
+def match_without_translation(text):
+    """Action for a confident native-language match, or None to translate and classify as usual."""
+    if multilingual_index is None:
+        return None
+    try:
+        label, score, margin = multilingual_index.match(text)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Multilingual match failed ({e}); translating instead.")
+        return None
+    if label is None or score < MULTILINGUAL_THRESHOLD or margin < MULTILINGUAL_MARGIN:
+        return None
+    action = local_action(label, command_mappings)
+    if action:
+        print(f"Matched '{text}' to '{action}' without translation (similarity {score:.2f})")
+    return action
+
+def process_audio(audio, trace):
+    """Recognize, translate, map and execute one captured phrase."""
+    hypothesis = transcribe_audio(audio, trace)
+    if hypothesis:
+        recorder.transcript(hypothesis.text, hypothesis.language, hypothesis.confidence, trace.trace_id)
+        if multilingual_index is not None and not is_english(hypothesis.language):
+            with trace.span("classify", engine="multilingual"):
+                action = match_without_translation(hypothesis.text)
+            if action:
+                recorder.action(action, "multilingual", trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(action, trace=trace)
+                print("Time: ", trace.elapsed())
+                return
+        # Translate to English if needed
+        with trace.span("translate") as span:
+            translated_text = translate_to_english(hypothesis.text, span, hypothesis.language)
+        if translated_text:
+            print(f"Translated Command: {translated_text}")
+            with trace.span("classify", engine="spacy") as span:
+                plan = plan_command(translated_text)
+                drone_commands = []
+                if plan:
+                    span.engine = "planner"
+                elif plan is None:
+                    drone_commands = map_to_drone_command(translated_text, span)
+            if plan:
+                print(f"Plan: {format_plan(plan)}")
+                recorder.action(format_plan(plan), "planner", trace=trace.trace_id)
+                # A plan that starts with stop or land preempts and cancels like that command on its own
+                first = plan[0].action
+                with trace.span("dispatch"):
+                    dispatcher.submit(fly_plan, plan, trace=trace,
+                                      name=first if first in dispatcher.priority_commands else None)
+            elif drone_commands:
+                print("Mapped Command: ", drone_commands)
+                recorder.action(drone_commands[0], span.engine, trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(drone_commands[0], trace=trace)
+            else:
+                print("Command not recognized.")
+            # Time since the end of the utterance
+            print("Time: ", trace.elapsed())
+
+def on_stop_word(detection):
+    """Stop immediately when the keyword spotter hears a stop word, ahead of ASR."""
+    print(f"Heard '{detection.keyword}' (score {detection.score:.2f}), stopping.")
+    recorder.action("stop", "keyword", detection.score)
+    dispatcher.submit(stop)
+
+def make_speech_gate(sample_rate):
+    """Voice-activity gate in front of ASR, with the wake word when one is configured."""
+    wake_spotter = None
+    if WAKE_WORD:
+        wake_spotter = KeywordSpotter(sample_rate).load_directory(KEYWORD_TEMPLATES, keywords=[WAKE_WORD])
+        if not wake_spotter.templates:
+            print(f"No recordings of '{WAKE_WORD}' in {KEYWORD_TEMPLATES}/; wake word disabled.")
+            wake_spotter = None
+    return SpeechGate(wake_spotter=wake_spotter)
+
+def start_keyword_listener():
+    """Spot stop words on a second microphone stream; None if no templates are enrolled."""
+    microphone = sr.Microphone()
+    spotter = KeywordSpotter(microphone.SAMPLE_RATE).load_directory(KEYWORD_TEMPLATES, keywords=STOP_WORDS)
+    if not spotter.templates:
+        print(f"No stop-word recordings in {KEYWORD_TEMPLATES}/ (see enroll_keywords.py); fast stop disabled.")
+        return None
+    return KeywordListener(spotter, microphone, on_stop_word).start()
+
 def control_drone():
     """Main loop for controlling the drone with voice commands."""
     print("Voice-Controlled Drone is Ready.")
-    
-    while True:
-        command_text = get_voice_command()
-        #Timer started after listening the command
-        start_time=timer.start()
-        if command_text:
-            # Translate to English if needed
-            translated_text = translate_to_english(command_text)
-            if translated_text:
-                print(f"Translated Command: {translated_text}")
-                drone_commands = map_to_drone_command(translated_text)
-                if drone_commands:
-                    print("Mapped Command: ", drone_commands)
-                    execute_command(drone_commands[0])
-                else:
-                    print("Command not recognized.")
-                end_time=timer.end()
-                print("Time: ", (end_time))
-                #Timer stopped after command mapped
-        time.sleep(0.1)  # Short delay for the next command input
+    # The microphone keeps listening on its own thread while commands are processed
+    microphone = sr.Microphone()
+    pipeline = VoicePipeline(recognizer, microphone, process_audio, tracer=tracer,
+                             gate=make_speech_gate(microphone.SAMPLE_RATE), calibrate=CALIBRATION_SECONDS)
+    pipeline.start()
+    keywords = start_keyword_listener()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        pipeline.stop()
+        if keywords is not None:
+            keywords.stop()
+        dispatcher.close()
+        telemetry.stop()
+        pipeline.report()
+        asr.report()
+        if keywords is not None:
+            keywords.report()
+        dispatcher.report()
+        telemetry.report()
+        recorder.close()
+        recorder.report()
+        translator.save()
+        translator.report()
+        resolution_cache.save()
+        resolution_cache.report()
+        capture.close()
+        capture.report()
+        segmenter.report()
+        nlu.report()
+        nlu.close()
 
 # Drone control functions (unchanged)
 def on():
@@ -230,13 +433,17 @@ def on():
 # Function to take off
 def takeoff():
     print("Taking off...")
-    client.takeoffAsync().join()
+    task = client.takeoffAsync()
+    dispatcher.mark("first_motion", engine="takeoff")
+    task.join()
     time.sleep(1)  # Adding a delay after takeoff for stability
 
 # Function to land
 def land():
     print("Landing...")
-    client.landAsync().join()
+    task = client.landAsync()
+    dispatcher.mark("first_motion", engine="land")
+    task.join()
     time.sleep(1)  # Delay before disarming
 
 def shutdown():
@@ -247,7 +454,9 @@ def shutdown():
 def stop():
     print("Stopping the drone...")
     # Stop all movement and rotations
-    client.moveByVelocityAsync(0, 0, 0, 1).join()  # Stop translation
+    task = client.moveByVelocityAsync(0, 0, 0, 1)  # Stop translation
+    dispatcher.mark("first_motion", engine="stop")
+    task.join()
     client.rotateByYawRateAsync(0, 0).join()  # Stop rotation
     time.sleep(1)  # Short delay for stability
     try:
@@ -259,89 +468,160 @@ def d():
     print("Rotating clockwise...")
     # Rotate clockwise indefinitely at a slow rate (e.g., 10 degrees per second)
     client.rotateByYawRateAsync(10, duration=9999)  # Rotate indefinitely
+    dispatcher.mark("first_motion", engine="rotate")
 
 def a():
     print("Rotating counterclockwise...")
     # Rotate counterclockwise indefinitely at a slow rate (e.g., -10 degrees per second)
     client.rotateByYawRateAsync(-10, duration=9999)  # Rotate indefinitely
+    dispatcher.mark("first_motion", engine="rotate")
 
 # Function to convert quaternion to yaw (drone's orientation)
 def get_yaw():
-    orientation = client.getMultirotorState().kinematics_estimated.orientation
-    _, _, yaw = airsim.to_eularian_angles(orientation)  # Get yaw (rotation around the z-axis)
-    return yaw
+    return telemetry.latest().yaw  # Yaw (rotation around the z-axis) from the cached state
 
 # Function to handle translation to a new position in the drone's local (FPV) coordinates
 def translate_to_position_local(dx, dy, dz):
-    current_position = client.getMultirotorState().kinematics_estimated.position
-    yaw = get_yaw()  # Get the drone's current yaw angle
+    current_state = telemetry.latest()  # One cached snapshot instead of two state RPCs
+    yaw = current_state.yaw  # Get the drone's current yaw angle
 
     # Convert local dx, dy to global coordinates based on yaw
     dx_world = dx * math.cos(yaw) - dy * math.sin(yaw)  # Forward/backward
     dy_world = dx * math.sin(yaw) + dy * math.cos(yaw)  # Left/right
 
-    target_position = airsim.Vector3r(current_position.x_val + 5*dx_world, 
-                                      current_position.y_val + 5*dy_world, 
-                                      current_position.z_val + dz)
+    target_position = airsim.Vector3r(current_state.x + 5*dx_world, 
+                                      current_state.y + 5*dy_world, 
+                                      current_state.z + dz)
 
     # Move to the new position with the specified velocity and handle interruption
     task = client.moveToPositionAsync(target_position.x_val, target_position.y_val, target_position.z_val, velocity=1)
-    while not stop_event.is_set():
-        time.sleep(0.1)  # Check for stop_event periodically
-    try:
-        task.cancel()  # Cancel the current task if a new command is issued
-    except Exception as e:
-        pass  # Suppress any exception that occurs during task cancellation
+    dispatcher.mark("first_motion", engine="move")
+    # Wait for the move to finish or for a newer command, whichever comes first
+    result = wait_for_motion(task, dispatcher.cancel_token, cancel_task=cancel_client.cancelLastTask, name="Move")
+    print(result)
 
 # Function to handle rotation
 def rotate(dyaw):
-    current_orientation = client.getMultirotorState().kinematics_estimated.orientation
-    current_yaw = airsim.to_eularian_angles(current_orientation)[2]  # Get the yaw angle in degrees
+    current_yaw = get_yaw()
     target_yaw = current_yaw + dyaw
     task = client.rotateToYawAsync(target_yaw)
-    while not stop_event.is_set():
-        time.sleep(0.1)
-    try:
-        task.cancel()  # Cancel rotation if interrupted
-    except Exception as e:
-        pass  # Suppress any exception that occurs during task cancellation
-
-def scan(save_path=r"F:\mini_project_files\collected_photos/scan_image.png"):
-    print("Scanning the area...")
-    responses = client.simGetImages([airsim.ImageRequest("0", airsim.ImageType.Scene)])  # Scene = RGB image
-    if responses:
-        response = responses[0]
-        # Save the image to the specified path
-        with open(save_path, "wb") as f:
-            f.write(response.image_data_uint8)
-        print(f"Image saved at {save_path}")
+    dispatcher.mark("first_motion", engine="rotate")
+    result = wait_for_motion(task, dispatcher.cancel_token, cancel_task=cancel_client.cancelLastTask, name="Rotation")
+    print(result)
+
+def fly_plan(steps):
+    """Fly a plan one segment at a time: consecutive moves are one moveOnPathAsync, consecutive turns one rotation."""
+    actions = {"takeoff": takeoff, "land": land, "stop": stop, "scan": scan, "analyse": analyse}
+    for segment in coalesce(steps, PLAN_STEP_METRES, PLAN_STEP_DEGREES):
+        if dispatcher.cancel_token.is_set():
+            return
+        if segment.kind == "action":
+            if segment.value in actions:
+                actions[segment.value]()
+            else:
+                print(f"Skipping '{segment.value}' in the plan.")
+            continue
+        state = telemetry.latest(max_staleness=0)  # Where the previous segment actually ended
+        if segment.kind == "move":
+            path = [airsim.Vector3r(x, y, z) for x, y, z in world_path(segment.value, state.x, state.y, state.z, state.yaw)]
+            task = client.moveOnPathAsync(path, PLAN_VELOCITY)
+            dispatcher.mark("first_motion", engine="path")
+            name = "Move" if len(path) == 1 else f"Path of {len(path)} moves"
+        else:
+            task = client.rotateToYawAsync(math.degrees(state.yaw) + segment.value)
+            dispatcher.mark("first_motion", engine="rotate")
+            name = f"Rotation by {segment.value:g} degrees"
+        result = wait_for_motion(task, dispatcher.cancel_token, cancel_task=cancel_client.cancelLastTask, name=name)
+        print(result)
+        if not result.completed:
+            # Cancelled or failed (result.error): the rest of the plan assumes this segment ended where it should
+            print("Plan stopped; the remaining segments are not flown.")
+            return
+
+def image_requests(views, uncompressed=()):
+    """One airsim.ImageRequest per (camera, ImageType name); depth and ``uncompressed`` kinds come back raw."""
+    requests = []
+    for camera, kind in views:
+        depth = kind.startswith("Depth")
+        requests.append(airsim.ImageRequest(camera, getattr(airsim.ImageType, kind), pixels_as_float=depth,
+                                            compress=not depth and kind not in uncompressed))
+    return requests
+
+def scan():
+    print(f"Scanning the area: {SCAN_STEPS} views over a full turn...")
+    # Each rotation starts as soon as the previous views are in memory; they are written meanwhile
+    result = panorama_sweep(client, capture, image_requests(SCAN_VIEWS), steps=SCAN_STEPS,
+                            start_yaw=math.degrees(get_yaw()), cancel_token=dispatcher.cancel_token,
+                            cancel_task=cancel_client.cancelLastTask, label="scan")
+    if result.frames:
+        print(format_sweep(result))
     else:
         print("Failed to capture image.")
 
 # Function to analyse (click a picture and perform analysis)
-def analyse(save_path=r"F:\mini_project_files\collected_photos/scan_image.png"):
+def analyse():
     print("Capturing image for analysis...")
-    responses = client.simGetImages([airsim.ImageRequest("0", airsim.ImageType.Segmentation)])  # Segmentation type
-    if responses:
-        response = responses[0]
-        # Save the image
-        with open(save_path, "wb") as f:
-            f.write(response.image_data_uint8)
-        print(f"Segmentation image saved at {save_path}")
-    else:
+    # Segmentation comes back raw so it can be analysed in memory without decoding a PNG
+    result = capture.capture(image_requests(ANALYSE_VIEWS, uncompressed=("Segmentation",)), label="analyse")
+    frames = [r for r in result.responses if r.image_type == airsim.ImageType.Segmentation]
+    if not frames:
         print("Failed to capture segmentation image.")
-
-# Function to handle commands in separate threads
-def execute_command_in_thread(function, *args):
-    global current_task
-    stop_event.set()
-    if current_task:
-        current_task.join()
-    stop_event.clear()
-    current_task = threading.Thread(target=function, args=args)
-    current_task.start()
-
-
-
-# Start the voice control loop
-control_drone()
+        return
+    print(format_summary(segmenter.analyse(decode_segmentation(frames[0]))))
+
+
+if __name__ == "__main__":
+    # spaCy loads in the NLU worker process and the offline recognizer on a thread
+    # while we ask for the language and connect to AirSim
+    nlu_loader = BackgroundLoader("NLU server", start_nlu_server,
+                                  warm_up=lambda nlu: nlu.call("index", "best_match", "take off"), startup=startup)
+    asr_loader = BackgroundLoader("local ASR", load_local_asr,
+                                  warm_up=lambda backend: backend.warm_up(), startup=startup)
+
+    # Per-stage latency histograms; every span is also appended to drone_latency.jsonl
+    recorder = FlightRecorder(FLIGHT_LOG_DIR)
+    tracer = StageTracer(log_path="drone_latency.jsonl", recorder=recorder)
+
+    #First select Language , then Begin client connection : 
+    # Repeated phrases are served from the phrase tables or the on-disk cache
+    translator = CachingTranslator(Translator(), cache_path="translation_cache.json",
+                                   phrase_tables=load_phrase_tables("phrase_tables.json"))
+    with startup.phase("language prompt"):
+        source_language = input("Enter the language code you will speak (e.g., 'hi' for Hindi, 'es' for Spanish, 'en' for English; several like 'hi,en' to detect per phrase): ").strip()
+    languages = [code.strip() for code in source_language.split(",") if code.strip()] or ["en"]
+    source_language = languages[0]
+
+    with startup.phase("connect and arm"):
+        # Connect to the AirSim simulator
+        client = airsim.MultirotorClient()
+        client.confirmConnection()
+        client.enableApiControl(True)
+        client.armDisarm(True)
+
+        # Commands run one at a time on a long-lived worker; stop/land preempt immediately.
+        # Cancellation uses its own connection because the worker may be blocked in join().
+        cancel_client = airsim.MultirotorClient()
+        dispatcher = CommandDispatcher(on_preempt=cancel_client.cancelLastTask).start()
+
+        telemetry = TelemetryCache(airsim.MultirotorClient(), rate_hz=TELEMETRY_RATE_HZ, recorder=recorder).start()
+        # Images come over their own connection so a capture never waits behind a motion RPC
+        capture = ImageCapture(airsim.MultirotorClient(), root=CAPTURE_ROOT)
+        segmenter = SegmentationAnalyzer(budget_ms=SEGMENTATION_BUDGET_MS, class_names=SEGMENTATION_CLASSES)
+
+    with startup.phase("wait for models"):
+        asr = make_asr(asr_loader, languages)
+        nlu = nlu_loader.get()
+        command_index = nlu.engine("index")
+        command_planner = nlu.engine("planner", required=False) if PLANNED_COMMANDS else None
+        multilingual_index = nlu.engine("multilingual", required=False) if MULTILINGUAL_NLU else None
+        # Keyed on the model version, so it is opened once the NLU worker has loaded it
+        resolution_cache = make_resolution_cache(RESOLUTION_CACHE)
+    startup.report()
+
+    # Start the voice control loop
+    try:
+        control_drone()
+    except KeyboardInterrupt:
+        print("\nStage latency summary:")
+        tracer.report()
+        tracer.close()
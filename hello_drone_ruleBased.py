@@ -1,130 +1,108 @@
-import airsim
 import time
+from startup import StartupTimer, BackgroundLoader
+
+startup = StartupTimer()
+
+import airsim
 import threading
 import math
 import os
 import speech_recognition as sr
 from googletrans import Translator
-from transformers import pipeline
-import spacy
-import numpy as np
-from tornado.ioloop import IOLoop
 import asyncio
-
-
-class Timer:
-    def __init__(self):
-        self.start_time = None
-
-    def start(self):
-        self.start_time = time.perf_counter()
-
-    def end(self):
-        if self.start_time is None:
-            raise ValueError("Timer was not started. Call start() before end().")
-        elapsed_time = time.perf_counter() - self.start_time
-        self.start_time = None  # Reset timer
-        return elapsed_time
-
-timer = Timer()
-
-
-# Load SpaCy model for dependency parsing and NER
-nlp = spacy.load('en_core_web_sm')
-
-# First select Language, then Begin client connection
-translator = Translator()
-source_language = input("Enter the language code you will speak (e.g., 'hi' for Hindi, 'es' for Spanish, 'en' for English): ").strip()
-
-# Connect to the AirSim simulator
-client = airsim.MultirotorClient()
-client.confirmConnection()
-client.enableApiControl(True)
-client.armDisarm(True)
+from command_processor import DroneCommandProcessor
+from command_vocab import local_action
+from stage_trace import StageTracer
+from voice_pipeline import VoicePipeline
+from translation_cache import CachingTranslator, load_phrase_tables
+from command_dispatcher import CommandDispatcher
+from keyword_spotter import KeywordSpotter, KeywordListener
+from vad import SpeechGate
+from asr_backends import GoogleBackend, FallbackRecognizer, ParallelLanguageRecognizer, is_english
+from telemetry import TelemetryCache, snapshot_from_state
+from nlu_server import NLUServer
+from resolution_cache import ResolutionCache
+from flight_recorder import FlightRecorder
+
+startup.record("imports")
+
+# Position/yaw are polled in the background so commands do not wait on state RPCs
+TELEMETRY_RATE_HZ = 20
+
+# Stop words are spotted on the raw audio stream and skip ASR, translation and classification
+STOP_WORDS = ("stop", "ruko", "aapu")
+KEYWORD_TEMPLATES = "keyword_templates"
+
+# Only speech of command length reaches ASR; set a wake word (enrolled like the stop words) to require it
+WAKE_WORD = None
+CALIBRATION_SECONDS = 1.0
+
+# Recognition backends in the order they are tried; "local" is an int8 Whisper model that needs no network
+ASR_ORDER = ("google", "local")
+LOCAL_ASR_MODEL = "base"
+
+# With several languages entered at the prompt, each phrase is recognized in all of them at once
+LANGUAGE_DEADLINE = 3.0
+
+# Non-English commands are matched in their own language when the embedding match is confident enough
+MULTILINGUAL_NLU = True
+MULTILINGUAL_THRESHOLD = 0.8
+MULTILINGUAL_MARGIN = 0.05
+
+# NLU models run in a separate process so inference never stalls audio capture or the AirSim RPC threads
+NLU_WORKERS = 1
+NLU_TIMEOUT = 3.0
+
+# Resolved commands are memoized per engine and vocabulary; the file is shared by all three scripts
+RESOLUTION_CACHE = "resolution_cache.json"
+
+# Kinematics, transcripts, actions and stage latencies are appended to a binary session file here
+FLIGHT_LOG_DIR = "flight_logs"
 
 # Global variables
-current_task_thread = None 
 current_task = None
-stop_event = threading.Event()
 command_lock = threading.Lock()
 is_executing_command = False
 
 # Speech recognizer initialization
 recognizer = sr.Recognizer()
 
-class DroneCommandProcessor:
-    def __init__(self):
-        # Command structure remains the same as your original code
-        self.commands = {
-            'takeoff': ['take off', 'takeoff', 'launch', 'start', 'begin', 'lift'],
-            'land': ['land', 'touchdown', 'come down', 'descend ground'],
-            'stop': ['stop', 'halt', 'pause', 'freeze', 'stay', 'hover'],
-            'up': ['up', 'higher', 'ascend', 'upward', 'upar'],
-            'down': ['down', 'lower', 'descend', 'downward', 'niche'],
-            'left': ['left', 'leftward', 'baye'],
-            'right': ['right', 'rightward', 'daye'],
-            'forward': ['forward', 'ahead', 'straight', 'front', 'age'],
-            'backward': ['backward', 'back', 'reverse', 'backwards', 'piche'],
-            'rotate_left': ['rotate left', 'turn left', 'spin left', 'spin counterclockwise'],
-            'rotate_right': ['rotate right', 'turn right', 'spin right', 'spin clockwise']
-        }
-
-    # The process_command and _match_command methods remain the same as your original code
-    def process_command(self, text):
-        """Process the command text and return the corresponding action"""
-        text = text.lower().strip()
-        
-        if any(stop_word in text for stop_word in self.commands['stop']):
-            return {'action': 'stop'}
-
-        parts = text.split()
-        negation_words = ['dont', "don't", 'not']
-        has_negation = any(word in parts for word in negation_words)
-        
-        if has_negation:
-            return {'action': 'stop'}
-        
-        return {'action': self._match_command(text)} if self._match_command(text) else None
-
-    def _match_command(self, text):
-        """Match the input text against known commands"""
-        if any(rot in text for rot in ['rotate', 'turn', 'spin']):
-            if any(left in text for left in ['left', 'counterclockwise']):
-                return 'rotate_left'
-            elif any(right in text for right in ['right', 'clockwise']):
-                return 'rotate_right'
-        
-        for command, variations in self.commands.items():
-            if any(variation in text for variation in variations):
-                if (command in ['rotate_left', 'rotate_right'] and 
-                    not any(rot in text for rot in ['rotate', 'turn', 'spin'])):
-                    continue
-                return command
-        
-        return None
+# The rule tables are compiled once and shared by every utterance
+command_processor = DroneCommandProcessor()
 
-
-    
 class DroneController:
-    def __init__(self, client):
+    def __init__(self, client, dispatcher=None, telemetry=None):
         self.client = client
+        self.dispatcher = dispatcher
+        self.telemetry = telemetry
         self.is_moving = False
         self._movement_lock = threading.Lock()
 
+    def _motion_started(self, kind):
+        """Record on the command's trace that its first motion RPC has been issued."""
+        if self.dispatcher is not None:
+            self.dispatcher.mark("first_motion", engine=kind)
+
     async def takeoff(self):
         print("Taking off...")
         # Correct: No await here
-        self.client.takeoffAsync().join()
+        task = self.client.takeoffAsync()
+        self._motion_started("takeoff")
+        task.join()
 
     async def land(self):
         print("Landing...")
         # Correct: No await here
-        self.client.landAsync().join()
+        task = self.client.landAsync()
+        self._motion_started("land")
+        task.join()
 
     async def hover(self):
         """Make the drone hover at the current position."""
         try:
-            self.client.hoverAsync().join()  # Correct: No await
+            task = self.client.hoverAsync()  # Correct: No await
+            self._motion_started("stop")
+            task.join()
         except RuntimeError as e:
             if "IOLoop is already running" not in str(e):
                 raise
@@ -144,26 +122,27 @@ class DroneController:
                     return
                 self.is_moving = True
 
-            current_state = self.client.getMultirotorState()
-            current_position = current_state.kinematics_estimated.position
-            yaw = self.get_yaw()
+            current_state = self.get_state()
+            yaw = current_state.yaw
 
             dx_world = dx * math.cos(yaw) - dy * math.sin(yaw)
             dy_world = dx * math.sin(yaw) + dy * math.cos(yaw)
 
             target_position = airsim.Vector3r(
-                current_position.x_val + dx_world,
-                current_position.y_val + dy_world,
-                current_position.z_val + dz
+                current_state.x + dx_world,
+                current_state.y + dy_world,
+                current_state.z + dz
             )
 
             # Correct: No await
-            self.client.moveToPositionAsync(
+            task = self.client.moveToPositionAsync(
                 target_position.x_val,
                 target_position.y_val,
                 target_position.z_val,
                 velocity=2
-            ).join()
+            )
+            self._motion_started("move")
+            task.join()
         except Exception as e:
             print(f"Error in movement: {str(e)}")
         finally:
@@ -181,7 +160,9 @@ class DroneController:
 
             rate = 10 if direction == 'right' else -10
             # Correct: No await
-            self.client.rotateByYawRateAsync(rate, duration=3).join()
+            task = self.client.rotateByYawRateAsync(rate, duration=3)
+            self._motion_started("rotate")
+            task.join()
         except Exception as e:
             print(f"Error in rotation: {str(e)}")
         finally:
@@ -189,37 +170,19 @@ class DroneController:
                 self.is_moving = False
             
 
+    def get_state(self):
+        """Latest position/yaw snapshot, from the telemetry cache when there is one."""
+        if self.telemetry is not None:
+            return self.telemetry.latest()
+        return snapshot_from_state(self.client.getMultirotorState())
+
     def get_yaw(self):
         """Get the drone's current yaw angle."""
-        orientation = self.client.getMultirotorState().kinematics_estimated.orientation
-        _, _, yaw = airsim.to_eularian_angles(orientation)
-        return yaw
-    
-def thread_wrapper(coro, *args):
-    """
-    Wrapper function to execute asyncio coroutines in threads.
-    """
-    asyncio.run(coro(*args))
-
+        return self.get_state().yaw
     
-def execute_command_in_thread(function, coro, *args):
-    """
-    Execute a command in a separate thread while allowing cancellation of
-    the currently running task.
+def execute_command(controller, command_info, trace=None):
     """
-    global current_task_thread
-    stop_event.set()  # Signal the stop event to interrupt ongoing tasks
-    if current_task_thread:
-        current_task_thread.join()  # Wait for the previous thread to finish
-
-    stop_event.clear()  # Clear the stop event for the new task
-    current_task_thread = threading.Thread(target=function, args=(coro, *args))
-    current_task_thread.start()
-
-
-def execute_command(controller, command_info):
-    """
-    Dispatch drone commands to separate threads for execution.
+    Dispatch drone commands to the command worker for execution.
     """
     if not command_info:
         return
@@ -247,65 +210,194 @@ def execute_command(controller, command_info):
     if action in actions_map:
         coro = actions_map[action][0]  # Extract coroutine function
         args = actions_map[action][1:]  # Extract arguments (if any)
-        execute_command_in_thread(thread_wrapper, coro, *args)
+        dispatcher.submit(coro, *args, trace=trace)
     else:
         print("Command not recognized.")
 
 
 
+def match_without_translation(text):
+    """Action for a confident native-language match, or None to translate and classify as usual."""
+    if multilingual_index is None:
+        return None
+    try:
+        label, score, margin = multilingual_index.match(text)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Multilingual match failed ({e}); translating instead.")
+        return None
+    if label is None or score < MULTILINGUAL_THRESHOLD or margin < MULTILINGUAL_MARGIN:
+        return None
+    action = local_action(label, command_processor.commands)
+    if action:
+        print(f"Matched '{text}' to '{action}' without translation (similarity {score:.2f})")
+    return action
+
+def resolve_command(text, span=None):
+    """``command_processor.process_command`` memoized in the resolution cache."""
+    resolved = resolution_cache.get("rules", text)
+    if resolved is not None:
+        action, _ = resolved
+        if span is not None:
+            span.engine = "cache"
+    else:
+        command_info = command_processor.process_command(text)
+        action = command_info['action'] if command_info else None
+        resolution_cache.put("rules", text, action, 1.0)
+    return {'action': action} if action else None
+
+def process_audio(audio, trace):
+    """Recognize, translate, parse and dispatch one captured phrase."""
+    hypothesis = transcribe_audio(audio, trace)
+    if hypothesis:
+        recorder.transcript(hypothesis.text, hypothesis.language, hypothesis.confidence, trace.trace_id)
+        if multilingual_index is not None and not is_english(hypothesis.language):
+            with trace.span("classify", engine="multilingual"):
+                action = match_without_translation(hypothesis.text)
+            if action:
+                recorder.action(action, "multilingual", trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(controller, {'action': action}, trace=trace)
+                print("Time taken: ", trace.elapsed())
+                return
+        with trace.span("translate") as span:
+            translated_text = translate_to_english(hypothesis.text, span, hypothesis.language)
+        if translated_text:
+            print(f"Processing command: {translated_text}")
+
+            with trace.span("classify", engine="rules") as span:
+                command_info = resolve_command(translated_text, span)
+            if command_info:
+                recorder.action(command_info['action'], span.engine, trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(controller, command_info, trace=trace)
+                #await execute_command(controller, command_info)
+            else:
+                print("Command not recognized.")
+    print("Time taken: ", trace.elapsed())
+
+def on_stop_word(detection):
+    """Stop immediately when the keyword spotter hears a stop word, ahead of ASR."""
+    print(f"Heard '{detection.keyword}' (score {detection.score:.2f}), stopping.")
+    recorder.action("stop", "keyword", detection.score)
+    execute_command(controller, {'action': 'stop'})
+
+def make_speech_gate(sample_rate):
+    """Voice-activity gate in front of ASR, with the wake word when one is configured."""
+    wake_spotter = None
+    if WAKE_WORD:
+        wake_spotter = KeywordSpotter(sample_rate).load_directory(KEYWORD_TEMPLATES, keywords=[WAKE_WORD])
+        if not wake_spotter.templates:
+            print(f"No recordings of '{WAKE_WORD}' in {KEYWORD_TEMPLATES}/; wake word disabled.")
+            wake_spotter = None
+    return SpeechGate(wake_spotter=wake_spotter)
+
+def start_keyword_listener():
+    """Spot stop words on a second microphone stream; None if no templates are enrolled."""
+    microphone = sr.Microphone()
+    spotter = KeywordSpotter(microphone.SAMPLE_RATE).load_directory(KEYWORD_TEMPLATES, keywords=STOP_WORDS)
+    if not spotter.templates:
+        print(f"No stop-word recordings in {KEYWORD_TEMPLATES}/ (see enroll_keywords.py); fast stop disabled.")
+        return None
+    return KeywordListener(spotter, microphone, on_stop_word).start()
+
 async def process_voice_commands():
     """Process voice commands asynchronously"""
-    command_processor = DroneCommandProcessor()
-    controller = DroneController(client)
-    
-    while True:
-        try:
-            command_text = get_voice_command()
-            timer.start()
-            if command_text:
-                translated_text = translate_to_english(command_text)
-                if translated_text:
-                    print(f"Processing command: {translated_text}")
-
-                    command_info = command_processor.process_command(translated_text)
-                    if command_info:
-                        execute_command(controller, command_info)
-                        #await execute_command(controller, command_info)
-                    else:
-                        print("Command not recognized.")
-            print("Time taken: ", timer.end())
-            await asyncio.sleep(0.1)
-        except KeyboardInterrupt:
-            print("\nShutting down...")
-            execute_command(controller, {'action': 'stop'})
-            #await controller.stop()
-            client.armDisarm(False)
-            client.enableApiControl(False)
-            break
-        except Exception as e:
-            print(f"Error in command processing: {str(e)}")
-            continue
-
-def get_voice_command():
-    """Function to capture voice input and transcribe it."""
-    with sr.Microphone() as source:
-        print("Listening for command...")
-        audio = recognizer.listen(source)
+    # The microphone keeps listening on its own thread while commands are processed
+    microphone = sr.Microphone()
+    pipeline = VoicePipeline(recognizer, microphone, process_audio, tracer=tracer,
+                             gate=make_speech_gate(microphone.SAMPLE_RATE), calibrate=CALIBRATION_SECONDS)
+    pipeline.start()
+    keywords = start_keyword_listener()
+    try:
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        print("\nShutting down...")
+        pipeline.stop()
+        if keywords is not None:
+            keywords.stop()
+        execute_command(controller, {'action': 'stop'})
+        #await controller.stop()
+        dispatcher.close(drain=True)
+        telemetry.stop()
+        pipeline.report()
+        asr.report()
+        if keywords is not None:
+            keywords.report()
+        dispatcher.report()
+        telemetry.report()
+        recorder.close()
+        recorder.report()
+        translator.save()
+        translator.report()
+        resolution_cache.save()
+        resolution_cache.report()
+        if nlu is not None:
+            nlu.report()
+            nlu.close()
+        print("\nStage latency summary:")
+        tracer.report()
+
+def load_local_asr():
+    """Load the offline recognizer (runs on a background thread)."""
+    from asr_backends import WhisperBackend
+    return WhisperBackend(LOCAL_ASR_MODEL)
+
+def make_asr(local_loader, languages):
+    """Recognizer that falls back through ASR_ORDER, in parallel over ``languages`` if there are several."""
+    backends = {"google": GoogleBackend(recognizer)}
     try:
-        command_text = recognizer.recognize_google(audio, language=source_language)
-        print(f"Transcribed command: {command_text}")
-        return command_text.lower()
+        backends["local"] = local_loader.get()
+    except RuntimeError as e:
+        print(f"{e}; continuing with Google only.")
+    asr = FallbackRecognizer([backends[name] for name in ASR_ORDER if name in backends])
+    if len(languages) > 1:
+        return ParallelLanguageRecognizer(asr, languages, deadline=LANGUAGE_DEADLINE)
+    return asr
+
+def load_multilingual_index():
+    """Load the sentence encoder and the command phrase embeddings (runs on a background thread)."""
+    from multilingual_index import MultilingualCommandIndex, load_command_phrases, sentence_encoder
+    phrases, negations = load_command_phrases("command_phrases.json")
+    return MultilingualCommandIndex(sentence_encoder(), phrases, negations, cache_path="command_embeddings.npz")
+
+def start_nlu_server():
+    """Start the NLU worker process and wait until it has loaded its models (runs on a background thread)."""
+    factories = {"multilingual": load_multilingual_index}
+    return NLUServer(factories, workers=NLU_WORKERS, timeout=NLU_TIMEOUT).start().wait_ready()
+
+def make_resolution_cache(path):
+    """Resolution cache with the rule processor registered against its vocabulary."""
+    cache = ResolutionCache(path)
+    cache.register("rules", command_processor.matcher_version(), command_processor.commands)
+    return cache
+
+def transcribe_audio(audio, trace):
+    """Transcribe one captured phrase."""
+    try:
+        with trace.span("asr") as span:
+            hypothesis = asr.recognize(audio, language=source_language)
+            span.engine = hypothesis.backend  # Whichever backend answered
+        print(f"Transcribed command: {hypothesis.text} [{hypothesis.language}]")
+        return hypothesis._replace(text=hypothesis.text.lower())
     except sr.UnknownValueError:
         print("Could not understand the audio.")
         return None
     except sr.RequestError:
-        print("Could not request results from speech recognition service.")
+        print("Could not request results from any speech recognition backend.")
         return None
 
-def translate_to_english(text):
+def translate_to_english(text, span=None, language=None):
     """Translate the recognized text to English using Google Translate."""
+    language = language or source_language
+    if is_english(language):
+        if span is not None:
+            span.engine = "skipped"
+        return text.lower()
     try:
-        translated = translator.translate(text, src=source_language, dest='en')
+        translated = translator.translate(text, src=language, dest='en')
+        if span is not None:
+            span.engine = translated.origin  # phrase table, cache or remote
         print(f"Translated to English: {translated.text}")
         return translated.text.lower()
     except Exception as e:
@@ -313,10 +405,56 @@ def translate_to_english(text):
         return None
 
 if __name__ == "__main__":
+    # The offline recognizer loads in the background while we ask for the language and connect to AirSim
+    asr_loader = BackgroundLoader("local ASR", load_local_asr,
+                                  warm_up=lambda backend: backend.warm_up(), startup=startup)
+    # The sentence encoder loads in the NLU worker process; the rule parser is cheap and stays here
+    nlu_loader = None
+    if MULTILINGUAL_NLU:
+        nlu_loader = BackgroundLoader("NLU server", start_nlu_server, startup=startup)
+
+    resolution_cache = make_resolution_cache(RESOLUTION_CACHE)
+
+    # Per-stage latency histograms; every span is also appended to drone_latency.jsonl
+    recorder = FlightRecorder(FLIGHT_LOG_DIR)
+    tracer = StageTracer(log_path="drone_latency.jsonl", recorder=recorder)
+
+    # First select Language, then Begin client connection
+    # Repeated phrases are served from the phrase tables or the on-disk cache
+    translator = CachingTranslator(Translator(), cache_path="translation_cache.json",
+                                   phrase_tables=load_phrase_tables("phrase_tables.json"))
+    with startup.phase("language prompt"):
+        source_language = input("Enter the language code you will speak (e.g., 'hi' for Hindi, 'es' for Spanish, 'en' for English; several like 'hi,en' to detect per phrase): ").strip()
+    languages = [code.strip() for code in source_language.split(",") if code.strip()] or ["en"]
+    source_language = languages[0]
+
+    with startup.phase("connect and arm"):
+        # Connect to the AirSim simulator
+        client = airsim.MultirotorClient()
+        client.confirmConnection()
+        client.enableApiControl(True)
+        client.armDisarm(True)
+
+        # Commands run one at a time on a long-lived worker with one persistent event loop;
+        # stop/land preempt immediately. Cancellation uses its own connection because the
+        # worker may be blocked in join().
+        cancel_client = airsim.MultirotorClient()
+        dispatcher = CommandDispatcher(on_preempt=cancel_client.cancelLastTask).start()
+
+        telemetry = TelemetryCache(airsim.MultirotorClient(), rate_hz=TELEMETRY_RATE_HZ, recorder=recorder).start()
+        controller = DroneController(client, dispatcher, telemetry)
+
+    with startup.phase("wait for models"):
+        asr = make_asr(asr_loader, languages)
+        nlu = nlu_loader.get_or_none() if nlu_loader else None
+        multilingual_index = nlu.engine("multilingual", required=False) if nlu else None
+    startup.report()
+
     try:
         asyncio.run(process_voice_commands())
     except KeyboardInterrupt:
         print("\nProgram terminated by user")
     finally:
+        tracer.close()
         client.armDisarm(False)
-        client.enableApiControl(False)
\ No newline at end of file
+        client.enableApiControl(False)
@@ -1,77 +1,183 @@
-import airsim
 import time
-import threading
+from startup import StartupTimer, BackgroundLoader
+
+startup = StartupTimer()
+
+import airsim
 import math
 import os
 import speech_recognition as sr
 import re
-from transformers import pipeline
 from googletrans import Translator
+from command_processor import DroneCommandProcessor
+from cascade import CascadeClassifier
+from command_vocab import labels, command_mappings, local_action
+from stage_trace import StageTracer
+from voice_pipeline import VoicePipeline
+from translation_cache import CachingTranslator, load_phrase_tables
+from command_dispatcher import CommandDispatcher
+from motion import wait_for_motion
+from keyword_spotter import KeywordSpotter, KeywordListener
+from vad import SpeechGate
+from asr_backends import GoogleBackend, FallbackRecognizer, ParallelLanguageRecognizer, is_english
+from telemetry import TelemetryCache
+from nlu_server import NLUServer
+from resolution_cache import ResolutionCache
+from flight_recorder import FlightRecorder
+
+startup.record("imports")
+
+# Set to True to load a dynamically quantized int8 model (faster on CPU-only machines)
+QUANTIZE_MODEL = False
+
+# "bart" runs facebook/bart-large-mnli; "distilled" is the small classifier trained by distill_zero_shot.py
+ZERO_SHOT_ENGINE = "bart"
+DISTILLED_MODEL = "command_classifier.npz"
+
+# Position/yaw are polled in the background so commands do not wait on state RPCs
+TELEMETRY_RATE_HZ = 20
+
+# Stop words are spotted on the raw audio stream and skip ASR, translation and classification
+STOP_WORDS = ("stop", "ruko", "aapu")
+KEYWORD_TEMPLATES = "keyword_templates"
+
+# Only speech of command length reaches ASR; set a wake word (enrolled like the stop words) to require it
+WAKE_WORD = None
+CALIBRATION_SECONDS = 1.0
+
+# Recognition backends in the order they are tried; "local" is an int8 Whisper model that needs no network
+ASR_ORDER = ("google", "local")
+LOCAL_ASR_MODEL = "base"
+
+# With several languages entered at the prompt, each phrase is recognized in all of them at once
+LANGUAGE_DEADLINE = 3.0
+
+# Non-English commands are matched in their own language when the embedding match is confident enough
+MULTILINGUAL_NLU = True
+MULTILINGUAL_THRESHOLD = 0.8
+MULTILINGUAL_MARGIN = 0.05
+
+# NLU models run in a separate process so inference never stalls audio capture or the AirSim RPC threads
+NLU_WORKERS = 1
+NLU_TIMEOUT = 5.0
+
+# Resolved commands are memoized per engine and vocabulary; the file is shared by all three scripts
+RESOLUTION_CACHE = "resolution_cache.json"
+
+# Kinematics, transcripts, actions and stage latencies are appended to a binary session file here
+FLIGHT_LOG_DIR = "flight_logs"
 
-class Timer:
-    def __init__(self):
-        self.start_time = None
-
-    def start(self):
-        self.start_time = time.perf_counter()
-
-    def end(self):
-        if self.start_time is None:
-            raise ValueError("Timer was not started. Call `start()` before `end()`.")
-        elapsed_time = time.perf_counter() - self.start_time
-        self.start_time = None  # Reset timer
-        return elapsed_time
-
-timer = Timer()
-
-# Initialize the classifier and translator
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-labels = [
-    "take off", "land", "up", "down", "forward", "backward",
-    "left", "right", "rotate left", "rotate right", "stop"
-]
+# Speech recognition setup
+recognizer = sr.Recognizer()
 
-translator = Translator()
-source_language = input("Enter language code (e.g., 'hi' for Hindi): ").strip()
 
-# Connect to AirSim
-client = airsim.MultirotorClient()
-client.confirmConnection()
-client.enableApiControl(True)
-client.armDisarm(True)
+def load_zero_shot():
+    """Load the zero-shot model (runs on a background thread)."""
+    if ZERO_SHOT_ENGINE == "distilled":
+        from distilled_classifier import HashedNgramClassifier
+        classifier = HashedNgramClassifier.load(DISTILLED_MODEL)
+        if classifier.labels != labels:
+            raise ValueError(f"{DISTILLED_MODEL} was trained on different labels; rerun distill_zero_shot.py")
+        return classifier
+    from zero_shot_engine import ZeroShotEngine
+    return ZeroShotEngine(labels, model_name="facebook/bart-large-mnli", quantize=QUANTIZE_MODEL)
 
-# Speech recognition setup
-recognizer = sr.Recognizer()
 
-# Global variables
-current_task = None
-stop_event = threading.Event()
+def load_command_index():
+    """Load spaCy and build the keyword-vector index (runs on a background thread)."""
+    import spacy
+    from command_index import CommandVectorIndex
+    nlp = spacy.load('en_core_web_md')
+    return CommandVectorIndex(nlp, command_mappings)
 
 
-def classify_command(command_text):
+def classify_command(command_text, span=None):
     """Classifies the given text into predefined drone commands."""
-    result = classifier(command_text, labels, multi_label=False)
-    command = result["labels"][0]
-    confidence = result["scores"][0]
-    print(f"Command classified: {command}")
+    resolved = resolution_cache.get("cascade", command_text)
+    if resolved is not None:
+        (command, confidence), tier = resolved, "cache"
+    else:
+        try:
+            command, confidence, tier = cascade.classify(command_text)
+        except (TimeoutError, RuntimeError) as e:
+            print(f"Classification failed: {e}")
+            return None
+        resolution_cache.put("cascade", command_text, command, confidence)
+    if span is not None:
+        span.engine = tier  # Per-engine latency for the tier that answered
+    print(f"Command classified: {command} (by {tier} tier)")
     print(f"Confidence: {confidence:.2f}")
-    return command if confidence > 0.2 else None
+    return command
 
 
-def get_voice_command():
-    """Capture voice input and transcribe it."""
-    with sr.Microphone() as source:
-        print("Listening for command...")
-        audio = recognizer.listen(source)
+def load_local_asr():
+    """Load the offline recognizer (runs on a background thread)."""
+    from asr_backends import WhisperBackend
+    return WhisperBackend(LOCAL_ASR_MODEL)
+
+
+def make_asr(local_loader, languages):
+    """Recognizer that falls back through ASR_ORDER, in parallel over ``languages`` if there are several."""
+    backends = {"google": GoogleBackend(recognizer)}
+    try:
+        backends["local"] = local_loader.get()
+    except RuntimeError as e:
+        print(f"{e}; continuing with Google only.")
+    asr = FallbackRecognizer([backends[name] for name in ASR_ORDER if name in backends])
+    if len(languages) > 1:
+        return ParallelLanguageRecognizer(asr, languages, deadline=LANGUAGE_DEADLINE)
+    return asr
+
+
+def load_multilingual_index():
+    """Load the sentence encoder and the command phrase embeddings (runs on a background thread)."""
+    from multilingual_index import MultilingualCommandIndex, load_command_phrases, sentence_encoder
+    phrases, negations = load_command_phrases("command_phrases.json")
+    return MultilingualCommandIndex(sentence_encoder(), phrases, negations, cache_path="command_embeddings.npz")
+
+
+def warm_up_nlu(nlu):
+    """First calls are slow (lazy allocations), so make them before the first command."""
+    nlu.call("zero_shot", "classify", "take off", timeout=60.0)
+    nlu.call("index", "best_match", "take off", timeout=60.0)
+
+
+def start_nlu_server():
+    """Start the NLU worker process and wait until it has loaded its models (runs on a background thread)."""
+    factories = {"index": load_command_index, "zero_shot": load_zero_shot}
+    if MULTILINGUAL_NLU:
+        factories["multilingual"] = load_multilingual_index
+    return NLUServer(factories, workers=NLU_WORKERS, timeout=NLU_TIMEOUT).start().wait_ready()
+
+
+def make_resolution_cache(path):
+    """Resolution cache with the cascade registered against the models, thresholds and vocabularies of its tiers."""
+    if ZERO_SHOT_ENGINE == "distilled":
+        # A retrained model answers differently for the same text
+        zero_shot = f"distilled@{os.path.getmtime(DISTILLED_MODEL) if os.path.exists(DISTILLED_MODEL) else 0:.0f}"
+    else:
+        zero_shot = f"bart-large-mnli@{'int8' if QUANTIZE_MODEL else 'fp32'}"
+    version = (f"{cascade.rule_matcher.matcher_version()}/"
+               f"{cascade.vector_matcher.model_version()}>{cascade.vector_threshold}/"
+               f"{zero_shot}>{cascade.zero_shot_threshold}")
+    cache = ResolutionCache(path)
+    cache.register("cascade", version, command_mappings, DroneCommandProcessor().commands, sorted(cascade.actions))
+    return cache
+
+
+def transcribe_audio(audio, trace):
+    """Transcribe one captured phrase."""
     try:
-        command_text = recognizer.recognize_google(audio, language=source_language)
-        print(f"Transcribed command: {command_text}")
-        return command_text.lower()
+        with trace.span("asr") as span:
+            hypothesis = asr.recognize(audio, language=source_language)
+            span.engine = hypothesis.backend  # Whichever backend answered
+        print(f"Transcribed command: {hypothesis.text} [{hypothesis.language}]")
+        return hypothesis._replace(text=hypothesis.text.lower())
     except sr.UnknownValueError:
         print("Could not understand the audio.")
         return None
     except sr.RequestError:
-        print("Speech recognition service unavailable.")
+        print("No speech recognition backend available.")
         return None
 
 # Command mappings with synonyms
@@ -101,10 +207,17 @@ def get_voice_command():
 
 #     return mapped_commands
 
-def translate_to_english(text):
+def translate_to_english(text, span=None, language=None):
     """Translate recognized text to English."""
+    language = language or source_language
+    if is_english(language):
+        if span is not None:
+            span.engine = "skipped"
+        return text.lower()
     try:
-        translated = translator.translate(text, src=source_language, dest='en')
+        translated = translator.translate(text, src=language, dest='en')
+        if span is not None:
+            span.engine = translated.origin  # phrase table, cache or remote
         print(f"Translated to English: {translated.text}")
         return translated.text.lower()
     except Exception as e:
@@ -112,31 +225,31 @@ def translate_to_english(text):
         return None
 
 
-def execute_command(command):
+def execute_command(command, trace=None):
     """Executes drone commands."""
     try:
         if command == 'take off':
-            execute_command_in_thread(takeoff)
+            dispatcher.submit(takeoff, trace=trace)
         elif command == 'land':
-            execute_command_in_thread(land)
+            dispatcher.submit(land, trace=trace)
         elif command == 'up':
-            execute_command_in_thread(translate_to_position_local, 0, 0, -10)
+            dispatcher.submit(translate_to_position_local, 0, 0, -10, trace=trace)
         elif command == 'down':
-            execute_command_in_thread(translate_to_position_local, 0, 0, 10)
+            dispatcher.submit(translate_to_position_local, 0, 0, 10, trace=trace)
         elif command == 'forward':
-            execute_command_in_thread(translate_to_position_local, 10, 0, 0)
+            dispatcher.submit(translate_to_position_local, 10, 0, 0, trace=trace)
         elif command == 'backward':
-            execute_command_in_thread(translate_to_position_local, -10, 0, 0)
+            dispatcher.submit(translate_to_position_local, -10, 0, 0, trace=trace)
         elif command == 'left':
-            execute_command_in_thread(translate_to_position_local, 0, -10, 0)
+            dispatcher.submit(translate_to_position_local, 0, -10, 0, trace=trace)
         elif command == 'right':
-            execute_command_in_thread(translate_to_position_local, 0, 10, 0)
+            dispatcher.submit(translate_to_position_local, 0, 10, 0, trace=trace)
         elif command == 'rotate left':
-            execute_command_in_thread(a)
+            dispatcher.submit(a, trace=trace)
         elif command == 'rotate right':
-            execute_command_in_thread(d)
+            dispatcher.submit(d, trace=trace)
         elif command == 'stop':
-            stop()
+            dispatcher.submit(stop, trace=trace)
         else:
             print("Unrecognized or unsupported command.")
     except Exception as e:
@@ -145,104 +258,235 @@ def execute_command(command):
 # Function to take off
 def takeoff():
     print("Taking off...")
-    client.takeoffAsync().join()
+    task = client.takeoffAsync()
+    dispatcher.mark("first_motion", engine="takeoff")
+    task.join()
     time.sleep(1)  # Adding a delay after takeoff for stability
 
 # Function to land
 def land():
     print("Landing...")
-    client.landAsync().join()
+    task = client.landAsync()
+    dispatcher.mark("first_motion", engine="land")
+    task.join()
     time.sleep(1)  # Delay before disarming
 
 def translate_to_position_local(dx, dy, dz):
-    current_position = client.getMultirotorState().kinematics_estimated.position
-    yaw = get_yaw()  # Get the drone's current yaw angle
+    current_state = telemetry.latest()  # One cached snapshot instead of two state RPCs
+    yaw = current_state.yaw  # Get the drone's current yaw angle
 
     # Convert local dx, dy to global coordinates based on yaw
     dx_world = dx * math.cos(yaw) - dy * math.sin(yaw)  # Forward/backward
     dy_world = dx * math.sin(yaw) + dy * math.cos(yaw)  # Left/right
 
-    target_position = airsim.Vector3r(current_position.x_val + 5*dx_world, 
-                                      current_position.y_val + 5*dy_world, 
-                                      current_position.z_val + dz)
+    target_position = airsim.Vector3r(current_state.x + 5*dx_world, 
+                                      current_state.y + 5*dy_world, 
+                                      current_state.z + dz)
 
     # Move to the new position with the specified velocity and handle interruption
     task = client.moveToPositionAsync(target_position.x_val, target_position.y_val, target_position.z_val, velocity=1)
-    while not stop_event.is_set():
-        time.sleep(0.1)  # Check for stop_event periodically
-    try:
-        task.cancel()  # Cancel the current task if a new command is issued
-    except Exception as e:
-        pass  # Suppress any exception that occurs during task cancellation
+    dispatcher.mark("first_motion", engine="move")
+    # Wait for the move to finish or for a newer command, whichever comes first
+    result = wait_for_motion(task, dispatcher.cancel_token, cancel_task=cancel_client.cancelLastTask, name="Move")
+    print(result)
 
 def d():
     print("Rotating clockwise...")
     # Rotate clockwise indefinitely at a slow rate (e.g., 10 degrees per second)
     client.rotateByYawRateAsync(10, duration=9999)  # Rotate indefinitely
+    dispatcher.mark("first_motion", engine="rotate")
 
 def a():
     print("Rotating counterclockwise...")
     # Rotate counterclockwise indefinitely at a slow rate (e.g., -10 degrees per second)
     client.rotateByYawRateAsync(-10, duration=9999)  # Rotate indefinitely
+    dispatcher.mark("first_motion", engine="rotate")
 
 # Function to convert quaternion to yaw (drone's orientation)
 def get_yaw():
-    orientation = client.getMultirotorState().kinematics_estimated.orientation
-    _, _, yaw = airsim.to_eularian_angles(orientation)  # Get yaw (rotation around the z-axis)
-    return yaw
+    return telemetry.latest().yaw  # Yaw (rotation around the z-axis) from the cached state
 
 # Function to handle rotation
 def rotate(dyaw):
-    current_orientation = client.getMultirotorState().kinematics_estimated.orientation
-    current_yaw = airsim.to_eularian_angles(current_orientation)[2]  # Get the yaw angle in degrees
+    current_yaw = get_yaw()
     target_yaw = current_yaw + dyaw
     task = client.rotateToYawAsync(target_yaw)
-    while not stop_event.is_set():
-        time.sleep(0.1)
-    try:
-        task.cancel()  # Cancel rotation if interrupted
-    except Exception as e:
-        pass  # Suppress any exception that occurs during task cancellation
+    dispatcher.mark("first_motion", engine="rotate")
+    result = wait_for_motion(task, dispatcher.cancel_token, cancel_task=cancel_client.cancelLastTask, name="Rotation")
+    print(result)
 
 
 def stop():
     """Stop all drone motion."""
     print("Stopping drone...")
-    client.moveByVelocityAsync(0, 0, 0, duration=1).join()
+    task = client.moveByVelocityAsync(0, 0, 0, duration=1)
+    dispatcher.mark("first_motion", engine="stop")
+    task.join()
+
+
+def match_without_translation(text):
+    """Action for a confident native-language match, or None to translate and classify as usual."""
+    if multilingual_index is None:
+        return None
+    try:
+        label, score, margin = multilingual_index.match(text)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Multilingual match failed ({e}); translating instead.")
+        return None
+    if label is None or score < MULTILINGUAL_THRESHOLD or margin < MULTILINGUAL_MARGIN:
+        return None
+    action = local_action(label, labels)
+    if action:
+        print(f"Matched '{text}' to '{action}' without translation (similarity {score:.2f})")
+    return action
+
+
+def process_audio(audio, trace):
+    """Recognize, translate, classify and execute one captured phrase."""
+    hypothesis = transcribe_audio(audio, trace)
+    if hypothesis:
+        recorder.transcript(hypothesis.text, hypothesis.language, hypothesis.confidence, trace.trace_id)
+        if multilingual_index is not None and not is_english(hypothesis.language):
+            with trace.span("classify", engine="multilingual"):
+                action = match_without_translation(hypothesis.text)
+            if action:
+                recorder.action(action, "multilingual", trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(action, trace=trace)
+                print("Time: ", trace.elapsed())
+                return
+        with trace.span("translate") as span:
+            translated_text = translate_to_english(hypothesis.text, span, hypothesis.language)
+
+        if translated_text:
+            with trace.span("classify") as span:
+                command = classify_command(translated_text, span)
+            #command = map_to_drone_command(translated_text)
+            if command:
+                print(f"Command: {command}")
+                recorder.action(command, span.engine, trace=trace.trace_id)
+                with trace.span("dispatch"):
+                    execute_command(command, trace=trace)
+            else:
+                print("Command not recognized.")
+            print("Time: ", trace.elapsed())
+
+
+def on_stop_word(detection):
+    """Stop immediately when the keyword spotter hears a stop word, ahead of ASR."""
+    print(f"Heard '{detection.keyword}' (score {detection.score:.2f}), stopping.")
+    recorder.action("stop", "keyword", detection.score)
+    dispatcher.submit(stop)
+
+
+def make_speech_gate(sample_rate):
+    """Voice-activity gate in front of ASR, with the wake word when one is configured."""
+    wake_spotter = None
+    if WAKE_WORD:
+        wake_spotter = KeywordSpotter(sample_rate).load_directory(KEYWORD_TEMPLATES, keywords=[WAKE_WORD])
+        if not wake_spotter.templates:
+            print(f"No recordings of '{WAKE_WORD}' in {KEYWORD_TEMPLATES}/; wake word disabled.")
+            wake_spotter = None
+    return SpeechGate(wake_spotter=wake_spotter)
+
+
+def start_keyword_listener():
+    """Spot stop words on a second microphone stream; None if no templates are enrolled."""
+    microphone = sr.Microphone()
+    spotter = KeywordSpotter(microphone.SAMPLE_RATE).load_directory(KEYWORD_TEMPLATES, keywords=STOP_WORDS)
+    if not spotter.templates:
+        print(f"No stop-word recordings in {KEYWORD_TEMPLATES}/ (see enroll_keywords.py); fast stop disabled.")
+        return None
+    return KeywordListener(spotter, microphone, on_stop_word).start()
 
 
 def control_drone():
     """Main control loop for voice-controlled drone."""
     print("Voice-controlled drone ready.")
-
-    while True:
-        command_text = get_voice_command()
-        start_time=timer.start()
-        if command_text:
-            translated_text = translate_to_english(command_text)
-
-            if translated_text:
-                command = classify_command(translated_text)
-                #command = map_to_drone_command(translated_text)
-                if command:
-                    print(f"Command: {command}")
-                    execute_command(command)
-                else:
-                    print("Command not recognized.")
-                end_time=timer.end()
-                print("Time: ", (end_time))
-        time.sleep(0.1)
-
-# Function to handle commands in separate threads
-def execute_command_in_thread(function, *args):
-    global current_task
-    stop_event.set()
-    if current_task:
-        current_task.join()
-    stop_event.clear()
-    current_task = threading.Thread(target=function, args=args)
-    current_task.start()
+    # The microphone keeps listening on its own thread while commands are processed
+    microphone = sr.Microphone()
+    pipeline = VoicePipeline(recognizer, microphone, process_audio, tracer=tracer,
+                             gate=make_speech_gate(microphone.SAMPLE_RATE), calibrate=CALIBRATION_SECONDS)
+    pipeline.start()
+    keywords = start_keyword_listener()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        pipeline.stop()
+        if keywords is not None:
+            keywords.stop()
+        dispatcher.close()
+        telemetry.stop()
+        pipeline.report()
+        asr.report()
+        if keywords is not None:
+            keywords.report()
+        dispatcher.report()
+        telemetry.report()
+        recorder.close()
+        recorder.report()
+        translator.save()
+        translator.report()
+        resolution_cache.save()
+        resolution_cache.report()
+        nlu.report()
+        nlu.close()
 
 
 if __name__ == "__main__":
-    control_drone()
+    # The models load in the NLU worker process and the offline recognizer on a thread
+    # while we ask for the language and connect to AirSim
+    nlu_loader = BackgroundLoader("NLU server", start_nlu_server, warm_up=warm_up_nlu, startup=startup)
+    asr_loader = BackgroundLoader("local ASR", load_local_asr,
+                                  warm_up=lambda backend: backend.warm_up(), startup=startup)
+
+    # Per-stage latency histograms; every span is also appended to drone_latency.jsonl
+    recorder = FlightRecorder(FLIGHT_LOG_DIR)
+    tracer = StageTracer(log_path="drone_latency.jsonl", recorder=recorder)
+
+    # Repeated phrases are served from the phrase tables or the on-disk cache
+    translator = CachingTranslator(Translator(), cache_path="translation_cache.json",
+                                   phrase_tables=load_phrase_tables("phrase_tables.json"))
+    with startup.phase("language prompt"):
+        source_language = input("Enter language code (e.g., 'hi' for Hindi; several like 'hi,en' to detect per phrase): ").strip()
+    languages = [code.strip() for code in source_language.split(",") if code.strip()] or ["en"]
+    source_language = languages[0]
+
+    with startup.phase("connect and arm"):
+        # Connect to AirSim
+        client = airsim.MultirotorClient()
+        client.confirmConnection()
+        client.enableApiControl(True)
+        client.armDisarm(True)
+
+        # Commands run one at a time on a long-lived worker; stop/land preempt immediately.
+        # Cancellation uses its own connection because the worker may be blocked in join().
+        cancel_client = airsim.MultirotorClient()
+        dispatcher = CommandDispatcher(on_preempt=cancel_client.cancelLastTask).start()
+
+        telemetry = TelemetryCache(airsim.MultirotorClient(), rate_hz=TELEMETRY_RATE_HZ, recorder=recorder).start()
+
+    with startup.phase("wait for models"):
+        asr = make_asr(asr_loader, languages)
+        nlu = nlu_loader.get()
+        multilingual_index = nlu.engine("multilingual", required=False) if MULTILINGUAL_NLU else None
+        # Cheaper tiers answer first; the zero-shot model only sees ambiguous commands.
+        # The rule tier runs here, the model tiers in the NLU worker.
+        cascade = CascadeClassifier(
+            DroneCommandProcessor(),
+            vector_matcher=nlu.engine("index"),
+            zero_shot=nlu.engine("zero_shot"),
+        )
+        # Keyed on the tier models and thresholds, so it is opened once the NLU worker has loaded them
+        resolution_cache = make_resolution_cache(RESOLUTION_CACHE)
+    startup.report()
+
+    try:
+        control_drone()
+    except KeyboardInterrupt:
+        print("\nClassifier tier usage:")
+        cascade.report()
+        print("\nStage latency summary:")
+        tracer.report()
+        tracer.close()
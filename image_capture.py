@@ -0,0 +1,169 @@
+"""Batched AirSim image capture with disk writes on a background thread.
+
+One ``simGetImages`` call returns every requested camera and image type at
+once, so a scan costs one RPC round trip however many views it records. The
+responses are handed to a writer thread and the command returns as soon as
+the images are in memory.
+"""
+import collections
+import datetime
+import itertools
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from stage_trace import RollingHistogram
+
+# airsim.ImageType values
+IMAGE_TYPE_NAMES = {
+    0: "scene", 1: "depth_planar", 2: "depth_perspective", 3: "depth_vis",
+    4: "disparity", 5: "segmentation", 6: "normals", 7: "infrared",
+}
+
+Capture = collections.namedtuple("Capture", ["label", "responses", "paths", "seconds"])
+Capture.__doc__ = """One ``simGetImages`` batch: the responses, the files they will be written to and the RPC time."""
+
+
+def image_array(response):
+    """Pixels of an uncompressed response: float32 ``(h, w)`` for depth, uint8 ``(h, w, channels)`` otherwise."""
+    if response.pixels_as_float:
+        return np.asarray(response.image_data_float, dtype=np.float32).reshape(response.height, response.width)
+    data = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
+    return data.reshape(response.height, response.width, -1)
+
+
+class ImageCapture:
+    """Captures request batches on ``client`` and writes them under ``root``.
+
+    Give it its own ``MultirotorClient``, like ``TelemetryCache``: captures
+    then never wait behind a motion RPC on the command client. File names are
+    ``<time>_<seq>_<label>_<camera>_<type>.<ext>``; the sequence number makes
+    them unique within a run and files are opened in exclusive mode, so an
+    existing file is never overwritten. Compressed images are saved as PNG,
+    uncompressed ones (float depth, raw pixels) as ``.npy`` arrays.
+    """
+
+    def __init__(self, client, root="captures"):
+        self.client = client
+        self.root = root
+        self.captures = 0
+        self.images = 0
+        self.failures = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.write_errors = 0
+        self.max_queue_depth = 0
+        self.rpc_seconds = 0.0
+        self.rpc_time = RollingHistogram()
+        self.write_time = RollingHistogram()
+        self.started = time.perf_counter()
+        self._sequence = itertools.count(1)
+        self._rpc_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="image-writer", daemon=True)
+        self._writer.start()
+
+    def capture(self, requests, label="capture", directory=""):
+        """Fetch every request in one RPC and queue the images for writing under ``root/directory``."""
+        start = time.perf_counter()
+        with self._rpc_lock:
+            responses = self.client.simGetImages(requests)
+        seconds = time.perf_counter() - start
+        self.rpc_time.add(seconds)
+        self.rpc_seconds += seconds
+        responses = [r for r in responses if r.width and r.height]
+        if not responses:
+            self.failures += 1
+            return Capture(label, [], [], seconds)
+        self.captures += 1
+        self.images += len(responses)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        sequence = next(self._sequence)
+        paths = [self._path(stamp, sequence, label, response, directory) for response in responses]
+        for response, path in zip(responses, paths):
+            self._queue.put((response, path))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return Capture(label, responses, paths, seconds)
+
+    def _path(self, stamp, sequence, label, response, directory=""):
+        kind = IMAGE_TYPE_NAMES.get(response.image_type, f"type{response.image_type}")
+        extension = "png" if response.compress and not response.pixels_as_float else "npy"
+        camera = str(response.camera_name).replace(os.sep, "_") or "camera"
+        return os.path.join(self.root, directory, f"{stamp}_{sequence:05d}_{label}_{camera}_{kind}.{extension}")
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            response, path = item
+            start = time.perf_counter()
+            try:
+                self._write(response, path)
+            except (OSError, ValueError) as e:
+                self.write_errors += 1
+                print(f"Could not save {path}: {e}")
+            else:
+                self.written += 1
+                self.write_time.add(time.perf_counter() - start)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, response, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        base, extension = os.path.splitext(path)
+        for attempt in itertools.count():
+            candidate = path if attempt == 0 else f"{base}-{attempt}{extension}"
+            try:
+                f = open(candidate, "xb")
+            except FileExistsError:
+                continue
+            with f:
+                if extension == ".png":
+                    f.write(response.image_data_uint8)
+                else:
+                    np.save(f, image_array(response))
+                self.bytes_written += f.tell()
+            return candidate
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every queued image is on disk."""
+        self._queue.join()
+
+    def close(self, timeout=10.0):
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "captures": self.captures,
+            "images": self.images,
+            "failures": self.failures,
+            "captures_per_s": self.captures / elapsed if elapsed else 0.0,
+            "max_captures_per_s": self.captures / self.rpc_seconds if self.rpc_seconds else 0.0,
+            "written": self.written,
+            "bytes_written": self.bytes_written,
+            "write_errors": self.write_errors,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "rpc": self.rpc_time.summary(),
+            "write": self.write_time.summary(),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Image capture: {stats['captures']} captures ({stats['images']} images, "
+              f"{stats['captures_per_s']:.2f}/s over the session, {stats['max_captures_per_s']:.1f}/s RPC-bound), "
+              f"{stats['failures']} failed; "
+              f"RPC p50 {stats['rpc']['p50'] * 1000:.0f} ms, p95 {stats['rpc']['p95'] * 1000:.0f} ms")
+        print(f"Image writer: {stats['written']} files, {stats['bytes_written'] / 2 ** 20:.1f} MB, "
+              f"{stats['write_errors']} errors; queue depth {stats['queue_depth']} (max {stats['max_queue_depth']}), "
+              f"write p50 {stats['write']['p50'] * 1000:.1f} ms under {self.root}")
@@ -0,0 +1,275 @@
+"""Always-on keyword spotting on the raw microphone stream.
+
+Stop words ("stop", "ruko", "aapu", ...) are matched locally against a few
+enrolled recordings, so a spoken stop reaches the drone without waiting for
+end-of-phrase detection, ASR, translation and classification. Features are
+cepstra of a 20-band log-mel spectrum (25 ms frames every 10 ms); matching is
+subsequence DTW, updated once per frame for all templates at once.
+"""
+import collections
+import glob
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from stage_trace import RollingHistogram
+
+Detection = collections.namedtuple("Detection", ["keyword", "score", "stream_time", "detected_at"])
+Detection.__doc__ = """``stream_time`` is seconds of audio consumed when the keyword was spotted."""
+
+
+def read_wav(path):
+    """Mono float32 samples in [-1, 1] and the sample rate of a 16-bit PCM WAV file."""
+    with wave.open(path, "rb") as f:
+        sample_rate = f.getframerate()
+        channels = f.getnchannels()
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    samples = samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples
+    return samples.astype(np.float32) / 32768.0, sample_rate
+
+
+def pcm16_to_float(data):
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+
+def mel_filterbank(n_mels, n_fft, sample_rate, fmin=60.0, fmax=4000.0):
+    fmax = min(fmax, sample_rate / 2.0)
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    bank = np.zeros((n_mels, len(bins)), dtype=np.float32)
+    for i in range(n_mels):
+        low, center, high = edges[i:i + 3]
+        rising = (bins - low) / (center - low)
+        falling = (high - bins) / (high - center)
+        bank[i] = np.maximum(0.0, np.minimum(rising, falling))
+    return bank
+
+
+class FeatureExtractor:
+    """Incremental log-mel cepstra: feed any number of samples, get every completed frame.
+
+    c0 is dropped and each vector is scaled to unit length, so matching uses
+    cosine distance and ignores the overall level. Energy (dBFS) is returned
+    separately for silence gating. Bands stop at 4 kHz so templates enrolled
+    at one sample rate still match a stream at another.
+    """
+
+    def __init__(self, sample_rate, frame_ms=25, hop_ms=10, n_mels=20, n_ceps=12):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.frame - 1).bit_length()
+        self.window = np.hamming(self.frame).astype(np.float32)
+        self.mel = mel_filterbank(n_mels, self.n_fft, sample_rate)
+        k = np.arange(1, n_ceps + 1)[:, None]
+        n = np.arange(n_mels)[None, :]
+        self.dct = np.cos(np.pi * k * (n + 0.5) / n_mels).astype(np.float32)
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    def reset(self):
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        """``(features[n, n_ceps], energy_db[n])`` for the frames completed by ``samples``."""
+        buffer = np.concatenate((self._buffer, np.asarray(samples, dtype=np.float32)))
+        if len(buffer) < self.frame:
+            self._buffer = buffer
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32), np.zeros(0, dtype=np.float32)
+        count = 1 + (len(buffer) - self.frame) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame)[::self.hop][:count]
+        self._buffer = buffer[count * self.hop:]
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(frames * self.window, self.n_fft)) ** 2
+        cepstra = np.log(power @ self.mel.T + 1e-10) @ self.dct.T
+        cepstra /= np.linalg.norm(cepstra, axis=1, keepdims=True) + 1e-8
+        return cepstra.astype(np.float32), energy_db.astype(np.float32)
+
+
+def trim_silence(features, energy_db, floor_db=25.0):
+    """Keep the frames between the first and last one within ``floor_db`` of the loudest."""
+    voiced = np.flatnonzero(energy_db > energy_db.max() - floor_db)
+    if len(voiced) == 0:
+        return features
+    return features[voiced[0]:voiced[-1] + 1]
+
+
+class KeywordSpotter:
+    """Streaming template matcher for a small set of keywords.
+
+    Each template is one enrolled utterance. Every incoming frame extends the
+    DTW alignments of all templates: a match may start at any frame, and each
+    frame advances a template by 0, 1 or 2 frames, covering speech at half to
+    several times the enrolled speed. When a full template is reached with a
+    mean cosine distance below ``threshold`` (and the audio is not silence),
+    the keyword is reported, then ignored for ``refractory`` seconds.
+    """
+
+    def __init__(self, sample_rate, threshold=0.25, refractory=1.0, min_energy_db=-45.0):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.refractory = refractory
+        self.min_energy_db = min_energy_db
+        self.extractor = FeatureExtractor(sample_rate)
+        self.templates = []
+        self.frames = 0
+        self._compiled = None
+        self._quiet_until = 0
+
+    @property
+    def keywords(self):
+        return sorted({keyword for keyword, _ in self.templates})
+
+    def frame_time(self, frames=None):
+        """End of the ``frames``-th frame (default: the latest), in seconds of stream audio."""
+        frames = self.frames if frames is None else frames
+        return ((frames - 1) * self.extractor.hop + self.extractor.frame) / self.sample_rate
+
+    def enroll(self, keyword, samples, sample_rate=None):
+        """Add one recording of ``keyword`` (float samples, at ``sample_rate`` if it differs)."""
+        extractor = FeatureExtractor(sample_rate or self.sample_rate)
+        features, energy_db = extractor.process(samples)
+        if len(features) < 5:
+            raise ValueError(f"Recording of '{keyword}' is too short")
+        self.templates.append((keyword, trim_silence(features, energy_db)))
+        self._compiled = None
+
+    def load_directory(self, path, keywords=None):
+        """Enroll every ``<keyword>_<n>.wav`` in ``path``, optionally only the given keywords."""
+        wanted = {k.lower() for k in keywords} if keywords else None
+        for wav_path in sorted(glob.glob(os.path.join(path, "*.wav"))):
+            keyword = os.path.basename(wav_path).rsplit(".", 1)[0].split("_")[0].lower()
+            if wanted is None or keyword in wanted:
+                samples, sample_rate = read_wav(wav_path)
+                self.enroll(keyword, samples, sample_rate)
+        return self
+
+    def _compile(self):
+        lengths = np.array([len(t) for _, t in self.templates])
+        stacked = np.zeros((len(self.templates), lengths.max(), self.templates[0][1].shape[1]), dtype=np.float32)
+        for i, (_, template) in enumerate(self.templates):
+            stacked[i, :len(template)] = template
+        self._compiled = (stacked, lengths, np.arange(len(lengths)), [k for k, _ in self.templates])
+        self.reset()
+
+    def reset(self):
+        """Forget partial matches (after a detection, or between recordings)."""
+        if self._compiled is not None:
+            shape = self._compiled[0].shape[:2]
+            self._cost = np.full(shape, np.inf, dtype=np.float32)
+            self._steps = np.zeros(shape, dtype=np.int32)
+        self._energy = collections.deque(maxlen=max((len(t) for _, t in self.templates), default=1) * 2)
+
+    def restart(self):
+        """Start a new stream: clear buffered audio, partial matches and the frame clock."""
+        self.extractor.reset()
+        self.frames = 0
+        self._quiet_until = 0
+        self.reset()
+
+    def feed(self, samples):
+        """Process a chunk of float samples; returns the ``Detection``s it completed."""
+        if not self.templates:
+            return []
+        if self._compiled is None:
+            self._compile()
+        features, energy_db = self.extractor.process(samples)
+        detections = []
+        for frame, energy in zip(features, energy_db):
+            detection = self._step(frame, energy)
+            if detection is not None:
+                detections.append(detection)
+        return detections
+
+    def _step(self, frame, energy_db):
+        templates, lengths, rows, names = self._compiled
+        self.frames += 1
+        self._energy.append(energy_db)
+        local = 1.0 - templates @ frame
+
+        cost, steps = self._cost, self._steps
+        advance1 = np.empty_like(cost)
+        advance1[:, 0] = 0.0  # A match may begin at any frame
+        advance1[:, 1:] = cost[:, :-1]
+        advance2 = np.full_like(cost, np.inf)
+        advance2[:, 2:] = cost[:, :-2]
+        candidates = np.stack((cost, advance1, advance2))
+        choice = candidates.argmin(axis=0)
+        previous_steps = np.stack((steps, np.concatenate((np.zeros_like(steps[:, :1]), steps[:, :-1]), axis=1),
+                                   np.concatenate((np.zeros_like(steps[:, :2]), steps[:, :-2]), axis=1)))
+        self._cost = np.take_along_axis(candidates, choice[None], axis=0)[0] + local
+        self._steps = np.take_along_axis(previous_steps, choice[None], axis=0)[0] + 1
+
+        if self.frames < self._quiet_until or max(self._energy) < self.min_energy_db:
+            return None
+        end = lengths - 1
+        scores = self._cost[rows, end] / self._steps[rows, end]
+        best = int(np.argmin(scores))
+        if scores[best] >= self.threshold:
+            return None
+        self._quiet_until = self.frames + int(self.refractory * self.sample_rate / self.extractor.hop)
+        self.reset()
+        return Detection(names[best], float(scores[best]), self.frame_time(), time.perf_counter())
+
+
+class KeywordListener:
+    """Feeds a spotter from its own microphone stream and calls ``on_detect(detection)``.
+
+    Use a second ``sr.Microphone()``: ``listen_in_background`` owns the first
+    one, and the OS mixes both streams from the same device.
+    """
+
+    def __init__(self, spotter, source, on_detect):
+        self.spotter = spotter
+        self.source = source
+        self.on_detect = on_detect
+        self.detections = collections.Counter()
+        self.chunk_time = RollingHistogram()
+        self.audio_seconds = 0.0
+        self.busy_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="keyword-listener", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        with self.source as source:
+            while not self._stop.is_set():
+                data = source.stream.read(source.CHUNK)
+                started = time.perf_counter()
+                for detection in self.spotter.feed(pcm16_to_float(data)):
+                    self.detections[detection.keyword] += 1
+                    try:
+                        self.on_detect(detection)
+                    except Exception as e:
+                        print(f"Error handling keyword '{detection.keyword}': {e}")
+                spent = time.perf_counter() - started
+                self.chunk_time.add(spent)
+                self.busy_seconds += spent
+                self.audio_seconds += source.CHUNK / source.SAMPLE_RATE
+
+    def report(self):
+        chunk = self.chunk_time.summary()
+        load = self.busy_seconds / self.audio_seconds if self.audio_seconds else 0.0
+        found = ", ".join(f"{k} {n}" for k, n in sorted(self.detections.items())) or "none"
+        print(f"Keyword spotting: {self.audio_seconds:.0f} s of audio, detections: {found}; "
+              f"{load:.1%} of one core, chunk p95 {chunk['p95'] * 1000:.2f} ms")
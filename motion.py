@@ -0,0 +1,64 @@
+"""Event-driven waiting for AirSim motion tasks."""
+import threading
+import time
+
+
+class MotionResult:
+    """How a motion ended: ``completed`` is False when it was cancelled by a newer command or failed (``error``)."""
+
+    def __init__(self, name, completed, elapsed, error=None):
+        self.name = name
+        self.completed = completed
+        self.elapsed = elapsed
+        self.error = error
+
+    def __str__(self):
+        if self.error is not None:
+            return f"{self.name} failed after {self.elapsed:.2f} s: {self.error}"
+        outcome = "finished" if self.completed else "cancelled"
+        return f"{self.name} {outcome} after {self.elapsed:.2f} s"
+
+
+def wait_for_motion(task, cancel_token, cancel_task=None, settle_timeout=2.0, name="motion"):
+    """Block until ``task`` completes or ``cancel_token`` is cancelled, without polling.
+
+    ``task`` is the future returned by an AirSim ``*Async`` call; a helper
+    thread sits in its ``join()`` and exits as soon as AirSim answers. On
+    cancellation ``cancel_task`` (e.g. ``cancelLastTask`` on a second client) is
+    called straight from the cancelling thread, then we wait up to
+    ``settle_timeout`` for the future to resolve so the RPC connection is idle
+    again before the next command uses it. With no ``cancel_token`` it only
+    waits for the task, still reporting a failed RPC as ``error``.
+    """
+    start = time.perf_counter()
+    wake = threading.Event()
+    state = {"done": False, "cancelled": False, "error": None}
+
+    def join_task():
+        try:
+            task.join()
+        except Exception as e:
+            state["error"] = e
+        state["done"] = True
+        wake.set()
+
+    def on_cancel():
+        if not state["done"]:
+            state["cancelled"] = True  # Cancelling resolves the future too; it still did not finish
+        if cancel_task is not None and state["cancelled"]:
+            try:
+                cancel_task()
+            except Exception as e:
+                print(f"Error cancelling {name}: {e}")
+        wake.set()
+
+    joiner = threading.Thread(target=join_task, name=f"{name}-join", daemon=True)
+    joiner.start()
+    if cancel_token is not None:
+        cancel_token.add_callback(on_cancel)
+
+    wake.wait()
+    completed = state["done"] and not state["cancelled"] and state["error"] is None
+    if not completed:
+        joiner.join(settle_timeout)
+    return MotionResult(name, completed, time.perf_counter() - start, state["error"])
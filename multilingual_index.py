@@ -0,0 +1,119 @@
+"""Translation-free command matching with a multilingual sentence encoder.
+
+Command phrases in every supported language (English synonyms from
+``command_vocab`` plus native phrases from ``command_phrases.json``) are
+embedded once and kept on disk. A transcript in any of those languages is
+embedded locally and matched against all of them, so a confident match needs
+no translation round trip. Labels are the zero-shot label names; use
+``command_vocab.local_action`` to get a script's own action name.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from atomic_file import atomic_path
+from command_vocab import canonical_action, command_mappings
+from phrase_matcher import tokenize
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def load_command_phrases(path):
+    """``({label: [(language, phrase)]}, {negation tokens})`` from the JSON file plus the English vocabulary."""
+    phrases = {}
+    for action, synonyms in command_mappings.items():
+        if action == "dont":
+            continue
+        phrases.setdefault(canonical_action(action), []).extend(("en", s) for s in synonyms)
+    negations = set(command_mappings["dont"])
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for label, by_language in data.get("phrases", {}).items():
+            for language, texts in by_language.items():
+                phrases.setdefault(label, []).extend((language, t) for t in texts)
+        for words in data.get("negations", {}).values():
+            negations.update(words)
+    return phrases, negations
+
+
+def sentence_encoder(model_name=DEFAULT_MODEL):
+    """``encode(texts) -> unit-length float32 rows`` backed by sentence-transformers."""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(texts):
+        return model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                            convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+    return encode
+
+
+class MultilingualCommandIndex:
+    """Phrase embeddings for every command label, cached in ``cache_path`` (.npz).
+
+    The cache is keyed by a fingerprint of the model name and the phrase set,
+    so editing the phrases or switching models re-embeds them on the next
+    start. Utterances containing a negation word ("don't", "mat", "vaddu")
+    never match: "don't go forward" is close to "go forward" in embedding
+    space and must take the slow path.
+    """
+
+    def __init__(self, encode, phrases, negations=(), model_name=DEFAULT_MODEL, cache_path=None):
+        self.encode = encode
+        self.negations = {tuple(tokenize(n)) for n in negations if tokenize(n)}
+        self.entries = [(label, language, text) for label, items in phrases.items() for language, text in items]
+        self.labels = np.array([label for label, _, _ in self.entries])
+        self.fingerprint = self._fingerprint(model_name)
+        self.cache_path = cache_path
+        self.matrix = self._load() if cache_path else None
+        if self.matrix is None:
+            self.matrix = encode([text for _, _, text in self.entries])
+            self._save()
+
+    def _fingerprint(self, model_name):
+        digest = hashlib.sha1(model_name.encode("utf-8"))
+        for entry in self.entries:
+            digest.update("\x1f".join(entry).encode("utf-8") + b"\x1e")
+        return digest.hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            with np.load(self.cache_path) as data:
+                if str(data["fingerprint"]) != self.fingerprint:
+                    print("Command phrases or encoder changed; re-embedding the index.")
+                    return None
+                return data["matrix"]
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable embedding index: {e}")
+            return None
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        with atomic_path(self.cache_path, ".tmp.npz") as tmp_path:
+            np.savez(tmp_path, matrix=self.matrix, fingerprint=np.array(self.fingerprint))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def negated(self, text):
+        tokens = tokenize(text)
+        return any(tuple(tokens[i:i + len(n)]) == n for n in self.negations for i in range(len(tokens)))
+
+    def match(self, text):
+        """``(label, score, margin)`` of the closest phrase; ``margin`` is the lead over the best other label.
+
+        Returns ``(None, 0.0, 0.0)`` for negated or empty utterances.
+        """
+        if not text.strip() or self.negated(text):
+            return None, 0.0, 0.0
+        scores = self.matrix @ self.encode([text])[0]
+        best = int(np.argmax(scores))
+        label = str(self.labels[best])
+        others = scores[self.labels != label]
+        margin = float(scores[best] - others.max()) if len(others) else float(scores[best])
+        return label, float(scores[best]), margin
@@ -0,0 +1,239 @@
+"""NLU engines hosted in separate long-lived worker processes.
+
+spaCy parsing and transformer inference hold the GIL for most of their run
+time, so in the control process they stall audio capture and the AirSim RPC
+threads. ``NLUServer`` loads the engines once in worker processes and answers
+method calls over a pipe; ``RemoteEngine`` makes a hosted engine look like
+the local object, so call sites do not change.
+
+Factories must be picklable (module-level functions): workers are started
+with the "spawn" method, which is safe with the threads the control scripts
+run, and import the factory's module afresh.
+"""
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+
+from stage_trace import RollingHistogram
+
+
+def _serve(factories, conn):
+    """Worker process: load every engine, report load times, then answer requests until told to stop."""
+    engines = {}
+    loaded = {}
+    for name, factory in factories.items():
+        start = time.perf_counter()
+        try:
+            engines[name] = factory()
+            loaded[name] = time.perf_counter() - start
+        except Exception as e:
+            loaded[name] = f"{type(e).__name__}: {e}"
+    conn.send(loaded)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        request_id, name, method, args, kwargs = request
+        start = time.perf_counter()
+        try:
+            ok, value = True, getattr(engines[name], method)(*args, **kwargs)
+        except Exception as e:
+            ok, value = False, f"{type(e).__name__}: {e}"
+        conn.send((request_id, ok, value, time.perf_counter() - start))
+
+
+class Worker:
+    def __init__(self, context, factories):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(factories, child_conn),
+                                       name="nlu-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.loaded = None
+
+    def wait_ready(self, timeout=None):
+        if not self.conn.poll(timeout):
+            raise TimeoutError("NLU worker is still loading")
+        self.loaded = self.conn.recv()
+        return self
+
+    def stop(self, timeout=2.0):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class RemoteEngine:
+    """Stand-in for an engine hosted by an ``NLUServer``: ``engine.method(...)`` becomes a server call."""
+
+    def __init__(self, server, name):
+        self.server = server
+        self.name = name
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            return self.server.call(self.name, method, *args, **kwargs)
+        return call
+
+
+class NLUServer:
+    """A pool of ``workers`` processes, each hosting the engines built by ``factories`` (``{name: callable}``).
+
+    ``call`` takes an idle worker, sends it the request and waits at most
+    ``timeout`` seconds in total (waiting for a free worker included),
+    raising ``TimeoutError`` otherwise. A worker that timed out is given
+    ``restart_after`` seconds to finish in the background before it is
+    replaced; engine exceptions and worker crashes raise ``RuntimeError``.
+
+    Time is reported in three parts: queue wait (for an idle worker),
+    IPC (the round trip minus inference) and inference inside the worker.
+    """
+
+    def __init__(self, factories, workers=1, timeout=2.0, restart_after=30.0):
+        self.factories = dict(factories)
+        self.workers = workers
+        self.timeout = timeout
+        self.restart_after = restart_after
+        self.context = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+        self.loaded = {}
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.restarts = 0
+        self.queue_wait = RollingHistogram()
+        self.ipc = RollingHistogram()
+        self.inference = RollingHistogram()
+        self._ids = itertools.count()
+        self._pool = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        self._pool = [Worker(self.context, self.factories) for _ in range(self.workers)]
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has loaded its engines."""
+        for worker in self._pool:
+            worker.wait_ready(timeout)
+            self.idle.put(worker)
+        self.loaded = self._pool[0].loaded if self._pool else {}
+        return self
+
+    def engine(self, name, required=True):
+        """``RemoteEngine`` for ``name``; for an engine that failed to load, raise or (not ``required``) return None."""
+        status = self.loaded.get(name, "not hosted")
+        if isinstance(status, str):
+            message = f"Failed to load {name} in the NLU worker: {status}"
+            if required:
+                raise RuntimeError(message)
+            print(f"{message}; continuing without it.")
+            return None
+        return RemoteEngine(self, name)
+
+    def call(self, name, method, *args, timeout=None, **kwargs):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.calls += 1
+                self.timeouts += 1
+            raise TimeoutError(f"no NLU worker free within {timeout:.1f} s") from None
+        acquired = time.perf_counter()
+        request_id = next(self._ids)
+        try:
+            worker.conn.send((request_id, name, method, args, kwargs))
+            answered = worker.conn.poll(max(0.0, started + timeout - time.perf_counter()))
+            if answered:
+                _, ok, value, inference = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self.calls += 1
+                self.errors += 1
+            threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+            raise RuntimeError(f"NLU worker died: {e}") from e
+        if not answered:
+            with self._lock:
+                self.calls += 1
+                self.timeouts += 1
+            threading.Thread(target=self._recover, args=(worker, request_id), daemon=True).start()
+            raise TimeoutError(f"{name}.{method} took longer than {timeout:.1f} s")
+        finished = time.perf_counter()
+        self.idle.put(worker)
+        with self._lock:
+            self.calls += 1
+            self.queue_wait.add(acquired - started)
+            self.ipc.add(max(0.0, finished - acquired - inference))
+            self.inference.add(inference)
+            if not ok:
+                self.errors += 1
+        if not ok:
+            raise RuntimeError(f"{name}.{method} failed in the NLU worker: {value}")
+        return value
+
+    def _recover(self, worker, request_id):
+        """Put a worker that timed out back in the pool once it answers, or replace it."""
+        deadline = time.perf_counter() + self.restart_after
+        try:
+            while worker.conn.poll(max(0.0, deadline - time.perf_counter())):
+                if worker.conn.recv()[0] == request_id:
+                    self.idle.put(worker)
+                    return
+        except (EOFError, OSError):
+            pass
+        self._replace(worker)
+
+    def _replace(self, worker):
+        worker.stop(timeout=0.5)
+        if self._closed:
+            return
+        replacement = Worker(self.context, self.factories)
+        with self._lock:
+            self._pool = [replacement if w is worker else w for w in self._pool]
+            self.restarts += 1
+        try:
+            self.idle.put(replacement.wait_ready())
+        except (EOFError, OSError) as e:
+            print(f"Could not restart the NLU worker: {e}")
+
+    def close(self):
+        self._closed = True
+        for worker in self._pool:
+            worker.stop()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "queue_wait": self.queue_wait.summary(),
+            "ipc": self.ipc.summary(),
+            "inference": self.inference.summary(),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"NLU server: {stats['workers']} worker(s), {stats['calls']} calls, "
+              f"{stats['timeouts']} timeouts, {stats['errors']} errors, {stats['restarts']} restarts")
+        for part in ("queue_wait", "ipc", "inference"):
+            summary = stats[part]
+            print(f"  {part:<11} p50 {summary['p50'] * 1000:7.1f} ms   p95 {summary['p95'] * 1000:7.1f} ms   "
+                  f"max {summary['max'] * 1000:7.1f} ms")
@@ -0,0 +1,118 @@
+"""Panoramic scan: a full yaw sweep with evenly spaced captures.
+
+Each step rotates to the next heading, waits for the rotation to finish and
+takes one ``simGetImages`` batch. The batch is handed to the
+``ImageCapture`` writer thread, so the next rotation is issued while the
+previous frames are still being encoded and written. Every frame goes into
+an indexed ``manifest.json`` with the pose it was taken from.
+"""
+import collections
+import datetime
+import math
+import os
+import time
+
+from atomic_file import atomic_write_json
+from motion import wait_for_motion
+from telemetry import quaternion_to_yaw
+
+SweepFrame = collections.namedtuple("SweepFrame", ["index", "target_yaw", "yaw", "position", "paths", "time"])
+SweepFrame.__doc__ = """One sweep step: yaw in degrees (commanded and measured), NED camera position, files and seconds into the sweep."""
+
+SweepResult = collections.namedtuple(
+    "SweepResult", ["frames", "steps", "completed", "seconds", "rotate_seconds", "capture_seconds",
+                    "flush_seconds", "manifest", "error"])
+SweepResult.__doc__ = """A finished, cancelled or failed sweep (``error``); ``seconds`` runs from the first rotation to the last capture."""
+
+
+def sweep_headings(start_yaw, steps):
+    """``steps`` headings in degrees, evenly spaced over a full turn starting at ``start_yaw``."""
+    return [(start_yaw + 360.0 * i / steps + 180.0) % 360.0 - 180.0 for i in range(steps)]
+
+
+def frame_pose(response, fallback):
+    """``(yaw degrees, (x, y, z))`` of the camera that took ``response``, or ``fallback`` if it has none."""
+    orientation = getattr(response, "camera_orientation", None)
+    position = getattr(response, "camera_position", None)
+    if orientation is None or position is None:
+        return fallback
+    return (math.degrees(quaternion_to_yaw(orientation)),
+            (position.x_val, position.y_val, position.z_val))
+
+
+def panorama_sweep(client, capture, requests, steps=8, start_yaw=0.0, cancel_token=None,
+                   cancel_task=None, label="panorama"):
+    """Rotate through ``steps`` headings on ``client`` and capture ``requests`` at each one.
+
+    Frames go to a new ``<time>_<label>`` directory under ``capture.root``
+    with a ``manifest.json`` listing them in order. A cancelled rotation
+    (``cancel_token``, e.g. the dispatcher's) or a failed one ends the sweep
+    early, so no frame is taken at a heading that was not reached; the frames
+    taken so far are still written and listed, and the manifest records the
+    sweep as not completed.
+    """
+    directory = datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + f"_{label}"
+    frames = []
+    rotate_seconds = capture_seconds = 0.0
+    completed = True
+    error = None
+    start = time.perf_counter()
+    for index, heading in enumerate(sweep_headings(start_yaw, steps)):
+        if index:
+            rotation_start = time.perf_counter()
+            task = client.rotateToYawAsync(heading)
+            result = wait_for_motion(task, cancel_token, cancel_task=cancel_task, name="Sweep rotation")
+            rotate_seconds += time.perf_counter() - rotation_start
+            if not result.completed:
+                completed = False
+                error = result.error
+                break
+        taken = capture.capture(requests, label=f"{label}{index:02d}", directory=directory)
+        capture_seconds += taken.seconds
+        if not taken.responses:
+            print(f"Sweep step {index}: no images")
+            continue
+        yaw, position = frame_pose(taken.responses[0], (heading, None))
+        frames.append(SweepFrame(index, heading, yaw, position,
+                                 [os.path.relpath(path, os.path.join(capture.root, directory)) for path in taken.paths],
+                                 time.perf_counter() - start))
+    seconds = time.perf_counter() - start
+    flush_start = time.perf_counter()
+    capture.flush()
+    flush_seconds = time.perf_counter() - flush_start
+    manifest = write_manifest(os.path.join(capture.root, directory), frames, steps, completed, seconds, error)
+    return SweepResult(frames, steps, completed, seconds, rotate_seconds, capture_seconds, flush_seconds,
+                       manifest, error)
+
+
+def write_manifest(directory, frames, steps, completed, seconds, error=None):
+    """Write ``manifest.json`` into ``directory`` and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "manifest.json")
+    data = {
+        "steps": steps,
+        "completed": completed,
+        "error": None if error is None else str(error),
+        "seconds": round(seconds, 3),
+        "frames": [{
+            "index": frame.index,
+            "target_yaw": round(frame.target_yaw, 2),
+            "yaw": round(frame.yaw, 2),
+            "position": frame.position and [round(v, 3) for v in frame.position],
+            "time": round(frame.time, 3),
+            "files": frame.paths,
+        } for frame in frames],
+    }
+    atomic_write_json(path, data, indent=2)
+    return path
+
+
+def format_sweep(result):
+    """Operator-facing text: frames taken, total sweep time and where it went."""
+    if result.error is not None:
+        outcome = f"failed ({result.error})"
+    else:
+        outcome = "complete" if result.completed else "cancelled"
+    return (f"Panorama {outcome}: {len(result.frames)}/{result.steps} frames in {result.seconds:.2f} s "
+            f"(rotating {result.rotate_seconds:.2f} s, capture RPCs {result.capture_seconds:.2f} s, "
+            f"{result.flush_seconds * 1000:.0f} ms waiting for the last writes); manifest {result.manifest}")
@@ -0,0 +1,115 @@
+"""Token-trie phrase matcher: finds every known phrase in one scan of an utterance."""
+import collections
+import hashlib
+import itertools
+import re
+
+Match = collections.namedtuple("Match", ["start", "end", "payload"])
+
+# Whitespace and ASCII/Devanagari punctuation separate tokens; everything else
+# (including combining vowel signs in Indic scripts) stays inside the word.
+_TOKEN = re.compile(r"[^\s.,!?;:\"()\[\]{}।॥]+")
+_END = None
+
+_VOWELS = "aeiou"
+# Irregular English past forms of the command verbs
+IRREGULAR = {"take": ["took", "taken"], "come": ["came"], "begin": ["began", "begun"], "spin": ["spun"],
+             "freeze": ["froze", "frozen"], "go": ["went", "gone"]}
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def inflections(word):
+    """``word`` and its regular English -s, -ed and -ing forms ("stop" -> "stops", "stopped", "stopping").
+
+    Words that are not plain ASCII letters (Devanagari, Telugu) are returned
+    unchanged. A final consonant after a single vowel is tried both doubled
+    and not ("stopping", "hovering"), so a few forms that are not words are
+    generated as well; they never occur in text, so they cannot match.
+    """
+    if not (word.isascii() and word.isalpha()) or len(word) < 2:
+        return {word}
+    forms = {word, *IRREGULAR.get(word, ())}
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        forms.add(word + "es")
+    elif word.endswith("y") and word[-2] not in _VOWELS:
+        forms.add(word[:-1] + "ies")
+    else:
+        forms.add(word + "s")
+    stems = {word[:-1] if word.endswith("e") else word}
+    if len(word) > 2 and word[-1] not in _VOWELS + "wxy" and word[-2] in _VOWELS and word[-3] not in _VOWELS:
+        stems.add(word + word[-1])
+    for stem in stems:
+        forms.update((stem + "ing", stem + "ed"))
+    return forms
+
+
+class PhraseMatcher:
+    """Multi-pattern matcher over whole tokens, built once from a phrase vocabulary.
+
+    Phrases are stored in a trie keyed by token, so matching respects word
+    boundaries ("age" does not fire inside "message") and costs one walk per
+    token position bounded by the longest phrase, independent of how many
+    synonyms are loaded. Phrases added with ``inflect`` also match their
+    inflected forms ("landing", "turned left"), each stored as its own path.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, phrase, payload, inflect=False):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        forms = [sorted(inflections(token)) if inflect else [token] for token in tokens]
+        for variant in itertools.product(*forms):
+            node = self.root
+            for token in variant:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append(payload)
+        self.size += 1
+
+    def find_all(self, text):
+        """Every ``Match(start, end, payload)`` in ``text`` (token offsets), in text order."""
+        tokens = tokenize(text) if isinstance(text, str) else text
+        matches = []
+        root = self.root
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            end = start + 1
+            while node is not None:
+                payloads = node.get(_END)
+                if payloads:
+                    for payload in payloads:
+                        matches.append(Match(start, end, payload))
+                if end == len(tokens):
+                    break
+                node = node.get(tokens[end])
+                end += 1
+        return matches
+
+    def fingerprint(self):
+        """Short stable hash of every compiled path and its payloads.
+
+        Covers the inflected forms too, so a change to ``inflections`` or to
+        which phrases are inflected changes it as well as a new synonym.
+        """
+        digest = hashlib.sha1()
+        stack = [((), self.root)]
+        paths = []
+        while stack:
+            path, node = stack.pop()
+            for token, child in node.items():
+                if token is _END:
+                    paths.append((path, child))
+                else:
+                    stack.append((path + (token,), child))
+        for path, payloads in sorted(paths, key=lambda entry: entry[0]):
+            digest.update(repr((path, payloads)).encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def __len__(self):
+        return self.size
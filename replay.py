@@ -0,0 +1,266 @@
+"""Offline replay harness: runs a transcript corpus through each control script.
+
+Every utterance goes through the script's own ``process_audio`` (ASR ->
+translate -> classify -> ``execute_command``), with fake ASR/translation
+backends and ``fake_airsim.FakeMultirotorClient`` in place of Unreal, so
+accuracy and per-stage latency can be regression-tested on any machine.
+
+Corpus lines are JSON objects::
+
+    {"text": "बाएं घूमो", "language": "hi", "translation": "turn left", "expected": "rotate left"}
+
+``text`` is what the recognizer returns, ``translation`` feeds the stub
+translator (phrase tables are consulted first), ``expected`` is a zero-shot
+label or null for utterances that must not move the drone, and an optional
+``wav`` is decoded and sent to a real backend with ``--recognizer google``
+(or ``whisper``). A compound command flown as a plan is scored on its
+``format_plan`` text (``"forward 5 m -> rotate left -> up"``); an optional
+``engines`` list limits an entry to the engines that can plan it.
+
+    python replay.py [--corpus replay_corpus.jsonl] [--engines rules nlp zero]
+                     [--time-scale 0.2] [--delay moveToPositionAsync=3.0]
+"""
+import argparse
+import collections
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import speech_recognition as sr
+
+from asr_backends import FallbackRecognizer, GoogleBackend, Hypothesis
+from cascade import CascadeClassifier
+from command_dispatcher import CommandDispatcher
+from command_planner import format_plan
+from command_processor import DroneCommandProcessor
+from command_vocab import canonical_action
+from fake_airsim import BOX, GROUND, SKY, FakeMultirotorClient
+from flight_recorder import FlightRecorder
+from image_capture import ImageCapture
+from segmentation import SegmentationAnalyzer
+from stage_trace import StageTracer
+from telemetry import TelemetryCache
+from translation_cache import CachingTranslator, StubTranslator, load_phrase_tables, normalize_text
+
+ENGINES = {
+    "rules": "hello_drone_ruleBased",
+    "nlp": "hello_drone_nlp",
+    "zero": "hello_drone_zero",
+}
+
+
+class FakeAudio:
+    """A corpus entry in place of ``sr.AudioData``."""
+
+    def __init__(self, transcript, path=None):
+        self.transcript = transcript
+        self.path = path
+
+
+class FakeBackend:
+    """ASR backend that returns the corpus transcript; ``delay`` simulates the round trip."""
+
+    name = "fake"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def recognize(self, audio, language, on_partial=None):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if not audio.transcript:
+            raise sr.UnknownValueError()
+        return Hypothesis(audio.transcript, language, 1.0, self.name)
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_audio(entry, backend):
+    if isinstance(backend, FakeBackend):
+        return FakeAudio(entry.get("text"), entry.get("wav"))
+    with sr.AudioFile(entry["wav"]) as source:
+        return sr.Recognizer().record(source)
+
+
+def stub_table(corpus):
+    return {(entry["language"], normalize_text(entry["text"])): entry["translation"]
+            for entry in corpus if entry.get("translation") and entry.get("text")}
+
+
+def configure(module, engine, args, asr_backend, backend):
+    """Point the script's globals at fakes, as its ``__main__`` block would at real services."""
+    client = FakeMultirotorClient(delays=args.delays, time_scale=args.time_scale,
+                                  rpc_latency=args.rpc_latency)
+    phrase_tables = {} if args.no_phrase_tables else load_phrase_tables("phrase_tables.json")
+    module.client = client
+    module.cancel_client = client
+    module.asr = FallbackRecognizer([asr_backend])
+    module.translator = CachingTranslator(backend, phrase_tables=phrase_tables)
+    module.recorder = FlightRecorder(args.flight_log_dir,
+                                     session=f"{engine}-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}")
+    module.tracer = StageTracer(log_path=args.log, recorder=module.recorder)
+    module.dispatcher = CommandDispatcher(on_preempt=client.cancelLastTask).start()
+    module.telemetry = TelemetryCache(client, rate_hz=module.TELEMETRY_RATE_HZ, recorder=module.recorder).start()
+    module.multilingual_index = module.load_multilingual_index() if args.multilingual else None
+    if engine == "rules":
+        module.controller = module.DroneController(client, module.dispatcher, module.telemetry)
+    elif engine == "nlp":
+        module.command_index = module.load_command_index()
+        module.command_planner = module.load_command_planner() if module.PLANNED_COMMANDS else None
+    else:
+        module.ZERO_SHOT_ENGINE = args.zero_shot
+        module.cascade = CascadeClassifier(DroneCommandProcessor(),
+                                           vector_matcher=module.load_command_index(),
+                                           zero_shot=module.load_zero_shot())
+    module.resolution_cache = module.make_resolution_cache(None)
+    module.capture = ImageCapture(client, root=args.capture_root)
+    module.segmenter = SegmentationAnalyzer(class_names={SKY: "sky", GROUND: "ground", BOX: "box"})
+    return client
+
+
+def predicted_action(args):
+    """The action name passed to ``execute_command``, in the zero-shot label set."""
+    command = args[-1]
+    if isinstance(command, dict):
+        command = command.get("action")
+    return canonical_action(command)
+
+
+def replay(engine, corpus, args, asr_backend, backend):
+    module = importlib.import_module(ENGINES[engine])
+    client = configure(module, engine, args, asr_backend, backend)
+
+    dispatched = []
+    execute_command = module.execute_command
+    fly_plan = getattr(module, "fly_plan", None)
+
+    def recording_execute_command(*command_args, **kwargs):
+        dispatched.append(predicted_action(command_args))
+        return execute_command(*command_args, **kwargs)
+
+    def recording_fly_plan(steps):
+        dispatched.append(format_plan(steps))
+        return fly_plan(steps)
+
+    module.execute_command = recording_execute_command
+    if fly_plan is not None:
+        module.fly_plan = recording_fly_plan
+
+    results = []
+    try:
+        for entry in corpus:
+            if engine not in entry.get("engines", ENGINES):
+                continue
+            module.source_language = entry["language"]
+            audio = load_audio(entry, asr_backend)
+            del dispatched[:]
+            trace = module.tracer.begin(utterance_end=time.perf_counter())
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                module.process_audio(audio, trace)
+                module.dispatcher.wait_idle(args.settle)
+            predicted = dispatched[0] if dispatched else None
+            results.append((entry, predicted))
+    finally:
+        module.execute_command = execute_command
+        if fly_plan is not None:
+            module.fly_plan = fly_plan
+        module.dispatcher.close()
+        module.telemetry.stop()
+        module.capture.close()
+        module.recorder.close()
+
+    report(engine, results, module, client, args.verbose)
+    module.tracer.close()
+    return results
+
+
+def report(engine, results, module, client, verbose):
+    print(f"=== {engine} ({ENGINES[engine]}.py) ===")
+    correct = collections.Counter()
+    total = collections.Counter()
+    for entry, predicted in results:
+        ok = predicted == canonical_action(entry.get("expected"))
+        total[entry["language"]] += 1
+        correct[entry["language"]] += ok
+        if not ok or verbose:
+            print(f"  {'ok  ' if ok else 'MISS'} [{entry['language']}] {entry.get('text')!r}: "
+                  f"expected {entry.get('expected')}, got {predicted}")
+    n = sum(total.values())
+    hits = sum(correct.values())
+    by_language = ", ".join(f"{lang} {correct[lang]}/{total[lang]}" for lang in sorted(total))
+    rate = hits / n if n else 0.0
+    print(f"Accuracy: {hits}/{n} ({rate:.0%})  [{by_language}]")
+    module.tracer.report()
+    module.asr.report()
+    module.translator.report()
+    module.dispatcher.report()
+    module.resolution_cache.report()
+    module.capture.report()
+    module.recorder.report()
+    print("AirSim calls: " + ", ".join(f"{name} {count}" for name, count in sorted(client.calls.items())))
+    print()
+
+
+def parse_delay(text):
+    name, _, seconds = text.partition("=")
+    return name, float(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default="replay_corpus.jsonl")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=["rules", "nlp", "zero"])
+    parser.add_argument("--recognizer", choices=("fake", "google", "whisper"), default="fake",
+                        help="google/whisper decode each entry's wav file")
+    parser.add_argument("--translator", choices=("stub", "google"), default="stub")
+    parser.add_argument("--asr-delay", type=float, default=0.0, help="simulated ASR round trip (s)")
+    parser.add_argument("--translate-delay", type=float, default=0.0, help="simulated translation round trip (s)")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="added to every AirSim call (s)")
+    parser.add_argument("--time-scale", type=float, default=0.2, help="multiplier for simulated motion durations")
+    parser.add_argument("--delay", dest="delays", type=parse_delay, action="append", default=[],
+                        metavar="METHOD=SECONDS", help="override a simulated task duration")
+    parser.add_argument("--settle", type=float, default=15.0, help="max wait for a command to finish (s)")
+    parser.add_argument("--no-phrase-tables", action="store_true")
+    parser.add_argument("--capture-root", default=os.path.join(tempfile.gettempdir(), "replay_captures"),
+                        help="where scan/analyse images are written")
+    parser.add_argument("--flight-log-dir", default=os.path.join(tempfile.gettempdir(), "replay_flight_logs"),
+                        help="where each engine's flight recorder session is written")
+    parser.add_argument("--zero-shot", choices=("bart", "distilled"), default="bart",
+                        help="last tier of the zero engine's cascade")
+    parser.add_argument("--multilingual", action="store_true",
+                        help="match non-English transcripts with the sentence encoder before translating")
+    parser.add_argument("--log", help="append every span to this JSON-lines file")
+    parser.add_argument("--verbose", action="store_true", help="show the scripts' own output")
+    args = parser.parse_args()
+    args.delays = dict(args.delays)
+
+    corpus = load_corpus(args.corpus)
+    if args.recognizer == "fake":
+        asr_backend = FakeBackend(delay=args.asr_delay)
+    elif args.recognizer == "google":
+        asr_backend = GoogleBackend(sr.Recognizer())
+    else:
+        from asr_backends import WhisperBackend
+        asr_backend = WhisperBackend()
+    for engine in args.engines:
+        if args.translator == "stub":
+            backend = StubTranslator(stub_table(corpus), delay=args.translate_delay)
+        else:
+            from googletrans import Translator
+            backend = Translator()
+        replay(engine, corpus, args, asr_backend, backend)
+
+
+if __name__ == "__main__":
+    main()
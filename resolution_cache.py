@@ -0,0 +1,128 @@
+"""Memoized command resolution shared by the NLU engines.
+
+Operators repeat the same few phrases, and an engine resolves the same
+translated text to the same action for as long as the engine and its
+vocabulary stay the same. ``ResolutionCache`` keeps ``(action, confidence)``
+per engine and normalized text in one bounded LRU that can be saved to disk
+and shared by every script.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+
+from atomic_file import atomic_write_json
+from translation_cache import normalize_text
+
+
+def vocabulary_fingerprint(*vocabularies):
+    """Short stable hash of JSON-serializable vocabularies (dicts of synonym lists, label lists)."""
+    blob = json.dumps(vocabularies, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+class EngineStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+
+class ResolutionCache:
+    """LRU of ``(engine, normalized text) -> (action, confidence)``, optionally persisted to ``cache_path``.
+
+    Each engine is ``register``-ed with a version string and the vocabularies
+    it resolves against (``command_mappings``, ``DroneCommandProcessor.commands``,
+    ``labels``...). If either differs from what the cached entries were made
+    with, that engine's entries are dropped; other engines' entries are kept.
+    Unrecognized text is cached too (as ``(None, confidence)``); callers must
+    not ``put`` results of calls that failed.
+    """
+
+    def __init__(self, cache_path=None, capacity=2048, save_every=10):
+        self.cache_path = cache_path
+        self.capacity = capacity
+        self.save_every = save_every
+        self.cache = collections.OrderedDict()
+        self.tags = {}
+        self.stats = collections.defaultdict(EngineStats)
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def register(self, engine, version, *vocabularies):
+        """Declare what ``engine``'s results depend on; stale entries for it are discarded."""
+        tag = f"{version}:{vocabulary_fingerprint(*vocabularies)}"
+        with self._lock:
+            if self.tags.get(engine, tag) != tag:
+                stale = [key for key in self.cache if key[0] == engine]
+                for key in stale:
+                    del self.cache[key]
+                self.stats[engine].invalidated += len(stale)
+                print(f"{engine} vocabulary or version changed; dropped {len(stale)} cached resolutions.")
+            self.tags[engine] = tag
+        return engine
+
+    def get(self, engine, text):
+        """``(action, confidence)`` cached for ``text``, or None on a miss."""
+        key = (engine, normalize_text(text))
+        with self._lock:
+            resolved = self.cache.get(key)
+            if resolved is None:
+                self.stats[engine].misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.stats[engine].hits += 1
+            return resolved
+
+    def put(self, engine, text, action, confidence):
+        if engine not in self.tags:
+            raise ValueError(f"register engine '{engine}' before caching its results")
+        with self._lock:
+            key = (engine, normalize_text(text))
+            self.cache[key] = (action, float(confidence))
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable resolution cache: {e}")
+            return
+        self.tags = dict(data.get("engines", {}))
+        # Stored least recently used first, so insertion order restores recency
+        for engine, text, action, confidence in data.get("entries", [])[-self.capacity:]:
+            self.cache[(engine, text)] = (action, confidence)
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = {
+                "engines": dict(self.tags),
+                "entries": [[engine, text, action, confidence]
+                            for (engine, text), (action, confidence) in self.cache.items()],
+            }
+            self._unsaved = 0
+        atomic_write_json(self.cache_path, data, ensure_ascii=False)
+
+    def report(self):
+        for engine, stats in sorted(self.stats.items()):
+            lookups = stats.hits + stats.misses
+            rate = stats.hits / lookups if lookups else 0.0
+            print(f"Resolution cache [{engine}]: {lookups} lookups, hit rate {rate:.0%} "
+                  f"({stats.hits} hits, {stats.misses} misses), {stats.invalidated} invalidated")
+        print(f"Resolution cache size: {len(self.cache)}/{self.capacity}")
@@ -0,0 +1,138 @@
+"""On-board analysis of AirSim segmentation frames.
+
+Each object class is drawn in its own flat colour. The analyzer decodes a
+``simGetImages`` response straight into a NumPy array and finds every
+colour's pixel count, area fraction and bounding box with one sort of the
+frame, independent of how many classes are visible.
+"""
+import collections
+import time
+
+import numpy as np
+
+from image_capture import image_array
+from stage_trace import RollingHistogram
+
+ClassStats = collections.namedtuple("ClassStats", ["name", "color", "pixels", "fraction", "bbox"])
+ClassStats.__doc__ = """One colour class; ``bbox`` is ``(x0, y0, x1, y1)`` inclusive pixel coordinates."""
+
+SegmentationSummary = collections.namedtuple(
+    "SegmentationSummary", ["width", "height", "classes", "stride", "seconds", "within_budget"])
+
+
+def decode_segmentation(response):
+    """RGB ``(h, w, 3)`` uint8 pixels of a Segmentation response, without touching the disk.
+
+    Request the image uncompressed (``compress=False``): the raw buffer is
+    viewed in place, with its BGR(A) channels reversed to RGB. PNG responses
+    need OpenCV to decode.
+    """
+    if response.compress:
+        try:
+            import cv2
+        except ImportError:
+            raise ValueError("decoding PNG segmentation needs OpenCV; request the image with compress=False")
+        pixels = cv2.imdecode(np.frombuffer(response.image_data_uint8, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return pixels[..., ::-1]
+    pixels = image_array(response)
+    return pixels[..., 2::-1]
+
+
+def class_stats(pixels, stride=1):
+    """``[(color, pixels, (x0, y0, x1, y1))]`` for every colour, largest first.
+
+    Colours are packed into 24-bit keys and sorted once; runs of equal keys
+    give the counts, and ``reduceat`` over the run boundaries gives each
+    class's extreme rows and columns. With ``stride`` > 1 only every
+    ``stride``-th row and column is read and counts are scaled back up.
+    """
+    sampled = pixels[::stride, ::stride]
+    height, width = sampled.shape[:2]
+    rgb = sampled.reshape(-1, sampled.shape[2]).astype(np.uint32)
+    keys = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    order = np.argsort(keys, kind="stable")
+    ordered = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    counts = np.diff(np.append(starts, len(ordered)))
+    rows = order // width
+    cols = order % width
+    x0 = np.minimum.reduceat(cols, starts) * stride
+    x1 = np.maximum.reduceat(cols, starts) * stride
+    y0 = np.minimum.reduceat(rows, starts) * stride
+    y1 = np.maximum.reduceat(rows, starts) * stride
+    colors = ordered[starts]
+    result = []
+    for i in np.argsort(-counts, kind="stable"):
+        key = int(colors[i])
+        color = (key >> 16, (key >> 8) & 0xFF, key & 0xFF)
+        result.append((color, int(counts[i]) * stride * stride, (int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i]))))
+    return result
+
+
+class SegmentationAnalyzer:
+    """Per-class counts, area fractions and bounding boxes within ``budget_ms``.
+
+    The analyzer learns its cost per pixel; when a full-resolution pass would
+    overrun the budget it reads every n-th row and column instead, trading
+    exact counts and box edges (to within ``stride`` pixels) for a bounded
+    answer time. ``class_names`` maps ``(r, g, b)`` to a label; other colours
+    are reported as hex. Classes under ``min_fraction`` of the frame are left out.
+    """
+
+    def __init__(self, budget_ms=50.0, class_names=None, min_fraction=0.001, max_stride=8):
+        self.budget = budget_ms / 1000
+        self.class_names = dict(class_names or {})
+        self.min_fraction = min_fraction
+        self.max_stride = max_stride
+        self.seconds_per_pixel = None
+        self.frames = 0
+        self.overruns = 0
+        self.downsampled = 0
+        self.latency = RollingHistogram()
+
+    def stride_for(self, pixel_count):
+        if self.seconds_per_pixel is None:
+            return 1
+        stride = 1
+        while stride < self.max_stride and pixel_count / (stride * stride) * self.seconds_per_pixel > self.budget:
+            stride += 1
+        return stride
+
+    def analyse(self, pixels):
+        """``SegmentationSummary`` of an ``(h, w, 3)`` segmentation frame."""
+        start = time.perf_counter()
+        height, width = pixels.shape[:2]
+        stride = self.stride_for(height * width)
+        stats = class_stats(pixels, stride)
+        total = height * width
+        classes = [
+            ClassStats(self.class_names.get(color, "#%02x%02x%02x" % color), color, count, count / total, bbox)
+            for color, count, bbox in stats if count / total >= self.min_fraction
+        ]
+        seconds = time.perf_counter() - start
+        sampled = -(-height // stride) * -(-width // stride)
+        cost = seconds / sampled
+        self.seconds_per_pixel = cost if self.seconds_per_pixel is None else 0.8 * self.seconds_per_pixel + 0.2 * cost
+        self.frames += 1
+        self.downsampled += stride > 1
+        self.overruns += seconds > self.budget
+        self.latency.add(seconds)
+        return SegmentationSummary(width, height, classes, stride, seconds, seconds <= self.budget)
+
+    def report(self):
+        latency = self.latency.summary()
+        print(f"Segmentation analysis: {self.frames} frames, p50 {latency['p50'] * 1000:.1f} ms, "
+              f"p95 {latency['p95'] * 1000:.1f} ms, budget {self.budget * 1000:.0f} ms "
+              f"({self.overruns} overruns, {self.downsampled} downsampled)")
+
+
+def format_summary(summary, limit=5):
+    """Operator-facing text: the largest classes with their share of the frame and box."""
+    lines = [f"Segmentation {summary.width}x{summary.height}: {len(summary.classes)} classes "
+             f"in {summary.seconds * 1000:.1f} ms" + (f" (stride {summary.stride})" if summary.stride > 1 else "")]
+    for item in summary.classes[:limit]:
+        x0, y0, x1, y1 = item.bbox
+        lines.append(f"  {item.name:<14}{item.fraction:>7.1%}   box ({x0}, {y0})-({x1}, {y1})")
+    if len(summary.classes) > limit:
+        lines.append(f"  ... {len(summary.classes) - limit} more")
+    return "\n".join(lines)
@@ -0,0 +1,175 @@
+"""Stage-level latency tracing for the voice command pipeline.
+
+Every utterance gets a ``Trace``; ``capture`` is the length of the spoken
+audio, each later stage (asr, translate, classify, dispatch) runs inside a
+span, and ``first_motion`` is marked when the command's first motion RPC
+has gone out to AirSim (its future resolves
+only when the motion ends, so that is the earliest point the client sees).
+The command worker marks it through ``CommandDispatcher.mark`` on the trace
+the command was submitted with. Durations feed rolling p50/p95/p99
+histograms per stage and engine and can be appended to a JSON-lines file.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+STAGES = ("capture", "queue_wait", "asr", "translate", "classify", "dispatch", "first_motion")
+
+
+class RollingHistogram:
+    """Percentiles over the most recent ``window`` samples."""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def percentile(self, q):
+        return _nearest_rank(sorted(self.samples), q)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "p50": _nearest_rank(ordered, 50),
+            "p95": _nearest_rank(ordered, 95),
+            "p99": _nearest_rank(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+
+def _nearest_rank(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Span:
+    """A timed pipeline stage. Set ``engine`` inside the block if it is only known later."""
+
+    def __init__(self, trace, name, engine=None):
+        self.trace = trace
+        self.name = name
+        self.engine = engine
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        error = exc_type.__name__ if exc_type else None
+        self.trace.tracer.record(self.trace, self.name, self.engine, self.duration, error=error)
+        return False
+
+
+class Trace:
+    """All spans belonging to one utterance."""
+
+    def __init__(self, tracer, trace_id):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.utterance_end = None
+        self.marked = set()
+
+    def span(self, name, engine=None):
+        return Span(self, name, engine)
+
+    def elapsed(self):
+        """Seconds since the speaker stopped talking (or since the trace began)."""
+        return time.perf_counter() - (self.utterance_end or self.started)
+
+    def mark(self, name, engine=None):
+        """Record an instant event measured from the end of the utterance, once per trace."""
+        if name in self.marked:
+            return
+        self.marked.add(name)
+        self.tracer.record(self, name, engine, self.elapsed())
+
+
+class StageTracer:
+    """Collects spans from all traces into per-(stage, engine) rolling histograms.
+
+    Spans are also appended to ``log_path`` as JSON lines and to ``recorder``
+    (a ``FlightRecorder``) when given.
+    """
+
+    def __init__(self, window=500, log_path=None, recorder=None):
+        self.window = window
+        self.log_path = log_path
+        self.recorder = recorder
+        self.histograms = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8") if log_path else None
+
+    def begin(self, utterance_end=None):
+        """Start a new trace.
+
+        Pass ``utterance_end`` (a ``perf_counter`` value) when the audio was
+        captured elsewhere, e.g. by a background listener.
+        """
+        trace = Trace(self, next(self._ids))
+        trace.utterance_end = utterance_end
+        return trace
+
+    def record(self, trace, stage, engine, duration, error=None):
+        if self.recorder is not None:
+            self.recorder.latency(stage, engine, duration, trace.trace_id)
+        with self._lock:
+            for key in ((stage, None), (stage, engine)) if engine else ((stage, None),):
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = RollingHistogram(self.window)
+                histogram.add(duration)
+            if self._log:
+                entry = {
+                    "ts": time.time(),
+                    "trace": trace.trace_id,
+                    "stage": stage,
+                    "engine": engine,
+                    "ms": round(duration * 1000, 3),
+                }
+                if error:
+                    entry["error"] = error
+                self._log.write(json.dumps(entry) + "\n")
+                self._log.flush()
+
+    def summary(self):
+        """``{(stage, engine): {count, p50, p95, p99, max}}`` in seconds; engine None is all engines."""
+        with self._lock:
+            return {key: histogram.summary() for key, histogram in self.histograms.items()}
+
+    def report(self):
+        """Print p50/p95/p99 per stage and engine in milliseconds."""
+        summary = self.summary()
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        keys = sorted(summary, key=lambda k: (order.get(k[0], len(order)), k[0], k[1] or ""))
+        print(f"{'stage':<13}{'engine':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for stage, engine in keys:
+            s = summary[(stage, engine)]
+            print(f"{stage:<13}{engine or '*':<12}{s['count']:>6}{s['p50'] * 1000:>10.1f}"
+                  f"{s['p95'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}")
+
+    def dump(self, path):
+        """Append the current per-(stage, engine) summary to ``path`` as JSON lines."""
+        summary = self.summary()
+        with open(path, "a", encoding="utf-8") as f:
+            for (stage, engine), stats in summary.items():
+                entry = {"ts": time.time(), "stage": stage, "engine": engine, "count": stats["count"]}
+                for key in ("p50", "p95", "p99", "max"):
+                    entry[key + "_ms"] = round(stats[key] * 1000, 3)
+                f.write(json.dumps(entry) + "\n")
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
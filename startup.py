@@ -0,0 +1,103 @@
+"""Startup-time accounting and background model loading for the control scripts."""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Breaks startup into phases: sequential ones on the main thread, and background ones."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self._checkpoint = self.started
+        self._lock = threading.Lock()
+
+    def record(self, name):
+        """Close a main-thread phase that began at the previous checkpoint."""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append((name, now - self._checkpoint, False))
+            self._checkpoint = now
+
+    @contextmanager
+    def phase(self, name):
+        """Time a main-thread phase explicitly (anything since the last checkpoint is not counted)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, now - start, False))
+                self._checkpoint = now
+
+    def add_background(self, name, seconds):
+        with self._lock:
+            self.phases.append((name, seconds, True))
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        print("Startup time:")
+        with self._lock:
+            phases = list(self.phases)
+        for name, seconds, background in phases:
+            where = "background" if background else "main"
+            print(f"  {name:<22}{seconds:8.2f} s  ({where})")
+        print(f"  {'ready after':<22}{total:8.2f} s")
+
+
+class BackgroundLoader:
+    """Run ``load()`` (and an optional ``warm_up(model)``) on a thread as soon as it is created.
+
+    Heavy imports belong inside ``load`` so they also happen off the main
+    thread. ``get()`` blocks until the model is ready and re-raises load errors.
+    """
+
+    def __init__(self, name, load, warm_up=None, startup=None):
+        self.name = name
+        self._load = load
+        self._warm_up = warm_up
+        self._startup = startup
+        self._value = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"load-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            value = self._load()
+            self._add(f"{self.name} load", time.perf_counter() - start)
+            if self._warm_up is not None:
+                start = time.perf_counter()
+                self._warm_up(value)
+                self._add(f"{self.name} warm-up", time.perf_counter() - start)
+            self._value = value
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def _add(self, name, seconds):
+        if self._startup is not None:
+            self._startup.add_background(name, seconds)
+
+    def ready(self):
+        return self._ready.is_set()
+
+    def get(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"{self.name} is still loading")
+        if self._error is not None:
+            raise RuntimeError(f"Failed to load {self.name}: {self._error}") from self._error
+        return self._value
+
+    def get_or_none(self, timeout=None):
+        """Like ``get`` for optional models: report why loading failed and return None."""
+        try:
+            return self.get(timeout)
+        except (RuntimeError, TimeoutError) as e:
+            print(f"{e}; continuing without it.")
+            return None
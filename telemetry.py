@@ -0,0 +1,102 @@
+"""Background telemetry poller that keeps the latest drone kinematics in memory."""
+import collections
+import math
+import threading
+import time
+
+TelemetrySnapshot = collections.namedtuple(
+    "TelemetrySnapshot", ["x", "y", "z", "yaw", "vx", "vy", "vz", "timestamp"])
+TelemetrySnapshot.__doc__ = """NED position (m), yaw (rad), velocity (m/s) and the local monotonic read time."""
+
+
+def quaternion_to_yaw(q):
+    """Yaw of an AirSim ``Quaternionr``; same result as ``airsim.to_eularian_angles(q)[2]``."""
+    return math.atan2(2.0 * (q.w_val * q.z_val + q.x_val * q.y_val),
+                      1.0 - 2.0 * (q.y_val * q.y_val + q.z_val * q.z_val))
+
+
+def snapshot_from_state(state, timestamp=None):
+    kinematics = state.kinematics_estimated
+    position = kinematics.position
+    velocity = kinematics.linear_velocity
+    return TelemetrySnapshot(
+        position.x_val, position.y_val, position.z_val,
+        quaternion_to_yaw(kinematics.orientation),
+        velocity.x_val, velocity.y_val, velocity.z_val,
+        time.monotonic() if timestamp is None else timestamp,
+    )
+
+
+class TelemetryCache:
+    """Polls ``getMultirotorState`` at ``rate_hz`` on its own thread.
+
+    Command handlers call ``latest()`` instead of issuing their own RPCs. If the
+    cached snapshot is older than ``max_staleness`` seconds (e.g. the poller
+    is not running yet) a fresh state is read synchronously. Give the cache its
+    own ``MultirotorClient``: RPCs on it are serialized by an internal lock so
+    they never collide with the command client. Every state read is also
+    appended to ``recorder`` (a ``FlightRecorder``) when one is given.
+    """
+
+    def __init__(self, client, rate_hz=20.0, max_staleness=0.25, recorder=None):
+        self.client = client
+        self.recorder = recorder
+        self.rate_hz = rate_hz
+        self.max_staleness = max_staleness
+        self.polls = 0
+        self.reads = 0
+        self.fresh_reads = 0
+        self.errors = 0
+        self._snapshot = None
+        self._rpc_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def refresh(self):
+        """Read the state from AirSim now and cache it."""
+        with self._rpc_lock:
+            state = self.client.getMultirotorState()
+        snapshot = snapshot_from_state(state)
+        self._snapshot = snapshot
+        if self.recorder is not None:
+            self.recorder.kinematics(snapshot)
+        return snapshot
+
+    def latest(self, max_staleness=None):
+        """Latest snapshot, refreshed first if it is older than ``max_staleness`` seconds."""
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+        self.reads += 1
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.timestamp > max_staleness:
+            self.fresh_reads += 1
+            snapshot = self.refresh()
+        return snapshot
+
+    def _run(self):
+        interval = 1.0 / self.rate_hz
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.refresh()
+                self.polls += 1
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"Telemetry poll failed: {e}")
+            self._stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def report(self):
+        cached = self.reads - self.fresh_reads
+        print(f"Telemetry: {self.polls} background polls at {self.rate_hz:g} Hz, "
+              f"{self.reads} reads ({cached} served from cache, {self.fresh_reads} fresh), "
+              f"{self.errors} errors")
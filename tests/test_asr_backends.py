@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+
+from asr_backends import FallbackRecognizer, Hypothesis, ParallelLanguageRecognizer  # noqa: E402
+
+
+class ScriptedRecognizer:
+    """Answers each language with a fixed hypothesis after a fixed delay."""
+
+    name = "scripted"
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def recognize(self, audio, language, on_partial=None):
+        delay, confidence, text = self.answers[language]
+        time.sleep(delay)
+        if text is None:
+            raise sr.UnknownValueError()
+        return Hypothesis(text, language, confidence, self.name)
+
+
+def recognize(answers, languages=("en", "hi"), wins=None):
+    recognizer = ParallelLanguageRecognizer(ScriptedRecognizer(answers), languages, deadline=2.0)
+    recognizer.wins.update(wins or {})
+    try:
+        return recognizer.recognize(None).language
+    finally:
+        recognizer.close()
+
+
+def test_reported_confidence_beats_a_missing_one():
+    assert recognize({"en": (0.0, None, "go up"), "hi": (0.05, 0.4, "ऊपर जाओ")}) == "hi"
+
+
+def test_missing_confidence_is_used_when_nothing_else_answers():
+    assert recognize({"en": (0.0, None, "go up"), "hi": (0.0, None, None)}) == "en"
+
+
+def test_ties_go_to_the_language_won_most_often():
+    answers = {"en": (0.0, None, "go up"), "hi": (0.02, None, "गो अप")}
+    assert recognize(answers) == "en"
+    assert recognize(answers, wins={"hi": 3}) == "hi"
+
+
+def test_fallback_counts_every_concurrent_call():
+    recognizer = FallbackRecognizer([ScriptedRecognizer({"en": (0.0, 0.9, "go up")})])
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: recognizer.recognize(None, "en"), range(400)))
+    stats = recognizer.stats["scripted"]
+    assert (stats.calls, stats.answered, stats.latency.count) == (400, 400, 400)
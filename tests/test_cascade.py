@@ -0,0 +1,38 @@
+from cascade import CascadeClassifier
+from command_processor import DroneCommandProcessor
+
+
+class FixedMatcher:
+    """Stands in for a ``CommandVectorIndex`` or ``ZeroShotEngine`` that always gives one answer."""
+
+    def __init__(self, action, score):
+        self.action = action
+        self.score = score
+        self.calls = 0
+
+    def best_match(self, text, threshold=0.7):
+        self.calls += 1
+        return (self.action, self.score) if self.score > threshold else (None, 0.0)
+
+    def classify(self, text):
+        self.calls += 1
+        return self.action, self.score
+
+
+def test_rule_confidence_is_the_share_of_words_matched():
+    cascade = CascadeClassifier(DroneCommandProcessor())
+    assert cascade.classify("take off") == ("take off", 1.0, "rule")
+    action, confidence, tier = cascade.classify("please land now")
+    assert (action, tier) == ("land", "rule")
+    assert abs(confidence - 1 / 3) < 1e-9
+
+
+def test_vector_tier_only_answers_with_dispatchable_actions():
+    zero_shot = FixedMatcher("up", 0.9)
+    cascade = CascadeClassifier(DroneCommandProcessor(), vector_matcher=FixedMatcher("scan", 0.95),
+                                zero_shot=zero_shot)
+    assert cascade.classify("have a look around") == ("up", 0.9, "zero_shot")
+    assert zero_shot.calls == 1
+
+    cascade = CascadeClassifier(DroneCommandProcessor(), vector_matcher=FixedMatcher("takeoff", 0.95))
+    assert cascade.classify("get airborne") == ("take off", 0.95, "vector")
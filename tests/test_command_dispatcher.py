@@ -0,0 +1,70 @@
+import time
+
+from command_dispatcher import CommandDispatcher
+from fake_airsim import FakeMultirotorClient
+from motion import wait_for_motion
+from stage_trace import StageTracer
+
+
+def make_dispatcher():
+    client = FakeMultirotorClient()
+    return client, CommandDispatcher(on_preempt=client.cancelLastTask).start()
+
+
+def test_priority_stop_cancels_a_waiting_move_once():
+    client, dispatcher = make_dispatcher()
+    results = []
+
+    def move():
+        task = client.moveToPositionAsync(10, 0, 0, velocity=1)
+        results.append(wait_for_motion(task, dispatcher.cancel_token, cancel_task=client.cancelLastTask))
+
+    def stop():
+        client.moveByVelocityAsync(0, 0, 0, duration=1).join()
+        results.append("stopped")
+
+    dispatcher.submit(move)
+    time.sleep(0.1)
+    dispatcher.submit(stop)
+    assert dispatcher.wait_idle(5)
+    dispatcher.close()
+    assert not results[0].completed
+    assert results[1] == "stopped"
+    assert client.calls["cancelLastTask"] == 1
+
+
+def test_priority_stop_when_idle_calls_on_preempt():
+    client, dispatcher = make_dispatcher()
+    dispatcher.submit(lambda: None, name="stop")
+    assert dispatcher.wait_idle(5)
+    dispatcher.close()
+    assert client.calls["cancelLastTask"] == 1
+
+
+def test_ordinary_command_does_not_call_on_preempt():
+    client, dispatcher = make_dispatcher()
+    dispatcher.submit(time.sleep, 0.2)
+    time.sleep(0.05)
+    dispatcher.submit(lambda: None, name="forward")
+    assert dispatcher.wait_idle(5)
+    dispatcher.close()
+    assert client.calls["cancelLastTask"] == 0
+
+
+def test_mark_goes_to_the_trace_the_command_was_submitted_with():
+    client, dispatcher = make_dispatcher()
+    tracer = StageTracer()
+    first, second = tracer.begin(), tracer.begin()  # the next utterance has begun before the move runs
+
+    def move():
+        client.moveToPositionAsync(1, 0, 0, velocity=10)
+        dispatcher.mark("first_motion", engine="move")
+
+    dispatcher.submit(move, trace=first)
+    dispatcher.submit(lambda: dispatcher.mark("first_motion", engine="other"), name="other")
+    assert dispatcher.wait_idle(5)
+    dispatcher.close()
+    assert first.marked == {"first_motion"}
+    assert second.marked == set()
+    assert ("first_motion", "move") in tracer.histograms
+    assert ("first_motion", "other") not in tracer.histograms
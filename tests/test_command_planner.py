@@ -0,0 +1,61 @@
+import re
+from types import SimpleNamespace
+
+from command_planner import TRANSLATIONS, CommandPlanner, format_plan
+
+
+class Tokenizer:
+    """The parts of a spaCy ``Doc`` the planner reads, split like spaCy's English tokenizer.
+
+    spaCy's tokenizer exceptions split "dont" and "don't" into "do" and
+    "nt" / "n't", both with the norm "not".
+    """
+
+    def make_doc(self, text):
+        tokens = []
+        for text in re.findall(r"\d+(?:\.\d+)?|[a-z']+|[^\sa-z\d]", text):
+            if text in ("dont", "don't"):
+                tokens += [self.token("do"), self.token(text[2:], norm="not")]
+            else:
+                tokens.append(self.token(text))
+        return tokens
+
+    @staticmethod
+    def token(text, norm=None):
+        return SimpleNamespace(text=text, lower_=text.lower(), norm_=norm or text.lower(),
+                               like_num=text.replace(".", "").isdigit(), is_punct=not re.match(r"[\w°]", text))
+
+
+class KeywordIndex:
+    """Stands in for ``CommandVectorIndex``: the first direction or "land" in the text."""
+
+    def best_match(self, text, threshold=0.7):
+        for word in text.split():
+            if word in TRANSLATIONS or word == "land":
+                return word, 1.0
+        return None, 0.0
+
+
+def plan(text):
+    steps = CommandPlanner(Tokenizer(), KeywordIndex()).plan(text)
+    return steps if steps is None else format_plan(steps)
+
+
+def test_compound_command():
+    assert plan("go forward 5 meters then turn left and go up") == "forward 5 m -> rotate left -> up"
+
+
+def test_negated_clause_is_dropped_when_spacy_splits_dont():
+    assert plan("dont go forward 5 meters") == ""
+    assert plan("go up 2 meters then don't go forward 5 meters") == "up 2 m"
+
+
+def test_number_words_make_one_number():
+    assert plan("go up two hundred centimetres") == "up 2 m"
+    assert plan("go forward twenty five meters") == "forward 25 m"
+    assert plan("go forward one hundred and twenty centimetres then land") == "forward 1.2 m -> land"
+
+
+def test_unreadable_amount_rejects_the_plan():
+    assert plan("go forward five ten meters then land") is None
+    assert plan("go up 3 meters 4 meters") is None
@@ -0,0 +1,41 @@
+from command_processor import DroneCommandProcessor
+from phrase_matcher import PhraseMatcher, inflections
+
+
+def action(text):
+    result = DroneCommandProcessor().process_command(text)
+    return result and result['action']
+
+
+def test_inflected_commands_match():
+    assert action("move upwards") == 'up'
+    assert action("landing now") == 'land'
+    assert action("stopping") == 'stop'
+    assert action("turning left") == 'rotate_left'
+    assert action("it took off") == 'takeoff'
+
+
+def test_matching_still_respects_word_boundaries():
+    assert action("read the message") is None
+    assert action("update the map") is None
+
+
+def test_inflections():
+    assert {"stops", "stopped", "stopping"} <= inflections("stop")
+    assert {"rotates", "rotated", "rotating"} <= inflections("rotate")
+    assert inflections("ऊपर") == {"ऊपर"}
+
+
+def test_matcher_version_follows_the_compiled_phrases():
+    processor = DroneCommandProcessor()
+    assert processor.matcher_version() == DroneCommandProcessor().matcher_version()
+    processor.negation_words = processor.negation_words + ['never']
+    processor._matcher = processor._build_matcher()
+    assert processor.matcher_version() != DroneCommandProcessor().matcher_version()
+
+
+def test_fingerprint_covers_inflection():
+    plain, inflected = PhraseMatcher(), PhraseMatcher()
+    plain.add("turn left", "rotate_left")
+    inflected.add("turn left", "rotate_left", inflect=True)
+    assert plain.fingerprint() != inflected.fingerprint()
@@ -0,0 +1,41 @@
+import os
+
+from flight_recorder import HEADER, RECORD_DTYPE, FlightRecorder, decode_text, read_flight_log, records_of
+
+
+def test_recorders_started_together_get_their_own_files(tmp_path):
+    first = FlightRecorder(str(tmp_path), chunk_records=8)
+    second = FlightRecorder(str(tmp_path), chunk_records=8)
+    try:
+        assert first.path != second.path
+    finally:
+        first.close()
+        second.close()
+
+
+def test_records_span_chunk_rollover(tmp_path):
+    recorder = FlightRecorder(str(tmp_path), chunk_records=4, session="rollover")
+    for i in range(10):
+        recorder.latency("asr", "google", i / 10, trace=i)
+    recorder.close()
+    assert recorder.chunks == 3
+    records = read_flight_log(recorder.path)
+    assert len(records) == 10
+    assert list(records["trace"]) == list(range(10))
+    assert decode_text(records[9]["text"]) == "asr"
+
+
+def test_unclosed_session_ends_at_the_last_record(tmp_path):
+    recorder = FlightRecorder(str(tmp_path), chunk_records=16, session="crash")
+    recorder.transcript("take off", language="en", confidence=0.9, trace=1)
+    recorder.action("takeoff", engine="rules", trace=1)
+    recorder.flush()
+    try:
+        # Still the whole preallocated chunk on disk, as after a crash
+        assert os.path.getsize(recorder.path) == HEADER.size + 16 * RECORD_DTYPE.itemsize
+        records = read_flight_log(recorder.path)
+        assert len(records) == 2
+        assert decode_text(records_of(records, "transcript")[0]["text"]) == "take off"
+        assert decode_text(records_of(records, "action")[0]["label"]) == "rules"
+    finally:
+        recorder.close()
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from command_dispatcher import CancelToken
+from fake_airsim import FakeMultirotorClient
+from motion import wait_for_motion
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def thread_switches():
+    """Voluntary context switches of the calling thread, or None where Linux RUSAGE_THREAD is missing."""
+    if resource is None or not hasattr(resource, "RUSAGE_THREAD"):
+        return None
+    return resource.getrusage(resource.RUSAGE_THREAD).ru_nvcsw
+
+
+def wait_in_thread(task, token, cancel_task):
+    outcome = {}
+
+    def waiter():
+        before = thread_switches()
+        outcome["result"] = wait_for_motion(task, token, cancel_task=cancel_task, name="Move")
+        outcome["returned"] = time.perf_counter()
+        after = thread_switches()
+        outcome["wakeups"] = None if before is None else after - before
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    return thread, outcome
+
+
+def test_cancellation_returns_promptly_without_polling():
+    client = FakeMultirotorClient(delays={"moveToPositionAsync": 5.0})
+    token = CancelToken()
+    thread, outcome = wait_in_thread(client.moveToPositionAsync(5, 0, 0, velocity=1), token, client.cancelLastTask)
+    time.sleep(2.0)
+    cancelled_at = time.perf_counter()
+    token.cancel()
+    thread.join(5)
+
+    assert not outcome["result"].completed
+    assert client.calls["cancelLastTask"] == 1
+    assert outcome["returned"] - cancelled_at < 0.05
+    if outcome["wakeups"] is None:
+        pytest.skip("per-thread context switch counts need Linux")
+    # A 100 ms poll would have woken about twenty times in those two seconds; thread start-up and
+    # GIL hand-offs account for a handful of switches however long the wait
+    assert outcome["wakeups"] <= 10
+
+
+def test_completion_is_reported_without_cancelling():
+    client = FakeMultirotorClient(time_scale=0.1)
+    thread, outcome = wait_in_thread(client.moveToPositionAsync(5, 0, 0, velocity=1), CancelToken(),
+                                     client.cancelLastTask)
+    thread.join(5)
+
+    assert outcome["result"].completed
+    assert client.calls["cancelLastTask"] == 0
+    assert client.position == [5, 0, 0]
+
+
+def test_failed_motion_is_reported_as_a_failure():
+    client = FakeMultirotorClient(time_scale=0.1, failures={"moveToPositionAsync"})
+    thread, outcome = wait_in_thread(client.moveToPositionAsync(5, 0, 0, velocity=1), CancelToken(),
+                                     client.cancelLastTask)
+    thread.join(5)
+
+    result = outcome["result"]
+    assert not result.completed
+    assert str(result.error) == "moveToPositionAsync failed"
+    assert str(result).startswith("Move failed after ")
+    assert client.position == [0, 0, 0]
@@ -0,0 +1,39 @@
+import json
+from types import SimpleNamespace
+
+from fake_airsim import FakeMultirotorClient
+from image_capture import ImageCapture
+from panorama import format_sweep, panorama_sweep
+
+SCENE = SimpleNamespace(camera_name="front_center", image_type=0, pixels_as_float=False, compress=True)
+
+
+def sweep(tmp_path, client):
+    capture = ImageCapture(client, root=str(tmp_path))
+    try:
+        return panorama_sweep(client, capture, [SCENE], steps=4)
+    finally:
+        capture.close()
+
+
+def test_full_sweep(tmp_path):
+    result = sweep(tmp_path, FakeMultirotorClient(time_scale=0.01, image_size=(32, 24)))
+    assert result.completed and result.error is None
+    assert [frame.index for frame in result.frames] == [0, 1, 2, 3]
+    with open(result.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["completed"] and len(manifest["frames"]) == 4
+
+
+def test_failed_rotation_ends_the_sweep(tmp_path):
+    client = FakeMultirotorClient(time_scale=0.01, image_size=(32, 24), failures={"rotateToYawAsync"})
+    result = sweep(tmp_path, client)
+    assert not result.completed
+    assert str(result.error) == "rotateToYawAsync failed"
+    assert [frame.index for frame in result.frames] == [0]  # nothing taken at a heading never reached
+    assert client.calls["rotateToYawAsync"] == 1
+    with open(result.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["completed"] is False
+    assert manifest["error"] == "rotateToYawAsync failed"
+    assert format_sweep(result).startswith("Panorama failed (rotateToYawAsync failed): 1/4 frames")
@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+from fake_airsim import BOX, GROUND, SKY, FakeMultirotorClient
+from segmentation import SegmentationAnalyzer, SegmentationSummary, decode_segmentation, format_summary
+
+SEGMENTATION = SimpleNamespace(camera_name="front_center", image_type=5, pixels_as_float=False, compress=False)
+
+
+def test_raw_bgr_buffer_is_decoded_to_rgb():
+    client = FakeMultirotorClient(image_size=(64, 48))
+    pixels = decode_segmentation(client.simGetImages([SEGMENTATION])[0])
+    assert tuple(pixels[0, 0]) == SKY
+    assert tuple(pixels[-1, 0]) == GROUND
+    summary = SegmentationAnalyzer(class_names={SKY: "sky", GROUND: "ground", BOX: "box"}).analyse(pixels)
+    assert {item.name for item in summary.classes} == {"sky", "ground", "box"}
+
+
+def test_summary_names_the_stride():
+    summary = SegmentationSummary(640, 480, [], 2, 0.001, True)
+    assert "(stride 2)" in format_summary(summary)
@@ -0,0 +1,47 @@
+from translation_cache import CachingTranslator, StubTranslator
+
+TABLE = {("hi", "ऊपर जाओ"): "go up", ("hi", "नीचे जाओ"): "go down", ("hi", "रुको"): "stop",
+         ("es", "sube"): "go up"}
+
+
+def origins(translator, phrases, src="hi"):
+    return [translator.translate(text, src=src).origin for text in phrases]
+
+
+def test_hits_misses_and_lru_eviction():
+    backend = StubTranslator(TABLE)
+    translator = CachingTranslator(backend, capacity=2)
+    assert origins(translator, ["ऊपर जाओ", "नीचे जाओ", " ऊपर  जाओ!"]) == ["remote", "remote", "cache"]
+    # "ऊपर जाओ" was used last, so "नीचे जाओ" is the one evicted
+    assert origins(translator, ["रुको", "ऊपर जाओ", "नीचे जाओ"]) == ["remote", "cache", "remote"]
+    assert translator.translate("ऊपर जाओ", src="hi") == ("go up", "hi", "en", "cache")
+    assert backend.calls == 4
+    stats = translator.stats()
+    assert (stats["cache_hits"], stats["misses"], stats["phrase_hits"]) == (3, 4, 0)
+    assert len(translator.cache) == 2
+
+
+def test_phrase_table_skips_the_cache_and_the_backend():
+    backend = StubTranslator(TABLE)
+    translator = CachingTranslator(backend, phrase_tables={"hi": {"ऊपर जाओ": "go up"}})
+    result = translator.translate("ऊपर जाओ।", src="hi")
+    assert (result.text, result.origin) == ("go up", "phrase")
+    assert backend.calls == 0 and not translator.cache
+    # Tables are per language and only for English output
+    assert translator.translate("ऊपर जाओ", src="hi", dest="es").origin == "remote"
+    assert translator.translate("sube", src="es").origin == "remote"
+
+
+def test_reloaded_cache_translates_the_same(tmp_path):
+    path = str(tmp_path / "translation_cache.json")
+    first = CachingTranslator(StubTranslator(TABLE), cache_path=path)
+    phrases = [("ऊपर जाओ", "hi"), ("नीचे जाओ", "hi"), ("sube", "es")]
+    expected = [first.translate(text, src=src).text for text, src in phrases]
+    first.save()
+
+    backend = StubTranslator()
+    reloaded = CachingTranslator(backend, cache_path=path)
+    results = [reloaded.translate(text, src=src) for text, src in phrases]
+    assert [result.text for result in results] == expected
+    assert {result.origin for result in results} == {"cache"}
+    assert backend.calls == 0
@@ -0,0 +1,24 @@
+import threading
+from types import SimpleNamespace
+
+from stage_trace import StageTracer
+from voice_pipeline import VoicePipeline
+
+
+def audio(seconds, sample_rate=16000, sample_width=2):
+    return SimpleNamespace(frame_data=bytes(int(seconds * sample_rate) * sample_width),
+                           sample_rate=sample_rate, sample_width=sample_width)
+
+
+def test_capture_span_is_the_length_of_the_phrase():
+    tracer = StageTracer()
+    handled = threading.Event()
+    pipeline = VoicePipeline(None, None, lambda audio, trace: handled.set(), tracer=tracer)
+    pipeline._threads.append(threading.Thread(target=pipeline._worker, daemon=True))
+    pipeline._threads[0].start()
+    pipeline._on_audio(None, audio(1.5))
+    assert handled.wait(5)
+    pipeline.stop()
+    summary = tracer.summary()
+    assert summary[("capture", None)]["max"] == 1.5
+    assert summary[("queue_wait", None)]["count"] == 1
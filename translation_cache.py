@@ -0,0 +1,148 @@
+"""Translation layer with an LRU cache persisted to disk and offline phrase tables."""
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+from atomic_file import atomic_write_json
+
+TranslationResult = collections.namedtuple("TranslationResult", ["text", "src", "dest", "origin"])
+
+
+def normalize_text(text):
+    """Cache key form of an utterance: lower case, single spaces, no edge punctuation."""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" .,!?;:।")
+
+
+def load_phrase_tables(path):
+    """Read ``{language: {phrase: english}}`` from a JSON file; missing file means no tables."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        tables = json.load(f)
+    return {lang: {normalize_text(k): v for k, v in phrases.items()} for lang, phrases in tables.items()}
+
+
+class StubTranslator:
+    """Offline stand-in for googletrans.Translator, for tests and replays.
+
+    Looks phrases up in ``table`` (``{(src, text): english}`` or ``{text: english}``)
+    and otherwise echoes the input. ``delay`` simulates the network round trip.
+    """
+
+    def __init__(self, table=None, delay=0.0):
+        self.table = table or {}
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text, src="auto", dest="en"):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        key = normalize_text(text)
+        translated = self.table.get((src, key), self.table.get(key, text))
+        return TranslationResult(translated, src, dest, "stub")
+
+
+class CachingTranslator:
+    """Drop-in wrapper around a translator with ``translate(text, src=, dest=)``.
+
+    Lookups go phrase table -> in-memory LRU -> remote backend. The LRU is keyed
+    on ``(source_language, normalized text)`` and saved to ``cache_path`` so that
+    common commands survive restarts. The returned result has ``.text`` like a
+    googletrans translation plus ``.origin`` ("phrase", "cache" or "remote").
+    """
+
+    def __init__(self, backend, cache_path=None, capacity=512, phrase_tables=None, save_every=10):
+        self.backend = backend
+        self.cache_path = cache_path
+        self.capacity = capacity
+        self.phrase_tables = phrase_tables or {}
+        self.save_every = save_every
+        self.cache = collections.OrderedDict()
+        self.phrase_hits = 0
+        self.cache_hits = 0
+        self.misses = 0
+        self.remote_time = 0.0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def translate(self, text, src="auto", dest="en"):
+        key = normalize_text(text)
+        if dest == "en":
+            phrase = self.phrase_tables.get(src, {}).get(key)
+            if phrase is not None:
+                self.phrase_hits += 1
+                return TranslationResult(phrase, src, dest, "phrase")
+
+        cache_key = (src, dest, key)
+        with self._lock:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return TranslationResult(cached, src, dest, "cache")
+
+        start = time.perf_counter()
+        translated = self.backend.translate(text, src=src, dest=dest).text
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.remote_time += elapsed
+            self.cache[cache_key] = translated
+            self.cache.move_to_end(cache_key)
+            while len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+        return TranslationResult(translated, src, dest, "remote")
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable translation cache: {e}")
+            return
+        # Stored least recently used first, so insertion order restores recency
+        for src, dest, key, translated in entries[-self.capacity:]:
+            self.cache[(src, dest, key)] = translated
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            entries = [[src, dest, key, value] for (src, dest, key), value in self.cache.items()]
+            self._unsaved = 0
+        atomic_write_json(self.cache_path, entries, ensure_ascii=False)
+
+    def stats(self):
+        lookups = self.phrase_hits + self.cache_hits + self.misses
+        hits = self.phrase_hits + self.cache_hits
+        mean_remote = self.remote_time / self.misses if self.misses else 0.0
+        return {
+            "lookups": lookups,
+            "phrase_hits": self.phrase_hits,
+            "cache_hits": self.cache_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "mean_remote_ms": mean_remote * 1000,
+            # Every hit skips one remote round trip of average length
+            "saved_s": hits * mean_remote,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Translations: {stats['lookups']} lookups, hit rate {stats['hit_rate']:.0%} "
+              f"({stats['phrase_hits']} phrase table, {stats['cache_hits']} cache, "
+              f"{stats['misses']} remote at {stats['mean_remote_ms']:.0f} ms avg), "
+              f"~{stats['saved_s']:.1f} s saved")
@@ -0,0 +1,172 @@
+"""Voice-activity gating between the microphone listener and ASR.
+
+``recognizer.listen`` cuts a segment whenever the energy crosses a threshold,
+so door slams, fans and background chatter all reach ``recognize_google``.
+``SpeechGate`` looks at every segment locally, trims leading and trailing
+silence, optionally requires a wake word, and drops anything that is not a
+plausible spoken command before it costs an ASR round trip.
+"""
+import collections
+import time
+
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Per-frame speech decisions from energy, spectral flatness and speech-band ratio.
+
+    A frame is speech when it is ``margin_db`` above the noise floor, its
+    300-3400 Hz spectrum is not flat (noise is, voiced speech is harmonic) and
+    most of its energy falls in that band. Segments extend the decisions by
+    ``hangover_ms`` on both sides so that consonants at word edges survive.
+    The noise floor is the quietest 10% of each segment, tracked across the
+    session so a segment that is speech from end to end is still judged
+    against the room.
+    """
+
+    def __init__(self, frame_ms=20, margin_db=9.0, max_flatness=0.45, min_band_ratio=0.4,
+                 hangover_ms=150, min_gap_ms=300):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.max_flatness = max_flatness
+        self.min_band_ratio = min_band_ratio
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.min_gap = max(1, min_gap_ms // frame_ms)
+        self.noise_db = None
+
+    def frame_length(self, sample_rate):
+        return int(sample_rate * self.frame_ms / 1000)
+
+    def features(self, samples, sample_rate):
+        """``(energy_db, flatness, band_ratio)``, one value per frame."""
+        frame = self.frame_length(sample_rate)
+        count = len(samples) // frame
+        frames = samples[:count * frame].reshape(count, frame)
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2 + 1e-12
+        freqs = np.fft.rfftfreq(frame, 1.0 / sample_rate)
+        band = power[:, (freqs >= 300) & (freqs <= 3400)]
+        flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+        band_ratio = band.sum(axis=1) / power.sum(axis=1)
+        return energy_db, flatness, band_ratio
+
+    def classify(self, samples, sample_rate):
+        """Boolean speech mask per frame for float samples in [-1, 1]."""
+        energy_db, flatness, band_ratio = self.features(samples, sample_rate)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+        floor = np.percentile(energy_db, 10)
+        if self.noise_db is not None:
+            floor = min(floor, self.noise_db + 3.0)
+        speech = ((energy_db > floor + self.margin_db) & (flatness < self.max_flatness)
+                  & (band_ratio > self.min_band_ratio))
+        quiet = energy_db[~speech]
+        if len(quiet):
+            level = float(np.median(quiet))
+            self.noise_db = level if self.noise_db is None else 0.8 * self.noise_db + 0.2 * level
+        return speech
+
+    def segments(self, speech):
+        """``[(start_frame, end_frame)]`` speech runs with hangover, merging gaps shorter than ``min_gap_ms``."""
+        kernel = np.ones(2 * self.hangover + 1)
+        extended = np.convolve(speech.astype(float), kernel, mode="same") > 0
+        edges = np.diff(np.concatenate(([0], extended.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        runs = []
+        for start, end in zip(starts, ends):
+            if runs and start - runs[-1][1] < self.min_gap:
+                runs[-1] = (runs[-1][0], end)
+            else:
+                runs.append((start, end))
+        return runs
+
+
+class SpeechGate:
+    """Filters ``sr.AudioData`` segments before ASR; ``filter`` returns the trimmed audio or None.
+
+    Segments with less than ``min_speech`` or more than ``max_speech`` seconds
+    of speech are dropped. With a ``wake_spotter`` (a ``KeywordSpotter``
+    enrolled with the wake word) only speech after the wake word is forwarded;
+    saying the wake word alone opens a ``wake_window`` in which the next
+    segment is accepted without it.
+    """
+
+    def __init__(self, vad=None, min_speech=0.2, max_speech=6.0, pad=0.15,
+                 wake_spotter=None, wake_window=5.0):
+        self.vad = vad or VoiceActivityDetector()
+        self.min_speech = min_speech
+        self.max_speech = max_speech
+        self.pad = pad
+        self.wake_spotter = wake_spotter
+        self.wake_window = wake_window
+        self.segments = 0
+        self.accepted = 0
+        self.frames = 0
+        self.speech_frames = 0
+        self.trimmed_seconds = 0.0
+        self.rejected = collections.Counter()
+        self._awake_until = 0.0
+
+    def _reject(self, reason):
+        self.rejected[reason] += 1
+        return None
+
+    def filter(self, audio):
+        self.segments += 1
+        sample_rate = audio.sample_rate
+        pcm = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+        samples = pcm.astype(np.float32) / 32768.0
+        speech = self.vad.classify(samples, sample_rate)
+        frame = self.vad.frame_length(sample_rate)
+        self.frames += len(speech)
+        self.speech_frames += int(speech.sum())
+
+        runs = self.vad.segments(speech)
+        if not runs:
+            return self._reject("silence")
+        speech_seconds = speech.sum() * frame / sample_rate
+        if speech_seconds < self.min_speech:
+            return self._reject("too short")
+        if speech_seconds > self.max_speech:
+            return self._reject("too long")
+
+        pad = int(self.pad * sample_rate)
+        start = max(0, runs[0][0] * frame - pad)
+        end = min(len(pcm), runs[-1][1] * frame + pad)
+
+        if self.wake_spotter is not None and time.monotonic() > self._awake_until:
+            self.wake_spotter.restart()
+            detections = self.wake_spotter.feed(samples[start:end])
+            if not detections:
+                return self._reject("no wake word")
+            start += int(detections[0].stream_time * sample_rate)
+            remaining = speech[start // frame:].sum() * frame / sample_rate
+            if remaining < self.min_speech:
+                self._awake_until = time.monotonic() + self.wake_window
+                return self._reject("wake word only")
+
+        self._awake_until = 0.0
+        self.accepted += 1
+        self.trimmed_seconds += (len(pcm) - (end - start)) / sample_rate
+        return type(audio)(pcm[start:end].tobytes(), sample_rate, 2)
+
+    def stats(self):
+        return {
+            "segments": self.segments,
+            "accepted": self.accepted,
+            "rejected": dict(self.rejected),
+            "asr_calls_avoided": sum(self.rejected.values()),
+            "frames": self.frames,
+            "speech_frames": self.speech_frames,
+            "trimmed_s": self.trimmed_seconds,
+        }
+
+    def report(self):
+        stats = self.stats()
+        reasons = ", ".join(f"{n} {reason}" for reason, n in sorted(stats["rejected"].items())) or "none"
+        print(f"Speech gate: {stats['segments']} segments, {stats['frames']} frames "
+              f"({stats['speech_frames']} speech); {stats['accepted']} sent to ASR, "
+              f"rejected: {reasons}")
+        print(f"ASR calls avoided: {stats['asr_calls_avoided']}, "
+              f"silence trimmed from accepted segments: {stats['trimmed_s']:.1f} s")
@@ -0,0 +1,156 @@
+"""Producer/consumer voice pipeline: the microphone keeps listening while commands are processed."""
+import collections
+import threading
+import time
+
+from stage_trace import RollingHistogram, StageTracer
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards the oldest item instead of blocking the producer.
+
+    For voice commands the newest utterance is the one that matters, so when
+    recognition falls behind, stale audio is dropped rather than the fresh one.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.dropped = 0
+        self.max_depth = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Append ``item``; returns the dropped item if the queue was full, else None."""
+        with self._cond:
+            dropped = None
+            if len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.max_depth = max(self.max_depth, len(self.items))
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout=None):
+        """Block until an item is available; returns None once the queue is closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.items or self.closed, timeout)
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class VoicePipeline:
+    """Capture audio in the background and hand it to recognition/NLU workers.
+
+    ``recognizer.listen_in_background`` keeps the microphone open on its own
+    thread and pushes every phrase into a bounded drop-oldest queue. Worker
+    threads call ``handler(audio, trace)`` for each phrase, where ``trace`` is
+    a ``stage_trace.Trace`` whose clock starts at the end of the utterance and
+    which already carries the ``capture`` span (the phrase's length as heard,
+    before any trimming by ``gate``) and the ``queue_wait`` span.
+
+    One worker (the default) keeps commands in the order they were spoken.
+    An optional ``gate`` (``vad.SpeechGate``) drops or trims each phrase on the
+    listener thread before it is queued, and ``calibrate`` seconds of room
+    noise set the recognizer's energy threshold before listening starts.
+    """
+
+    def __init__(self, recognizer, source, handler, maxsize=4, workers=1,
+                 phrase_time_limit=None, tracer=None, gate=None, calibrate=None):
+        self.recognizer = recognizer
+        self.source = source
+        self.handler = handler
+        self.queue = DropOldestQueue(maxsize)
+        self.workers = workers
+        self.phrase_time_limit = phrase_time_limit
+        self.tracer = tracer or StageTracer()
+        self.gate = gate
+        self.calibrate = calibrate
+        self.queue_wait = RollingHistogram()
+        self.captured = 0
+        self.processed = 0
+        self._threads = []
+        self._stop_listening = None
+
+    def _on_audio(self, recognizer, audio):
+        # Runs on the listener thread: enqueue and return to listening immediately
+        captured_at = time.perf_counter()
+        spoken = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        self.captured += 1
+        if self.gate is not None:
+            audio = self.gate.filter(audio)
+            if audio is None:
+                return
+        dropped = self.queue.put((captured_at, spoken, audio))
+        if dropped is not None:
+            print("Recognition is behind; dropped an older utterance.")
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            enqueued_at, spoken, audio = item
+            trace = self.tracer.begin(utterance_end=enqueued_at)
+            self.tracer.record(trace, "capture", None, spoken)
+            waited = time.perf_counter() - enqueued_at
+            self.queue_wait.add(waited)
+            self.tracer.record(trace, "queue_wait", None, waited)
+            try:
+                self.handler(audio, trace)
+            except Exception as e:
+                print(f"Error in command processing: {e}")
+            self.processed += 1
+
+    def start(self):
+        """Start the workers and the background listener."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"voice-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.calibrate:
+            with self.source as source:
+                self.recognizer.adjust_for_ambient_noise(source, duration=self.calibrate)
+            print(f"Energy threshold calibrated to {self.recognizer.energy_threshold:.0f}")
+        self._stop_listening = self.recognizer.listen_in_background(
+            self.source, self._on_audio, phrase_time_limit=self.phrase_time_limit)
+        print("Listening for commands...")
+
+    def stop(self, timeout=5):
+        """Stop listening, let the workers drain the queue and exit."""
+        if self._stop_listening is not None:
+            self._stop_listening(wait_for_stop=False)
+            self._stop_listening = None
+        self.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        wait = self.queue_wait.summary()
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "dropped": self.queue.dropped,
+            "max_queue_depth": self.queue.max_depth,
+            "queue_wait_p50_ms": wait["p50"] * 1000,
+            "queue_wait_p95_ms": wait["p95"] * 1000,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Captured {stats['captured']} utterances, processed {stats['processed']}, "
+              f"dropped {stats['dropped']} (max queue depth {stats['max_queue_depth']})")
+        print(f"Queue wait: p50 {stats['queue_wait_p50_ms']:.1f} ms, "
+              f"p95 {stats['queue_wait_p95_ms']:.1f} ms")
+        if self.gate is not None:
+            self.gate.report()